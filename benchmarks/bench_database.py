@@ -0,0 +1,75 @@
+import itertools
+import os
+
+import pytest
+
+from benchmarks.helpers import random_embeddings
+from shared.database import ChromaDB
+from shared.models import Document, Source
+
+DIMENSION = 384
+NUM_QUERIES = 100
+# Building the 1M vector collection takes a long time, so it only runs when
+# explicitly enabled, e.g. with `RAG_BENCH_MAX_VECTORS=1000000`.
+MAX_VECTORS = int(os.environ.get("RAG_BENCH_MAX_VECTORS", 100_000))
+
+
+def sizes() -> list:
+    return [
+        pytest.param(
+            num_vectors,
+            marks=pytest.mark.skipif(
+                num_vectors > MAX_VECTORS,
+                reason=f"RAG_BENCH_MAX_VECTORS is {MAX_VECTORS}",
+            ),
+        )
+        for num_vectors in [10_000, 100_000, 1_000_000]
+    ]
+
+
+def make_chunks(num_vectors: int) -> list[Document]:
+    embeddings = random_embeddings(num_vectors, DIMENSION)
+    source = Source(title="synthetic", source="synthetic.pdf")
+    return [
+        Document(page_content=f"chunk {ind}", source=source, page=1, embedding=row)
+        for ind, row in enumerate(embeddings)
+    ]
+
+
+@pytest.fixture(scope="module")
+def config(tmp_path_factory) -> dict:
+    return {"database": {"path": str(tmp_path_factory.mktemp("db"))}}
+
+
+@pytest.fixture(scope="module")
+def populated_databases(config) -> dict[int, ChromaDB]:
+    """Collections are built once per size and shared by the query benchmarks."""
+    return {}
+
+
+@pytest.mark.parametrize("num_vectors", sizes())
+def test_add_chunks(benchmark, config, num_vectors):
+    chunks = make_chunks(num_vectors)
+    collection_ids = itertools.count()
+
+    def setup():
+        database = ChromaDB(config, f"add_{num_vectors}_{next(collection_ids)}")
+        return (database,), {}
+
+    benchmark.pedantic(
+        lambda database: database.add_chunks(chunks), setup=setup, rounds=1
+    )
+
+
+@pytest.mark.parametrize("num_vectors", sizes())
+def test_query(benchmark, config, populated_databases, num_vectors):
+    if num_vectors not in populated_databases:
+        database = ChromaDB(config, f"query_{num_vectors}")
+        database.add_chunks(make_chunks(num_vectors))
+        populated_databases[num_vectors] = database
+    database = populated_databases[num_vectors]
+    query_embeddings = random_embeddings(NUM_QUERIES, DIMENSION, seed=1)
+
+    contexts = benchmark(database.query, query_embeddings)
+
+    assert len(contexts) == NUM_QUERIES
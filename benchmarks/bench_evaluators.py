@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from evaluators import RetrievalEvaluator
+from evaluators import (
+    binary_relevance_order_aware,
+    binary_relevance_order_unaware,
+    graded_relevance,
+)
+from shared.models import ExperimentResults, QueryResult
+
+CONFIG = {"evaluators": {"order_unaware": {"k": 3}, "order_aware": {"k": 3}}}
+NUM_DOCS = 1_000
+
+
+def make_inputs(num_queries: int) -> tuple[list[dict], ExperimentResults]:
+    rng = random.Random(0)
+    queries = [
+        {
+            "text": f"query {ind}",
+            "relevant_docs": [
+                {"doc": f"doc{rng.randrange(NUM_DOCS)}", "relevance": rng.randint(0, 3)}
+                for _ in range(3)
+            ],
+        }
+        for ind in range(num_queries)
+    ]
+    results = ExperimentResults(
+        results=[
+            QueryResult(
+                query=query["text"],
+                contexts=[f"doc{rng.randrange(NUM_DOCS)}" for _ in range(5)],
+                template="{query} {contexts}",
+                response="response",
+            )
+            for query in queries
+        ],
+        model="model",
+        parameters={},
+        timestamp_end=None,
+    )
+    return queries, results
+
+
+@pytest.mark.parametrize("num_queries", [1_000, 10_000, 100_000])
+@pytest.mark.parametrize(
+    "module",
+    [binary_relevance_order_unaware, binary_relevance_order_aware, graded_relevance],
+    ids=["order_unaware", "order_aware", "graded_relevance"],
+)
+def test_evaluator(benchmark, module, num_queries):
+    queries, results = make_inputs(num_queries)
+    evaluator = module.Evaluator(CONFIG, queries)
+
+    benchmark(evaluator.evaluate, results)
+
+
+@pytest.mark.parametrize("num_queries", [1_000, 10_000, 100_000])
+def test_retrieval_evaluator(benchmark, num_queries):
+    queries, results = make_inputs(num_queries)
+    evaluator = RetrievalEvaluator(CONFIG, {"queries": queries})
+
+    # The results are not modified, so every round evaluates the same inputs.
+    benchmark.pedantic(evaluator.run, args=(results,), rounds=5)
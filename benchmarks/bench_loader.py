@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.helpers import random_text, write_pdf
+from shared.loader import Loader
+
+
+@pytest.mark.parametrize("num_pages", [10, 100])
+def test_load_pdf(benchmark, tmp_path, num_pages):
+    path = str(tmp_path / "synthetic.pdf")
+    write_pdf(path, [random_text(400, seed=page) for page in range(num_pages)])
+    loader = Loader([path])
+
+    documents = benchmark(loader.load_pdf)
+
+    assert len(documents) == num_pages
+
+
+@pytest.mark.parametrize("num_pages", [10, 100])
+def test_load_pdf_cached(benchmark, tmp_path, num_pages):
+    path = str(tmp_path / "synthetic.pdf")
+    write_pdf(path, [random_text(400, seed=page) for page in range(num_pages)])
+    loader = Loader([path], cache_directory=str(tmp_path / "page_cache"))
+    expected = loader.load_pdf()
+
+    documents = benchmark(loader.load_pdf)
+
+    assert documents == expected
@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.helpers import make_pages
+from shared.splitter import TextSplitter
+
+
+@pytest.mark.parametrize("num_pages", [100, 1_000])
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(512, 128), (2048, 256)])
+def test_split_documents(benchmark, num_pages, chunk_size, chunk_overlap):
+    documents = make_pages(num_pages)
+    splitter = TextSplitter({"chunk_size": chunk_size, "chunk_overlap": chunk_overlap})
+
+    chunks = benchmark(splitter.split_documents, documents)
+
+    assert len(chunks) >= num_pages
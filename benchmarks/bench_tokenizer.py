@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from benchmarks.helpers import random_text
+from shared import AbstractTokenizer
+from shared.prompt import ContextPacker
+
+
+class WhitespaceTokenizer(AbstractTokenizer):
+    """Measures the overhead of the limit check independent of a tokenizer."""
+
+    def __init__(self, max_tokens: int):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_tokens = max_tokens
+        self.model = "whitespace"
+
+    def tokenize_text(self, text: str) -> list[int]:
+        return [len(word) for word in text.split()]
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return [random_text(100, seed=ind) for ind in range(10_000)]
+
+
+def test_check_tokenlimit_whitespace(benchmark, texts):
+    tokenizer = WhitespaceTokenizer(max_tokens=512)
+    assert not benchmark(tokenizer.check_tokenlimit_exceeded, texts)
+
+
+def test_check_tokenlimit_tiktoken(benchmark, texts):
+    try:
+        from openai_pipeline.tokenizer import OpenAITokenizer
+
+        tokenizer = OpenAITokenizer("text-embedding-3-small", max_tokens=8191)
+        tokenizer.tokenizer  # Loads the encoding.
+    except Exception as error:
+        pytest.skip(f"tiktoken encoding is not available: {error}")
+    assert not benchmark(tokenizer.check_tokenlimit_exceeded, texts)
+
+
+def test_check_tokenlimit_sentence_transformer(benchmark, texts):
+    try:
+        from local_pipeline.tokenizer import SentenceTransformerTokenizer
+
+        tokenizer = SentenceTransformerTokenizer(
+            "sentence-transformers/all-MiniLM-L6-v2", max_tokens=512
+        )
+        tokenizer.tokenizer  # Loads the tokenizer.
+    except Exception as error:
+        pytest.skip(f"Tokenizer is not available: {error}")
+    assert not benchmark(tokenizer.check_tokenlimit_exceeded, texts)
+
+
+def test_pack_contexts_cached(benchmark, texts):
+    packer = ContextPacker(WhitespaceTokenizer(max_tokens=512), max_tokens=400)
+    template = "Question: {query} Contexts: {contexts}"
+    contexts = texts[:5]
+    packer.pack(template, "query", contexts)
+    packed = benchmark(packer.pack, template, "query", contexts)
+    assert len(packed) == 4
@@ -0,0 +1,95 @@
+"""Synthetic inputs and offline stand-ins for the benchmarks."""
+
+import random
+
+import numpy as np
+
+from shared.models import Document, Source
+
+WORDS = (
+    "retrieval augmented generation combines a parametric memory with a "
+    "non-parametric memory of dense vector indices over documents which are "
+    "accessed with a pre-trained neural retriever to answer knowledge intensive "
+    "questions"
+).split()
+
+
+def random_text(num_words: int, seed: int) -> str:
+    """Returns deterministic pseudo-random text."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+
+def make_pages(num_pages: int, words_per_page: int = 400) -> list[Document]:
+    """Returns a list of synthetic page documents of a single file."""
+    source = Source(title="synthetic", source="synthetic.pdf")
+    return [
+        Document(
+            page_content=random_text(words_per_page, seed=page),
+            source=source,
+            page=page + 1,
+        )
+        for page in range(num_pages)
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: list[str], words_per_line: int = 12) -> None:
+    """Writes a minimal PDF with one page of Helvetica text per entry in `pages`."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, written once the page object numbers are known.
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for text in pages:
+        words = text.split()
+        lines = [
+            " ".join(words[ind : ind + words_per_line])
+            for ind in range(0, len(words), words_per_line)
+        ]
+        stream = "BT /F1 10 Tf 12 TL 50 780 Td "
+        stream += " ".join(f"({_escape(line)}) Tj T*" for line in lines)
+        stream += " ET"
+        stream = stream.encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % ref for ref in page_refs),
+        len(page_refs),
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref_offset,
+    )
+    with open(path, "wb") as file:
+        file.write(output)
+
+
+def random_embeddings(num: int, dimension: int, seed: int = 0) -> np.ndarray:
+    """Returns random unit-length float32 embeddings."""
+    embeddings = (
+        np.random.default_rng(seed).standard_normal((num, dimension)).astype(np.float32)
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings
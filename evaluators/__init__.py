@@ -1,15 +1,13 @@
-from shared.models import (
-    ExperimentResults,
-)
-from shared.constants import InputConstants
+from shared.constants import ConfigConstants, InputConstants
 from evaluators import (
     binary_relevance_order_unaware,
     binary_relevance_order_aware,
     graded_relevance,
 )
+from evaluators.runner import EvaluatorRunner
 
 
-class RetrievalEvaluator:
+class RetrievalEvaluator(EvaluatorRunner):
     """Defines evaluators to run for evaluating the retriever component.
 
     Example usage:
@@ -37,10 +35,43 @@ class RetrievalEvaluator:
         self.graded_relevance_evaluators = graded_relevance.Evaluator(
             self.config, self.prompts_queries.get(InputConstants.KEY_QUERIES)
         )
+        super().__init__(
+            [
+                self.evaluator_order_unaware_evaluators,
+                self.evaluator_order_aware_evaluators,
+                self.graded_relevance_evaluators,
+            ]
+        )
+
+
+class GenerationEvaluator(EvaluatorRunner):
+    """Defines evaluators to run for evaluating the generated responses.
+
+    Only the evaluators with a section in the `evaluators` config are run, and
+    their modules are imported on construction.
+
+    Example usage:
+        ```
+        evaluators = GenerationEvaluator(config, prompts_queries)
+        results_with_evals = evaluators.run(results_without_or_with_evals)
+        ```
+
+    Attributes:
+        config:         The configuration as a dict.
+        prompt_queries: The experiment inputs.
+    """
+
+    def __init__(self, config: dict, prompts_queries: dict):
+        self.config = config
+        self.prompts_queries = prompts_queries
+        evaluators = []
+        config_evaluators = config.get(ConfigConstants.KEY_EVALUATORS) or {}
+        if config_evaluators.get(ConfigConstants.KEY_EVALUATORS_LLM_JUDGE):
+            from evaluators import llm_judge
+
+            evaluators.append(llm_judge.Evaluator(self.config))
+        if config_evaluators.get(ConfigConstants.KEY_EVALUATORS_EMBEDDING_SIMILARITY):
+            from evaluators import embedding_similarity
 
-    def run(self, results: ExperimentResults) -> ExperimentResults:
-        """Runs the evaluators."""
-        results_with_eval = self.evaluator_order_unaware_evaluators.run(results)
-        results_with_eval = self.evaluator_order_aware_evaluators.run(results_with_eval)
-        results_with_eval = self.graded_relevance_evaluators.run(results_with_eval)
-        return results_with_eval
+            evaluators.append(embedding_similarity.Evaluator(self.config))
+        super().__init__(evaluators)
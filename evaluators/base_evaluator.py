@@ -1,10 +1,95 @@
 from abc import ABC
+from dataclasses import replace
 
-from shared.models import ExperimentResults
+from shared.cache import json_hash
+from shared.constants import EvaluatorConstants
+from shared.models import Evaluations, ExperimentResults
+
+
+def merge_evaluations(
+    results: ExperimentResults, evaluations: list[Evaluations]
+) -> ExperimentResults:
+    """Returns a copy of the results with the evaluations of several evaluators
+    added to the existing ones.
+
+    Each query result is copied once, however many evaluators there are. If
+    evaluators compute a metric of the same name, the later one wins. The
+    metrics an evaluator added to the results before are replaced by its new
+    ones, and its fingerprint is recorded in `evaluators`.
+    """
+    query_evaluations = [dict(q.evaluations or {}) for q in results.results]
+    aggregate = dict(results.evaluations or {})
+    evaluators = dict(results.evaluators or {})
+    for evaluation in evaluations:
+        if evaluation.evaluator:
+            previous = evaluators.get(evaluation.evaluator) or {}
+            for metric in previous.get(EvaluatorConstants.KEY_METRICS, []):
+                aggregate.pop(metric, None)
+                for merged in query_evaluations:
+                    merged.pop(metric, None)
+            evaluators[evaluation.evaluator] = {
+                EvaluatorConstants.KEY_FINGERPRINT: evaluation.fingerprint,
+                EvaluatorConstants.KEY_METRICS: sorted(
+                    set(evaluation.aggregate).union(*evaluation.queries)
+                ),
+            }
+        for merged, query_evaluation in zip(query_evaluations, evaluation.queries):
+            merged.update(query_evaluation)
+        aggregate.update(evaluation.aggregate)
+    return replace(
+        results,
+        results=[
+            replace(query_result, evaluations=merged)
+            for query_result, merged in zip(results.results, query_evaluations)
+        ],
+        evaluations=aggregate,
+        evaluators=evaluators or None,
+    )
 
 
 class BaseEvaluator(ABC):
-    """Abstract Base Class for evaluators."""
+    """Abstract Base Class for evaluators.
+
+    Evaluators implement `evaluate()`, which computes their metrics without
+    modifying the results, so several evaluators can read the same results
+    concurrently and their metrics are merged once by an `EvaluatorRunner`.
+
+    The `fingerprint()` of an evaluator changes whenever its metrics would, e.g.
+    with its config or the ground truth, so results evaluated with the same
+    fingerprint need not be evaluated again.
+    """
+
+    name: str = ""
+
+    def evaluate(self, results: ExperimentResults) -> Evaluations:
+        """Returns the evaluations of each query and of the whole run."""
+
+    def fingerprint_inputs(self) -> object:
+        """Returns the JSON-serializable inputs the metrics depend on besides
+        the results."""
+        return None
+
+    def fingerprint(self) -> str:
+        return json_hash([self.name, self.fingerprint_inputs()])
+
+    def evaluate_tagged(self, results: ExperimentResults) -> Evaluations:
+        """Returns the evaluations tagged with the name and fingerprint of the
+        evaluator."""
+        evaluations = self.evaluate(results)
+        evaluations.evaluator = self.name
+        evaluations.fingerprint = self.fingerprint()
+        return evaluations
+
+    def is_current(self, results: ExperimentResults) -> bool:
+        """Returns whether the results were evaluated with the current
+        fingerprint of the evaluator."""
+        evaluated = (results.evaluators or {}).get(self.name) or {}
+        return evaluated.get(EvaluatorConstants.KEY_FINGERPRINT) == self.fingerprint()
 
     def run(self, results: ExperimentResults) -> ExperimentResults:
-        """Runs the evaluators and adds the results to the ExperimentResults object."""
+        """Runs the evaluator and returns a copy of the ExperimentResults object
+        with the evaluations added."""
+        return merge_evaluations(results, [self.evaluate_tagged(results)])
+
+    def close(self) -> None:
+        """Releases the resources of the evaluator."""
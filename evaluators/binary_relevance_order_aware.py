@@ -1,10 +1,9 @@
-from dataclasses import replace
-
 from shared.models import (
+    Evaluations,
     ExperimentResults,
     QueryResult,
 )
-from shared.constants import InputConstants
+from shared.constants import ConfigConstants, InputConstants
 from evaluators.base_evaluator import BaseEvaluator
 
 
@@ -89,55 +88,40 @@ class Metrics:
 class Evaluator(BaseEvaluator):
     """Evaluator for evaluation with order aware metrics."""
 
+    name = ConfigConstants.KEY_EVALUATORS_ORDER_AWARE
+
     def __init__(self, config, queries: list[dict]):
         self.relevant_docs: list[list[str]] = [
             [q.get("doc") for q in query.get(InputConstants.KEY_RELEVANT_DOCS)]
             for query in queries
         ]
 
-    def run(self, experiment_results: ExperimentResults) -> ExperimentResults:
-        """Runs evaluation on order aware metrics."""
+    def fingerprint_inputs(self) -> object:
+        return self.relevant_docs
 
-        avg_evals = experiment_results.evaluations
+    def evaluate(self, experiment_results: ExperimentResults) -> Evaluations:
+        """Evaluates order aware metrics."""
 
         query_results_obj: list[QueryResult] = experiment_results.results
         retrieved_documents_list: list[list[str]] = [
             q.contexts for q in query_results_obj
         ]
-        query_evals: list[dict] = [q.evaluations for q in query_results_obj]
         num_queries = len(query_results_obj)
 
         # Calculate metrics
         order_aware_metrics = Metrics(self.relevant_docs)
 
         # Query-level metrics
-        query_results_with_evals = []
-
+        query_evals = []
         for i in range(num_queries):
             rr = order_aware_metrics.reciprocal_rank(retrieved_documents_list, i)
             ap = order_aware_metrics.average_precision(retrieved_documents_list, i)
-            query_evals[i]["RR"] = rr
-            query_evals[i]["AP"] = ap
-            updated_query_results_obj = replace(
-                query_results_obj[i], evaluations=query_evals[i]
-            )
-            query_results_with_evals.append(updated_query_results_obj)
+            query_evals.append({"RR": rr, "AP": ap})
 
         # Overall metrics
-        mean_reciprocal_rank = order_aware_metrics.mean_reciprocal_rank(
-            retrieved_documents_list
-        )
-        mean_average_precision = order_aware_metrics.mean_average_precision(
-            retrieved_documents_list
-        )
-        avg_evals["MRR"] = mean_reciprocal_rank
-        avg_evals["MAP"] = mean_average_precision
-
-        # Update ExperimentResults
-        results_with_metrics = replace(
-            experiment_results,
-            results=query_results_with_evals,
-            evaluations=avg_evals,
-        )
-
-        return results_with_metrics
+        avg_evals = {
+            "MRR": order_aware_metrics.mean_reciprocal_rank(retrieved_documents_list),
+            "MAP": order_aware_metrics.mean_average_precision(retrieved_documents_list),
+        }
+
+        return Evaluations(queries=query_evals, aggregate=avg_evals)
@@ -1,6 +1,5 @@
-from dataclasses import replace
-
 from shared.models import (
+    Evaluations,
     ExperimentResults,
     QueryResult,
 )
@@ -52,6 +51,8 @@ class Metrics:
 class Evaluator(BaseEvaluator):
     """Evaluator for evaluation with order unaware metrics."""
 
+    name = ConfigConstants.KEY_EVALUATORS_ORDER_UNAWARE
+
     def __init__(self, config, queries: list[dict]):
         self.relevant_docs: list[list[str]] = [
             [
@@ -69,72 +70,42 @@ class Evaluator(BaseEvaluator):
         )
         self.k = eval_config.get(ConfigConstants.KEY_EVALUATORS_ORDER_UNAWARE_K)
 
-    def run(self, experiment_results: ExperimentResults) -> ExperimentResults:
-        """Runs evaluation on order unaware metrics."""
+    def fingerprint_inputs(self) -> object:
+        return [self.k, self.relevant_docs]
+
+    def evaluate(self, experiment_results: ExperimentResults) -> Evaluations:
+        """Evaluates order unaware metrics."""
 
         query_results: list[QueryResult] = experiment_results.results
-        query_results_with_evals = []
+        query_evals = []
 
         # Calculate metrics for each query
         for relevant_doc, query_result in zip(self.relevant_docs, query_results):
             order_unaware_metrics = Metrics(relevant_doc)
-            query_result_with_eval = query_result
-            if not query_result_with_eval.evaluations:
-                query_result_with_eval.evaluations = {}
-
             retrieved_documents = query_result.contexts
-            query_result_with_eval.evaluations[f"precision@{str(self.k)}"] = (
-                order_unaware_metrics.precision_at_k(retrieved_documents, self.k)
+            query_evals.append(
+                {
+                    f"precision@{str(self.k)}": order_unaware_metrics.precision_at_k(
+                        retrieved_documents, self.k
+                    ),
+                    f"recall@{str(self.k)}": order_unaware_metrics.recall_at_k(
+                        retrieved_documents, self.k
+                    ),
+                    f"f1@{str(self.k)}": order_unaware_metrics.f1_at_k(
+                        retrieved_documents, self.k
+                    ),
+                }
             )
-            query_result_with_eval.evaluations[f"recall@{str(self.k)}"] = (
-                order_unaware_metrics.recall_at_k(retrieved_documents, self.k)
-            )
-            query_result_with_eval.evaluations[f"f1@{str(self.k)}"] = (
-                order_unaware_metrics.f1_at_k(retrieved_documents, self.k)
-            )
-            query_results_with_evals.append(query_result_with_eval)
 
         # Calculate average metrics over all queries.
-        n = len(query_results_with_evals)
-
-        avg_precision = (
-            sum(
-                [
-                    q.evaluations.get(f"precision@{str(self.k)}")
-                    for q in query_results_with_evals
-                ]
-            )
-            / n
-        )
-        avg_recall = (
-            sum(
-                [
-                    q.evaluations.get(f"recall@{str(self.k)}")
-                    for q in query_results_with_evals
-                ]
-            )
-            / n
-        )
-        avg_f1 = (
-            sum(
-                [
-                    q.evaluations.get(f"f1@{str(self.k)}")
-                    for q in query_results_with_evals
-                ]
-            )
-            / n
-        )
-
+        n = len(query_evals)
         avg_evals = {
-            f"avg_precision@{str(self.k)}": avg_precision,
-            f"avg_recall@{str(self.k)}": avg_recall,
-            f"avg_f1@{str(self.k)}": avg_f1,
+            f"avg_{metric}": sum(evals[metric] for evals in query_evals) / n
+            for metric in (
+                f"precision@{str(self.k)}",
+                f"recall@{str(self.k)}",
+                f"f1@{str(self.k)}",
+            )
         }
 
-        results_with_metrics = replace(
-            experiment_results,
-            results=query_results_with_evals,
-            evaluations=avg_evals,
-        )
-
-        return results_with_metrics
+        return Evaluations(queries=query_evals, aggregate=avg_evals)
@@ -0,0 +1,186 @@
+import logging
+from typing import Any, Optional
+
+import numpy as np
+
+from shared.constants import (
+    ConfigConstants,
+    EvaluatorConstants,
+    InstrumentationConstants,
+    SimilarityConstants,
+)
+from shared.instrumentation import instrumentation
+from shared.models import Evaluations, ExperimentResults
+from shared.registry import get_embedder
+from shared.retrieval import normalize_rows
+from evaluators.base_evaluator import BaseEvaluator
+
+
+def answer_similarities(
+    responses: np.ndarray,
+    queries: np.ndarray,
+    contexts: np.ndarray,
+    owners: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Computes the cosine similarities of answers to their contexts and queries.
+
+    Args:
+        responses: The unit-length embeddings of the responses, one row per query.
+        queries:   The unit-length embeddings of the queries.
+        contexts:  The unit-length embeddings of all contexts of all queries.
+        owners:    The index of the query of each row of `contexts`.
+
+    Returns:
+        The maximum similarity of each response to its contexts, `nan` for
+        queries without contexts, and the similarity of each response to its
+        query.
+    """
+    answer_query = np.einsum("ij,ij->i", responses, queries)
+    pair_similarities = np.einsum("ij,ij->i", responses[owners], contexts)
+    answer_context = np.full(len(responses), -np.inf, dtype=np.float32)
+    np.maximum.at(answer_context, owners, pair_similarities)
+    answer_context[np.isneginf(answer_context)] = np.nan
+    return answer_context, answer_query
+
+
+def _score(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+class Evaluator(BaseEvaluator):
+    """Evaluator for the generated responses by embedding similarity.
+
+    The responses, queries and contexts of a run are embedded in one batch by
+    the embedder of a pipeline, `local` by default, and each response gets the
+    cosine similarity to its closest context as `answer_context_similarity` and
+    to its query as `answer_query_similarity`. With `reuse_index`, contexts are
+    looked up in the pipeline's collection first, so chunks embedded at
+    ingestion are not embedded again.
+
+    Attributes:
+        embedder: The embedder, with a `get_embeddings` method.
+        database: The collection to look up context embeddings in, or `None`.
+    """
+
+    name = ConfigConstants.KEY_EVALUATORS_EMBEDDING_SIMILARITY
+
+    def __init__(self, config: dict, embedder: Any = None, database: Any = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        config_similarity = config[ConfigConstants.KEY_EVALUATORS][
+            ConfigConstants.KEY_EVALUATORS_EMBEDDING_SIMILARITY
+        ]
+        pipeline = config_similarity.get(
+            ConfigConstants.KEY_PIPELINE, ConfigConstants.KEY_LOCAL
+        )
+        self.embedder = embedder or get_embedder(pipeline)(
+            config[ConfigConstants.KEY_PIPELINES][pipeline]
+        )
+        self.database = database
+        if database is None and config_similarity.get(
+            ConfigConstants.KEY_REUSE_INDEX, True
+        ):
+            self.database = self._open_database(config, pipeline)
+
+    @staticmethod
+    def _open_database(config: dict, pipeline: str) -> Any:
+        """Opens the collection the pipeline ingested with the configured splitter."""
+        from shared.database import ChromaDB
+
+        method = config[ConfigConstants.KEY_SPLITTER][ConfigConstants.KEY_METHOD]
+        chunk_size = config[ConfigConstants.KEY_SPLITTER][
+            ConfigConstants.KEY_CHUNK_SIZE
+        ]
+        chunk_overlap = config[ConfigConstants.KEY_SPLITTER][
+            ConfigConstants.KEY_CHUNK_OVERLAP
+        ]
+        return ChromaDB(config, f"{pipeline}_{method}_{chunk_size}_{chunk_overlap}")
+
+    def fingerprint_inputs(self) -> object:
+        return getattr(self.embedder, "model_name", None)
+
+    def close(self) -> None:
+        self.embedder.close()
+
+    def _embed_all(
+        self, responses: list[str], queries: list[str], contexts: list[str]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Embeds responses, queries and the contexts not found in the collection
+        in one batch, and returns their unit-length embeddings."""
+        stored = (
+            self.database.get_embeddings_by_text(contexts)
+            if self.database is not None
+            else {}
+        )
+        instrumentation.count(
+            InstrumentationConstants.COUNTER_REUSED_EMBEDDINGS, len(stored)
+        )
+        missing = [context for context in contexts if context not in stored]
+        embeddings = self.embedder.get_embeddings(responses + queries + missing)
+        embeddings = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+        num_responses = len(responses)
+        embedded = dict(zip(missing, embeddings[2 * num_responses :]))
+        context_embeddings = np.empty((len(contexts), embeddings.shape[1]), np.float32)
+        for ind, context in enumerate(contexts):
+            context_embeddings[ind] = (
+                embedded[context] if context in embedded else stored[context]
+            )
+        return (
+            embeddings[:num_responses],
+            embeddings[num_responses : 2 * num_responses],
+            normalize_rows(context_embeddings),
+        )
+
+    def evaluate(self, experiment_results: ExperimentResults) -> Evaluations:
+        """Evaluates the responses by embedding similarity."""
+        query_results = experiment_results.results
+        if not query_results:
+            return Evaluations(queries=[], aggregate={})
+
+        # Each distinct context is embedded once, the pairs index into them.
+        unique_contexts: dict[str, int] = {}
+        owners, pair_contexts = [], []
+        for ind, query_result in enumerate(query_results):
+            contexts = query_result.prompt_contexts or query_result.contexts or []
+            for context in contexts:
+                if context:
+                    owners.append(ind)
+                    pair_contexts.append(
+                        unique_contexts.setdefault(context, len(unique_contexts))
+                    )
+
+        with instrumentation.span(InstrumentationConstants.STAGE_SIMILARITY) as span:
+            span.add(InstrumentationConstants.COUNTER_TEXTS, len(query_results))
+            responses, queries, contexts = self._embed_all(
+                [q.response or "" for q in query_results],
+                [q.query for q in query_results],
+                list(unique_contexts),
+            )
+            answer_context, answer_query = answer_similarities(
+                responses,
+                queries,
+                contexts[np.asarray(pair_contexts, dtype=np.intp)],
+                np.asarray(owners, dtype=np.intp),
+            )
+
+        query_evals = [
+            {
+                SimilarityConstants.METRIC_ANSWER_CONTEXT_SIMILARITY: _score(
+                    answer_context[ind]
+                ),
+                SimilarityConstants.METRIC_ANSWER_QUERY_SIMILARITY: _score(
+                    answer_query[ind]
+                ),
+            }
+            for ind in range(len(query_results))
+        ]
+        avg_evals = {}
+        for metric, values in (
+            (SimilarityConstants.METRIC_ANSWER_CONTEXT_SIMILARITY, answer_context),
+            (SimilarityConstants.METRIC_ANSWER_QUERY_SIMILARITY, answer_query),
+        ):
+            avg_evals[EvaluatorConstants.PREFIX_AVERAGE + metric] = (
+                _score(np.nanmean(values)) if not np.isnan(values).all() else None
+            )
+
+        return Evaluations(queries=query_evals, aggregate=avg_evals)
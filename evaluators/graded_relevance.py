@@ -1,11 +1,11 @@
 import math
-from dataclasses import replace
 
 from shared.models import (
+    Evaluations,
     ExperimentResults,
     QueryResult,
 )
-from shared.constants import ConfigConstants, InputConstants
+from shared.constants import ConfigConstants, EvaluatorConstants, InputConstants
 from evaluators.base_evaluator import BaseEvaluator
 
 
@@ -106,6 +106,8 @@ class Evaluator(BaseEvaluator):
                  `relevance`.
     """
 
+    name = EvaluatorConstants.NAME_GRADED_RELEVANCE
+
     def __init__(self, config, queries: list[dict]):
         self.relevant_docs: list[list[dict]] = [
             [
@@ -123,24 +125,23 @@ class Evaluator(BaseEvaluator):
         )
         self.k = eval_config.get(ConfigConstants.KEY_EVALUATORS_ORDER_UNAWARE_K)
 
-    def run(self, experiment_results: ExperimentResults) -> ExperimentResults:
-        """Runs evaluation on order aware metrics."""
+    def fingerprint_inputs(self) -> object:
+        return [self.k, self.relevant_docs]
 
-        avg_evals = experiment_results.evaluations
+    def evaluate(self, experiment_results: ExperimentResults) -> Evaluations:
+        """Evaluates graded relevance metrics."""
 
         query_results_obj: list[QueryResult] = experiment_results.results
         retrieved_documents_list: list[list[str]] = [
             q.contexts for q in query_results_obj
         ]
-        query_evals: list[dict] = [q.evaluations for q in query_results_obj]
         num_queries = len(query_results_obj)
 
         # Calculate metrics
-        # order_aware_metrics = binary_relevance.OrderAwareMetrics(self.relevant_docs)
         graded_relevance_metrics = Metrics(self.relevant_docs)
 
         # Query-level metrics
-        query_results_with_evals = []
+        query_evals = []
 
         total_dcg_at_k = 0.0
         total_ndcg_at_k = 0.0
@@ -156,22 +157,14 @@ class Evaluator(BaseEvaluator):
                 )
             )
             total_ndcg_at_k += ndccg_at_k
-            query_evals[i][f"DCG@{str(self.k)}"] = dcg_at_k
-            query_evals[i][f"NDCG@{str(self.k)}"] = ndccg_at_k
-            updated_query_results_obj = replace(
-                query_results_obj[i], evaluations=query_evals[i]
+            query_evals.append(
+                {f"DCG@{str(self.k)}": dcg_at_k, f"NDCG@{str(self.k)}": ndccg_at_k}
             )
-            query_results_with_evals.append(updated_query_results_obj)
 
         # Overall metrics
-        avg_evals[f"avg_DCG@{str(self.k)}"] = total_dcg_at_k / num_queries
-        avg_evals[f"avg_NDCG@{str(self.k)}"] = total_ndcg_at_k / num_queries
-
-        # Update ExperimentResults
-        results_with_metrics = replace(
-            experiment_results,
-            results=query_results_with_evals,
-            evaluations=avg_evals,
-        )
+        avg_evals = {
+            f"avg_DCG@{str(self.k)}": total_dcg_at_k / num_queries,
+            f"avg_NDCG@{str(self.k)}": total_ndcg_at_k / num_queries,
+        }
 
-        return results_with_metrics
+        return Evaluations(queries=query_evals, aggregate=avg_evals)
@@ -0,0 +1,192 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+from typing import Any, Optional
+
+from shared.cache import Cache, cache_key, text_hash
+from shared.constants import (
+    ConfigConstants,
+    EvaluatorConstants,
+    InstrumentationConstants,
+    JudgeConstants,
+)
+from shared.instrumentation import instrumentation
+from shared.models import Evaluations, ExperimentResults, QueryResult
+from shared.registry import get_llm
+from evaluators.base_evaluator import BaseEvaluator
+
+FAITHFULNESS_PROMPT = """Rate how faithful the answer is to the contexts, from 1 \
+(mostly unsupported or contradicted by the contexts) to 5 (every claim is \
+supported by the contexts). Reply with the rating only.
+
+Contexts:
+{contexts}
+
+Answer:
+{response}
+
+Rating:"""
+
+ANSWER_RELEVANCE_PROMPT = """Rate how well the answer addresses the question, from \
+1 (unrelated to the question) to 5 (directly and completely answers it). Reply \
+with the rating only.
+
+Question:
+{query}
+
+Answer:
+{response}
+
+Rating:"""
+
+JUDGE_PROMPTS = {
+    JudgeConstants.METRIC_FAITHFULNESS: FAITHFULNESS_PROMPT,
+    JudgeConstants.METRIC_ANSWER_RELEVANCE: ANSWER_RELEVANCE_PROMPT,
+}
+
+SCORE_PATTERN = re.compile(
+    rf"\b([{JudgeConstants.MIN_SCORE}-{JudgeConstants.MAX_SCORE}])\b"
+)
+
+
+def parse_score(text: str) -> Optional[float]:
+    """Returns the first rating in a judge response scaled to [0, 1], or `None`
+    if the response contains no rating."""
+    match = SCORE_PATTERN.search(text or "")
+    if not match:
+        return None
+    return (int(match.group(1)) - JudgeConstants.MIN_SCORE) / (
+        JudgeConstants.MAX_SCORE - JudgeConstants.MIN_SCORE
+    )
+
+
+class Evaluator(BaseEvaluator):
+    """Evaluator for the generated responses with an LLM as judge.
+
+    Each response is rated for its faithfulness to the contexts it was generated
+    from and its relevance to the query, by either pipeline's LLM. The judge
+    calls of a run are sent concurrently by a bounded thread pool, and the
+    judgments are cached by judge model, metric, query, contexts and response,
+    so re-evaluating unchanged results sends no requests.
+
+    Attributes:
+        llm:         The judge, with a `model` and a `chat_request` method.
+        max_workers: The maximum number of concurrent judge calls.
+        cache:       The cache of judgments, or `None` to judge every time.
+    """
+
+    name = ConfigConstants.KEY_EVALUATORS_LLM_JUDGE
+
+    def __init__(self, config: dict, llm: Any = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        config_judge = config[ConfigConstants.KEY_EVALUATORS][
+            ConfigConstants.KEY_EVALUATORS_LLM_JUDGE
+        ]
+        self.llm = llm or self._load_llm(config, config_judge)
+        self.max_workers: int = config_judge.get(
+            ConfigConstants.KEY_MAX_WORKERS, JudgeConstants.DEFAULT_MAX_WORKERS
+        )
+        self.cache: Optional[Cache] = (
+            Cache(config_judge[ConfigConstants.KEY_CACHE])
+            if config_judge.get(ConfigConstants.KEY_CACHE)
+            else None
+        )
+
+    @staticmethod
+    def _load_llm(config: dict, config_judge: dict) -> Any:
+        """Creates the LLM of the judge's pipeline, with the model overridden by
+        the `llm` of the judge config."""
+        pipeline = config_judge.get(
+            ConfigConstants.KEY_PIPELINE, ConfigConstants.KEY_OPENAI
+        )
+        config_pipeline = dict(config[ConfigConstants.KEY_PIPELINES][pipeline])
+        if config_judge.get(ConfigConstants.KEY_LLM):
+            config_pipeline[ConfigConstants.KEY_LLM] = config_judge[
+                ConfigConstants.KEY_LLM
+            ]
+        return get_llm(pipeline)(config_pipeline)
+
+    def fingerprint_inputs(self) -> object:
+        return [self.llm.model, JUDGE_PROMPTS]
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+    def _judge(self, prompt: str) -> Optional[float]:
+        try:
+            return parse_score(self.llm.chat_request(prompt))
+        except Exception:
+            self.logger.exception("Judge request failed")
+            return None
+
+    def _requests(self, query_result: QueryResult) -> dict[str, tuple[str, str]]:
+        """Returns the cache key and prompt of each metric of a query result.
+
+        The key includes the prompt template, so editing a prompt does not reuse
+        the judgments made with the old one.
+        """
+        contexts = query_result.prompt_contexts or query_result.contexts or []
+        contexts = [context for context in contexts if context]
+        response_hash = text_hash([query_result.response or ""])
+        contexts_hash = text_hash(contexts)
+        return {
+            metric: (
+                cache_key(
+                    self.llm.model,
+                    metric,
+                    text_hash([template]),
+                    query_result.query,
+                    contexts_hash,
+                    response_hash,
+                ),
+                template.format(
+                    query=query_result.query,
+                    contexts="\n\n".join(contexts),
+                    response=query_result.response,
+                ),
+            )
+            for metric, template in JUDGE_PROMPTS.items()
+        }
+
+    def evaluate(self, experiment_results: ExperimentResults) -> Evaluations:
+        """Evaluates the responses with the LLM judge."""
+        requests = [self._requests(q) for q in experiment_results.results]
+        keys = [key for request in requests for key, _ in request.values()]
+
+        with instrumentation.span(InstrumentationConstants.STAGE_JUDGE) as span:
+            scores = self.cache.get_many(keys) if self.cache is not None else {}
+            span.add(InstrumentationConstants.COUNTER_JUDGE_CACHE_HITS, len(scores))
+            missing = {
+                key: prompt
+                for request in requests
+                for key, prompt in request.values()
+                if key not in scores
+            }
+            span.add(InstrumentationConstants.COUNTER_JUDGE_REQUESTS, len(missing))
+            self.logger.info(
+                "Judging %s responses with %s requests", len(requests), len(missing)
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                judged = dict(zip(missing, executor.map(self._judge, missing.values())))
+            scores.update(judged)
+            if self.cache is not None:
+                # Failed judgments are retried on the next run.
+                self.cache.put_many(
+                    {key: score for key, score in judged.items() if score is not None}
+                )
+
+        query_evals = [
+            {metric: scores[key] for metric, (key, _) in request.items()}
+            for request in requests
+        ]
+        avg_evals = {}
+        for metric in JUDGE_PROMPTS:
+            metric_scores = [
+                evals[metric] for evals in query_evals if evals[metric] is not None
+            ]
+            avg_evals[EvaluatorConstants.PREFIX_AVERAGE + metric] = (
+                sum(metric_scores) / len(metric_scores) if metric_scores else None
+            )
+
+        return Evaluations(queries=query_evals, aggregate=avg_evals)
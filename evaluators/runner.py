@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from typing import Optional
+
+from shared.models import ExperimentResults
+from evaluators.base_evaluator import BaseEvaluator, merge_evaluations
+
+
+class EvaluatorRunner:
+    """Runs independent evaluators concurrently and merges their evaluations.
+
+    All evaluators read the same results, which they must not modify, and their
+    metrics are merged into one copy of the results at the end. Evaluators that
+    wait on requests, such as LLM judges, thus overlap with each other and with
+    the metrics computed locally.
+
+    Example usage:
+        ```
+        runner = EvaluatorRunner([order_unaware_evaluator, llm_judge_evaluator])
+        results_with_evals = runner.run(results)
+        ```
+
+    Attributes:
+        evaluators:  The evaluators, in the order their metrics are merged.
+        max_workers: The maximum number of evaluators run at once, all by default.
+    """
+
+    def __init__(
+        self, evaluators: list[BaseEvaluator], max_workers: Optional[int] = None
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.evaluators = evaluators
+        self.max_workers = max_workers
+
+    def run(self, results: ExperimentResults) -> ExperimentResults:
+        """Runs the evaluators."""
+        if not self.evaluators:
+            return results
+        if len(self.evaluators) == 1 or self.max_workers == 1:
+            evaluations = [
+                evaluator.evaluate_tagged(results) for evaluator in self.evaluators
+            ]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=self.max_workers or len(self.evaluators)
+            ) as executor:
+                evaluations = list(
+                    executor.map(
+                        lambda evaluator: evaluator.evaluate_tagged(results),
+                        self.evaluators,
+                    )
+                )
+        self.logger.debug("Ran %s evaluators", len(self.evaluators))
+        return merge_evaluations(results, evaluations)
+
+    def rerun(self, results: ExperimentResults) -> tuple[ExperimentResults, list[str]]:
+        """Runs only the evaluators whose fingerprint differs from the one the
+        results were evaluated with.
+
+        Returns:
+            The results with updated evaluations, and the names of the
+            evaluators that were run.
+        """
+        stale = [
+            evaluator
+            for evaluator in self.evaluators
+            if not evaluator.is_current(results)
+        ]
+        if stale:
+            results = EvaluatorRunner(stale, self.max_workers).run(results)
+        return results, [evaluator.name for evaluator in stale]
+
+    def close(self) -> None:
+        for evaluator in self.evaluators:
+            evaluator.close()
@@ -1,14 +1,22 @@
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 import logging
 from logging import Logger
+import numpy as np
 
 from local_pipeline.embedding import LocalEmbeddings
 from local_pipeline.llm import LLAMA3
+from shared.costs import PriceTable
 from shared.database import ChromaDB
 from shared.models import ExperimentResults, QueryResult
-from shared.utils import create_prompt
-from shared.constants import ConfigConstants, EmbeddingConstants
+from shared.retrieval import Retriever
+from shared.prompt import create_prompt
+from shared.constants import (
+    ConfigConstants,
+    EmbeddingConstants,
+    InstrumentationConstants,
+)
+from shared.instrumentation import instrumentation, tokens_per_second
 
 
 class LocalPipeline:
@@ -37,44 +45,89 @@ class LocalPipeline:
         self.database: ChromaDB = ChromaDB(
             config,
             f"local_{self.splitter_method}_{self.chunk_size}_{self.chunk_overlap}",
+            config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_LOCAL].get(
+                ConfigConstants.KEY_HNSW
+            ),
+        )
+        self.retriever = Retriever(
+            self.database, config.get(ConfigConstants.KEY_RETRIEVAL)
         )
         self.llm = LLAMA3(
             config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_LOCAL]
         )
+        self.price_table = PriceTable(config.get(ConfigConstants.KEY_PRICING))
+        self.stream: bool = config[ConfigConstants.KEY_PIPELINES][
+            ConfigConstants.KEY_LOCAL
+        ].get(ConfigConstants.KEY_STREAM, False)
+
+    def retrieve(self, query_texts: list[str]) -> list[Optional[list[str]]]:
+        """Embeds queries and retrieves their contexts in one batch."""
+        query_embeddings: np.ndarray = self.embedder_local.get_embeddings(query_texts)
+        return self.retriever.retrieve(query_embeddings, query_texts)
 
-    def run_queries(self) -> ExperimentResults:
-        """Runs queries against the local pipeline."""
+    def run_queries(
+        self,
+        queries: Optional[list[dict]] = None,
+        retrieve: Optional[Callable[[list[str]], list]] = None,
+    ) -> ExperimentResults:
+        """Runs queries against the local pipeline.
+
+        Args:
+            queries:  The queries to run, defaults to the configured queries.
+            retrieve: Replaces `retrieve()`, e.g. to batch the retrieval of
+                      concurrent runs in the query service.
+        """
+        queries = self.queries if queries is None else queries
+        retrieve = retrieve or self.retrieve
 
         results = ExperimentResults(
             results=[],
             model=self.model,
             parameters=[
                 self.config[ConfigConstants.KEY_SPLITTER],
+                self.config.get(ConfigConstants.KEY_RETRIEVAL, {}),
                 self.config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_LOCAL],
             ],
             timestamp_end=None,
         )
 
-        embeddings_local: list[list[float]] = self.embedder_local.get_embeddings(
-            [query.get(EmbeddingConstants.KEY_TEXT) for query in self.queries]
-        )
-
-        contexts: list[Optional[list[str]]] = self.database.query(embeddings_local)
-
-        for ind, query in enumerate(self.queries):
-            query_text = query.get(EmbeddingConstants.KEY_TEXT)
+        with instrumentation.span(InstrumentationConstants.STAGE_RUN) as run_span:
+            contexts: list[Optional[list[str]]] = retrieve(
+                [query.get(EmbeddingConstants.KEY_TEXT) for query in queries]
+            )
 
-            prompt = create_prompt(self.prompt_template, query_text, contexts[ind])
+            for ind, query in enumerate(queries):
+                query_text = query.get(EmbeddingConstants.KEY_TEXT)
 
-            chat_response = self.llm.chat_request(prompt)
+                with instrumentation.span(
+                    InstrumentationConstants.STAGE_QUERY
+                ) as query_span:
+                    prompt = create_prompt(
+                        self.prompt_template, query_text, contexts[ind]
+                    )
+                    if self.stream:
+                        chat_response = "".join(self.llm.stream_request(prompt))
+                    else:
+                        chat_response = self.llm.chat_request(prompt)
 
-            results.results.append(
-                QueryResult(
-                    query=query_text,
-                    contexts=contexts[ind],
-                    prompt=prompt,
-                    response=chat_response,
+                results.results.append(
+                    QueryResult(
+                        query=query_text,
+                        contexts=contexts[ind],
+                        template=self.prompt_template,
+                        response=chat_response,
+                        timings=query_span.durations(),
+                        counters=query_span.totals(),
+                        cost=self.price_table.cost(query_span.totals(), self.model),
+                        tokens_per_second=tokens_per_second(
+                            query_span.durations(), query_span.totals()
+                        ),
+                    )
                 )
-            )
         results.timestamp_end = datetime.now()
+        results.timings = run_span.summary()
+        results.counters = run_span.totals()
+        results.cost = self.price_table.cost(
+            results.counters, self.model, self.embedder_local.model_name
+        )
         return results
@@ -1,41 +1,187 @@
-from sentence_transformers import SentenceTransformer
-from typing import Any
+from functools import cached_property
+from typing import Any, Optional
 import logging
+import numpy as np
 
 from local_pipeline.tokenizer import SentenceTransformerTokenizer
 from shared.models import Document
-from shared.constants import ConfigConstants
+from shared.constants import (
+    ConfigConstants,
+    EmbeddingConstants,
+    InstrumentationConstants,
+    ResourceConstants,
+)
+from shared.batching import create_batcher
+from shared.instrumentation import instrumentation
+from shared.resources import resources
 
 
 class LocalEmbeddings:
-    """Creates embeddings"""
+    """Creates embeddings
+
+    The throughput of the encoder can be tuned with the following optional keys
+    in the local pipeline config:
+
+    - `batch_size`:    Number of texts encoded per forward pass. The encoder
+                       sorts the texts by length before batching them.
+    - `precision`:     `float32` (default), `float16` (torch backend on a GPU)
+                       or `int8` (dynamic quantization of the linear layers for
+                       CPU inference with the torch backend).
+    - `backend`:       `torch` (default), `onnx` or `openvino`.
+    - `num_processes`: Number of worker processes to encode with. Values
+                       greater than one start a multi-process pool.
+
+    The model is loaded on first use and shared by all embedders with the same
+    model, backend and precision. The tokenizer reuses the tokenizer of the
+    model.
+    """
 
     def __init__(self, config_local: dict) -> None:
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.model_name = config_local["embedding"]
-        self.model = SentenceTransformer(self.model_name)
-        self.tokenizer = SentenceTransformerTokenizer(
-            config_local[ConfigConstants.KEY_EMBEDDING],
-            config_local[ConfigConstants.KEY_MAX_TOKENS],
+        self.model_name = config_local[ConfigConstants.KEY_EMBEDDING]
+        self.batch_size: int = config_local.get(
+            ConfigConstants.KEY_BATCH_SIZE, EmbeddingConstants.DEFAULT_BATCH_SIZE
+        )
+        self.precision: str = config_local.get(
+            ConfigConstants.KEY_PRECISION, EmbeddingConstants.PRECISION_FLOAT32
+        )
+        self.backend: str = config_local.get(
+            ConfigConstants.KEY_BACKEND, EmbeddingConstants.BACKEND_TORCH
+        )
+        if self.backend not in EmbeddingConstants.BACKENDS:
+            raise ValueError(f"Unsupported backend `{self.backend}`.")
+        if self.precision not in EmbeddingConstants.PRECISIONS:
+            raise ValueError(f"Unsupported precision `{self.precision}`.")
+        if (
+            self.precision != EmbeddingConstants.PRECISION_FLOAT32
+            and self.backend != EmbeddingConstants.BACKEND_TORCH
+        ):
+            raise ValueError(
+                f"Precision `{self.precision}` is only supported with the "
+                f"`{EmbeddingConstants.BACKEND_TORCH}` backend."
+            )
+        self.num_processes: int = config_local.get(ConfigConstants.KEY_NUM_PROCESSES, 1)
+        self.max_tokens: int = config_local[ConfigConstants.KEY_MAX_TOKENS]
+        self._pool: Optional[dict[str, Any]] = None
+        self.batcher = create_batcher(
+            self._embed,
+            config_local.get(ConfigConstants.KEY_MICRO_BATCH),
+            InstrumentationConstants.STAGE_EMBEDDING_BATCH,
         )
 
-    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
-        """Gets the embeddings for a list of texts."""
+    @cached_property
+    def model(self) -> Any:
+        return resources.get(
+            ResourceConstants.KIND_SENTENCE_TRANSFORMER,
+            (self.model_name, self.backend, self.precision),
+            self._load_model,
+        )
+
+    @cached_property
+    def tokenizer(self) -> SentenceTransformerTokenizer:
+        return SentenceTransformerTokenizer(
+            self.model_name, self.max_tokens, tokenizer=self.model.tokenizer
+        )
+
+    def _load_model(self) -> Any:
+        """Loads the sentence transformer with the configured backend and precision."""
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == EmbeddingConstants.BACKEND_TORCH:
+            model = SentenceTransformer(self.model_name)
+        else:
+            model = SentenceTransformer(self.model_name, backend=self.backend)
+        model = self._apply_precision(model)
+
+        self.logger.info(
+            "Loaded model %s (backend: %s, precision: %s)",
+            self.model_name,
+            self.backend,
+            self.precision,
+        )
+        return model
+
+    def _apply_precision(self, model: Any) -> Any:
+        """Converts a loaded torch model to the configured precision."""
+        if self.precision == EmbeddingConstants.PRECISION_FLOAT16:
+            if model.device.type == EmbeddingConstants.DEVICE_CPU:
+                raise ValueError(
+                    f"Precision `{self.precision}` requires a GPU, but the model "
+                    f"runs on `{model.device}`."
+                )
+            return model.half()
+        if self.precision == EmbeddingConstants.PRECISION_INT8:
+            import torch
+
+            return torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model
+
+    def get_embeddings(self, texts: list[str]) -> np.ndarray:
+        """Gets the embeddings for a list of texts.
+
+        With a `micro_batch` config, the texts are embedded in one batch with
+        the texts of concurrent calls.
+
+        Returns:
+            A float32 array of shape `(len(texts), dimension)`, in input order.
+        """
+        if self.batcher and texts:
+            return self.batcher.submit(texts)
+        return self._embed(texts)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        """Embeds a list of texts.
+
+        Returns:
+            A float32 array of shape `(len(texts), dimension)`, in input order.
+        """
 
         self.logger.info("Creating embeddings ...")
-        texts_cleaned = [text.replace("\n", " ") for text in texts]
+        with instrumentation.span(InstrumentationConstants.STAGE_EMBEDDING) as span:
+            span.add(InstrumentationConstants.COUNTER_TEXTS, len(texts))
+            texts_cleaned = [text.replace("\n", " ") for text in texts]
 
-        if self.tokenizer.check_tokenlimit_exceeded(texts_cleaned):
-            self.logger.warning(
-                "Number of tokens exceeds the limit. Text will be truncated."
+            if self.tokenizer.check_tokenlimit_exceeded(texts_cleaned):
+                self.logger.warning(
+                    "Number of tokens exceeds the limit. Text will be truncated."
+                )
+
+            if self.num_processes > 1:
+                embeddings = self.model.encode_multi_process(
+                    texts_cleaned, self._get_pool(), batch_size=self.batch_size
+                )
+            else:
+                embeddings = self.model.encode(
+                    texts_cleaned, batch_size=self.batch_size, convert_to_numpy=True
+                )
+            return np.asarray(embeddings, dtype=np.float32)
+
+    def _get_pool(self) -> dict[str, Any]:
+        """Starts the multi-process pool on first use."""
+        if self._pool is None:
+            self.logger.info("Starting pool with %s processes ...", self.num_processes)
+            self._pool = self.model.start_multi_process_pool(
+                target_devices=[EmbeddingConstants.DEVICE_CPU] * self.num_processes
             )
+        return self._pool
 
-        return self.model.encode(texts_cleaned).tolist()
+    def close(self) -> None:
+        """Stops the micro-batcher and the multi-process pool, if one was started."""
+        if self.batcher:
+            self.batcher.close()
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
 
     def add_embeddings_to_docs(self, documents: list[Document]) -> list[Document]:
-        """Adds embeddings to Document objects."""
+        """Adds embeddings to Document objects.
+
+        Each document receives a row view into a single float32 matrix.
+        """
 
-        embeddings: list[list[float]] = self.get_embeddings(
+        embeddings: np.ndarray = self.get_embeddings(
             [doc.page_content for doc in documents]
         )
         assert len(embeddings) == len(documents)
@@ -1,8 +1,15 @@
 import logging
-from langchain_community.llms import Ollama
+import time
+from typing import Iterator
 
 from local_pipeline.tokenizer import LLAMA3Tokenizer
-from shared.constants import ConfigConstants
+from shared.backends import create_ollama_client
+from shared.constants import (
+    ConfigConstants,
+    InstrumentationConstants,
+    LLMConstants,
+)
+from shared.instrumentation import instrumentation
 
 
 class LLAMA3:
@@ -10,7 +17,7 @@ class LLAMA3:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.model = config_local[ConfigConstants.KEY_LLM]
         # TODO: Add tokenizer for LLAMA3
-        self.client = Ollama(model=self.model)
+        self.client = create_ollama_client(config_local, self.model)
 
     def chat_request(self, text: str) -> str:
         """Returns a chat message."""
@@ -19,4 +26,40 @@ class LLAMA3:
         # TODO: Add token number checker here
         # self.tokenizer.check_tokenlimit_exceeded([text])
 
-        return self.client.invoke(text)
+        with instrumentation.span(InstrumentationConstants.STAGE_GENERATION) as span:
+            generation = self.client.generate([text]).generations[0][0]
+            # Ollama reports the token counts of the request in the final chunk.
+            generation_info = generation.generation_info or {}
+            span.add(
+                InstrumentationConstants.COUNTER_PROMPT_TOKENS,
+                generation_info.get(LLMConstants.OLLAMA_PROMPT_TOKENS, 0),
+            )
+            span.add(
+                InstrumentationConstants.COUNTER_COMPLETION_TOKENS,
+                generation_info.get(LLMConstants.OLLAMA_COMPLETION_TOKENS, 0),
+            )
+        return generation.text
+
+    def stream_request(self, text: str) -> Iterator[str]:
+        """Yields a chat message in chunks as they are generated.
+
+        The time to the first chunk is recorded as the `ttft` stage within the
+        `generation` stage. Ollama streams one token per chunk, so the chunks
+        are counted as completion tokens; the prompt tokens are not reported
+        when streaming.
+        """
+        self.logger.info("Streaming request to local model %s...", self.model)
+
+        with instrumentation.span(InstrumentationConstants.STAGE_GENERATION) as span:
+            start = time.perf_counter()
+            first = True
+            for chunk in self.client.stream(text):
+                if not chunk:
+                    continue
+                if first:
+                    instrumentation.record(
+                        InstrumentationConstants.STAGE_TTFT, time.perf_counter() - start
+                    )
+                    first = False
+                span.add(InstrumentationConstants.COUNTER_COMPLETION_TOKENS)
+                yield chunk
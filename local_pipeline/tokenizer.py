@@ -1,15 +1,36 @@
-from transformers import AutoTokenizer
+from functools import cached_property
 import logging
+from typing import Any, Optional
 
 from shared import AbstractTokenizer
+from shared.constants import ResourceConstants
+from shared.resources import resources
 
 
 class SentenceTransformerTokenizer(AbstractTokenizer):
-    def __init__(self, model: str, max_tokens: int):
+    """Tokenizes texts like a sentence-transformers model.
+
+    A tokenizer that is already loaded, such as the one of the embedding model,
+    can be passed in. Otherwise it is loaded with `AutoTokenizer` on first use,
+    and shared by all tokenizers of the model.
+    """
+
+    def __init__(self, model: str, max_tokens: int, tokenizer: Optional[Any] = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.max_tokens = max_tokens
         self.model = model
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model)
+        if tokenizer is not None:
+            self.tokenizer = tokenizer
+
+    @cached_property
+    def tokenizer(self) -> Any:
+        from transformers import AutoTokenizer
+
+        return resources.get(
+            ResourceConstants.KIND_TOKENIZER,
+            self.model,
+            lambda: AutoTokenizer.from_pretrained(self.model),
+        )
 
     def tokenize_text(self, text: str) -> list[int]:
         """Tokenizes the text in the input."""
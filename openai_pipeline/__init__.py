@@ -1,14 +1,22 @@
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 import logging
 from logging import Logger
+import numpy as np
 
 from openai_pipeline.embedding import OpenAIEmbeddings
 from openai_pipeline.llm import OpenAILLM
+from shared.costs import PriceTable
 from shared.database import ChromaDB
 from shared.models import ExperimentResults, QueryResult
-from shared.utils import create_prompt
-from shared.constants import ConfigConstants, EmbeddingConstants
+from shared.retrieval import Retriever
+from shared.prompt import ContextPacker, create_prompt
+from shared.constants import (
+    ConfigConstants,
+    EmbeddingConstants,
+    InstrumentationConstants,
+)
+from shared.instrumentation import instrumentation, tokens_per_second
 
 
 class OpenAIPipeline:
@@ -35,42 +43,105 @@ class OpenAIPipeline:
         self.database: ChromaDB = ChromaDB(
             config,
             f"openai_{self.splitter_method}_{self.chunk_size}_{self.chunk_overlap}",
+            config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_OPENAI].get(
+                ConfigConstants.KEY_HNSW
+            ),
+        )
+        self.retriever = Retriever(
+            self.database, config.get(ConfigConstants.KEY_RETRIEVAL)
         )
         self.llm = OpenAILLM(
             config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_OPENAI]
         )
+        self.price_table = PriceTable(config.get(ConfigConstants.KEY_PRICING))
+        self.stream: bool = config[ConfigConstants.KEY_PIPELINES][
+            ConfigConstants.KEY_OPENAI
+        ].get(ConfigConstants.KEY_STREAM, False)
+        max_prompt_tokens: Optional[int] = config[ConfigConstants.KEY_PIPELINES][
+            ConfigConstants.KEY_OPENAI
+        ].get(ConfigConstants.KEY_MAX_PROMPT_TOKENS)
+        self.context_packer: Optional[ContextPacker] = (
+            ContextPacker(self.llm.tokenizer, max_prompt_tokens)
+            if max_prompt_tokens
+            else None
+        )
+
+    def retrieve(self, query_texts: list[str]) -> list[Optional[list[str]]]:
+        """Embeds queries and retrieves their contexts in one batch."""
+        query_embeddings: np.ndarray = self.embedder_openai.get_embeddings(query_texts)
+        return self.retriever.retrieve(query_embeddings, query_texts)
+
+    def run_queries(
+        self,
+        queries: Optional[list[dict]] = None,
+        retrieve: Optional[Callable[[list[str]], list]] = None,
+    ) -> ExperimentResults:
+        """Runs queries against the OpenAI-based pipeline.
 
-    def run_queries(self) -> ExperimentResults:
-        """Runs queries against the OpenAI-based pipeline."""
+        Args:
+            queries:  The queries to run, defaults to the configured queries.
+            retrieve: Replaces `retrieve()`, e.g. to batch the retrieval of
+                      concurrent runs in the query service.
+        """
+        queries = self.queries if queries is None else queries
+        retrieve = retrieve or self.retrieve
 
         results = ExperimentResults(
             results=[],
             model=self.model,
             parameters=[
                 self.config[ConfigConstants.KEY_SPLITTER],
+                self.config.get(ConfigConstants.KEY_RETRIEVAL, {}),
                 self.config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_OPENAI],
             ],
             timestamp_end=None,
         )
 
-        embeddings_openai: list[list[float]] = self.embedder_openai.get_embeddings(
-            [query.get(EmbeddingConstants.KEY_TEXT) for query in self.queries]
-        )
-
-        contexts: list[Optional[list[str]]] = self.database.query(embeddings_openai)
+        with instrumentation.span(InstrumentationConstants.STAGE_RUN) as run_span:
+            contexts: list[Optional[list[str]]] = retrieve(
+                [query.get(EmbeddingConstants.KEY_TEXT) for query in queries]
+            )
 
-        for ind, query in enumerate(self.queries):
-            query_text = query.get(EmbeddingConstants.KEY_TEXT)
+            for ind, query in enumerate(queries):
+                query_text = query.get(EmbeddingConstants.KEY_TEXT)
 
-            prompt = create_prompt(self.prompt_template, query_text, contexts[ind])
-            chat_response = self.llm.chat_request(prompt)
-            results.results.append(
-                QueryResult(
-                    query=query_text,
-                    contexts=contexts[ind],
-                    prompt=prompt,
-                    response=chat_response,
+                with instrumentation.span(
+                    InstrumentationConstants.STAGE_QUERY
+                ) as query_span:
+                    prompt_contexts = contexts[ind]
+                    if self.context_packer:
+                        with instrumentation.span(InstrumentationConstants.STAGE_PACK):
+                            prompt_contexts = self.context_packer.pack(
+                                self.prompt_template, query_text, prompt_contexts
+                            )
+                    prompt = create_prompt(
+                        self.prompt_template, query_text, prompt_contexts
+                    )
+                    if self.stream:
+                        chat_response = "".join(self.llm.stream_request(prompt))
+                    else:
+                        chat_response = self.llm.chat_request(prompt)
+                results.results.append(
+                    QueryResult(
+                        query=query_text,
+                        contexts=contexts[ind],
+                        template=self.prompt_template,
+                        response=chat_response,
+                        timings=query_span.durations(),
+                        counters=query_span.totals(),
+                        cost=self.price_table.cost(query_span.totals(), self.model),
+                        tokens_per_second=tokens_per_second(
+                            query_span.durations(), query_span.totals()
+                        ),
+                        prompt_contexts=(
+                            prompt_contexts if self.context_packer else None
+                        ),
+                    )
                 )
-            )
         results.timestamp_end = datetime.now()
+        results.timings = run_span.summary()
+        results.counters = run_span.totals()
+        results.cost = self.price_table.cost(
+            results.counters, self.model, self.embedder_openai.model_name
+        )
         return results
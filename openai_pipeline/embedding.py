@@ -1,9 +1,17 @@
-from openai import OpenAI
+import base64
 import logging
+import numpy as np
 
 from openai_pipeline.tokenizer import OpenAITokenizer
+from shared.backends import create_openai_client
 from shared.models import Document
-from shared.constants import ConfigConstants
+from shared.constants import (
+    ConfigConstants,
+    EmbeddingConstants,
+    InstrumentationConstants,
+)
+from shared.batching import create_batcher
+from shared.instrumentation import instrumentation
 
 
 class OpenAIEmbeddings:
@@ -16,30 +24,86 @@ class OpenAIEmbeddings:
             config_openai[ConfigConstants.KEY_EMBEDDING],
             config_openai[ConfigConstants.KEY_MAX_TOKENS],
         )
-        self.client = OpenAI()
+        self.client = create_openai_client(config_openai)
+        self.batcher = create_batcher(
+            self._embed,
+            config_openai.get(ConfigConstants.KEY_MICRO_BATCH),
+            InstrumentationConstants.STAGE_EMBEDDING_BATCH,
+        )
+
+    def get_embeddings(self, texts: list[str]) -> np.ndarray:
+        """Gets the embeddings for a list of texts.
+
+        With a `micro_batch` config, the texts are embedded in one batch with
+        the texts of concurrent calls.
+
+        Returns:
+            A float32 array of shape `(len(texts), dimension)`, in input order.
+        """
+        if self.batcher and texts:
+            return self.batcher.submit(texts)
+        return self._embed(texts)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        """Embeds a list of texts.
+
+        The embeddings are requested base64-encoded and decoded straight into a
+        preallocated matrix, so no intermediate Python floats are created.
 
-    def get_embeddings(self, texts: list[str]) -> list[list[float]]:
-        """Gets the embeddings for a list of texts."""
+        Returns:
+            A float32 array of shape `(len(texts), dimension)`, in input order.
+        """
 
         self.logger.info("Creating embeddings ...")
-        texts_cleaned = [text.replace("\n", " ") for text in texts]
-
-        if self.tokenizer.check_tokenlimit_exceeded(texts_cleaned):
-            self.logger.warning(
-                "Number of tokens exceeds the limit. Text will be truncated."
-            )
-        responses = self.client.embeddings.create(
-            input=texts_cleaned, model=self.model_name
-        )
+        with instrumentation.span(InstrumentationConstants.STAGE_EMBEDDING) as span:
+            span.add(InstrumentationConstants.COUNTER_TEXTS, len(texts))
+            texts_cleaned = [text.replace("\n", " ") for text in texts]
+
+            if self.tokenizer.check_tokenlimit_exceeded(texts_cleaned):
+                self.logger.warning(
+                    "Number of tokens exceeds the limit. Text will be truncated."
+                )
+
+            embeddings: np.ndarray | None = None
+            batch_size = EmbeddingConstants.OPENAI_MAX_BATCH_SIZE
+            for start in range(0, len(texts_cleaned), batch_size):
+                batch = texts_cleaned[start : start + batch_size]
+                responses = self.client.embeddings.create(
+                    input=batch, model=self.model_name, encoding_format="base64"
+                )
+                assert len(responses.data) == len(batch)
+                if responses.usage is not None:
+                    span.add(
+                        InstrumentationConstants.COUNTER_EMBEDDING_TOKENS,
+                        responses.usage.prompt_tokens,
+                    )
 
-        assert len(responses.data) == len(texts)
+                for response in responses.data:
+                    embedding = np.frombuffer(
+                        base64.b64decode(response.embedding), dtype=np.float32
+                    )
+                    if embeddings is None:
+                        embeddings = np.empty(
+                            (len(texts_cleaned), len(embedding)), dtype=np.float32
+                        )
+                    embeddings[start + response.index] = embedding
 
-        return [response.embedding for response in responses.data]
+            if embeddings is None:
+                return np.empty((0, 0), dtype=np.float32)
+            return embeddings
+
+    def close(self) -> None:
+        """Stops the micro-batcher, if there is one."""
+        if self.batcher:
+            self.batcher.close()
 
     def add_embeddings_to_docs(self, documents: list[Document]) -> list[Document]:
-        """Adds embeddings to Document objects."""
+        """Adds embeddings to Document objects.
+
+        Each document receives a row view into a single float32 matrix.
+        """
 
-        embeddings: list[list[float]] = self.get_embeddings(
+        embeddings: np.ndarray = self.get_embeddings(
             [doc.page_content for doc in documents]
         )
         assert len(embeddings) == len(documents)
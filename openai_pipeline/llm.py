@@ -1,8 +1,11 @@
 import logging
-from openai import OpenAI
+import time
+from typing import Iterator
 
 from openai_pipeline.tokenizer import OpenAITokenizer
-from shared.constants import ConfigConstants
+from shared.backends import create_openai_client
+from shared.constants import ConfigConstants, InstrumentationConstants
+from shared.instrumentation import instrumentation
 
 
 class OpenAILLM:
@@ -13,16 +16,65 @@ class OpenAILLM:
             self.model,
             config_openai[ConfigConstants.KEY_MAX_TOKENS],
         )
-        self.client = OpenAI()
+        self.client = create_openai_client(config_openai)
 
     def chat_request(self, text: str) -> str:
         """Returns a chat message."""
         self.logger.info("Sending request to OpenAI LLM %s...", self.model)
 
-        self.tokenizer.check_tokenlimit_exceeded([text])
+        with instrumentation.span(InstrumentationConstants.STAGE_GENERATION) as span:
+            self.tokenizer.check_tokenlimit_exceeded([text])
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": text}],
-        )
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": text}],
+            )
+            if response.usage is not None:
+                span.add(
+                    InstrumentationConstants.COUNTER_PROMPT_TOKENS,
+                    response.usage.prompt_tokens,
+                )
+                span.add(
+                    InstrumentationConstants.COUNTER_COMPLETION_TOKENS,
+                    response.usage.completion_tokens,
+                )
         return response.choices[0].message.content
+
+    def stream_request(self, text: str) -> Iterator[str]:
+        """Yields a chat message in chunks as they are generated.
+
+        The time to the first chunk is recorded as the `ttft` stage within the
+        `generation` stage, and the token counts from the usage of the final
+        chunk.
+        """
+        self.logger.info("Streaming request to OpenAI LLM %s...", self.model)
+
+        with instrumentation.span(InstrumentationConstants.STAGE_GENERATION) as span:
+            self.tokenizer.check_tokenlimit_exceeded([text])
+
+            start = time.perf_counter()
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": text}],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            first = True
+            for chunk in response:
+                if chunk.usage is not None:
+                    span.add(
+                        InstrumentationConstants.COUNTER_PROMPT_TOKENS,
+                        chunk.usage.prompt_tokens,
+                    )
+                    span.add(
+                        InstrumentationConstants.COUNTER_COMPLETION_TOKENS,
+                        chunk.usage.completion_tokens,
+                    )
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if first:
+                    instrumentation.record(
+                        InstrumentationConstants.STAGE_TTFT, time.perf_counter() - start
+                    )
+                    first = False
+                yield chunk.choices[0].delta.content
@@ -1,7 +1,10 @@
+from functools import cached_property
 import logging
-import tiktoken
+from typing import Any
 
 from shared import AbstractTokenizer
+from shared.constants import ResourceConstants
+from shared.resources import resources
 
 
 class OpenAITokenizer(AbstractTokenizer):
@@ -9,7 +12,18 @@ class OpenAITokenizer(AbstractTokenizer):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.max_tokens = max_tokens
         self.model = model
-        self.tokenizer = tiktoken.encoding_for_model(self.model)
+
+    @cached_property
+    def tokenizer(self) -> Any:
+        """The `tiktoken` encoding of the model, loaded on first use and shared by
+        all tokenizers of the model."""
+        import tiktoken
+
+        return resources.get(
+            ResourceConstants.KIND_TIKTOKEN,
+            self.model,
+            lambda: tiktoken.encoding_for_model(self.model),
+        )
 
     def tokenize_text(self, text: str) -> list[int]:
         """Tokenizes the text in the input."""
@@ -0,0 +1,71 @@
+import yaml
+
+from shared.calibration import best_setting, calibrate, format_results
+from shared.database import ChromaDB
+from shared.utils import load_config, setup_logging
+from shared.constants import (
+    CalibrationConstants,
+    ConfigConstants,
+    DatabaseConstants,
+    RetrievalConstants,
+)
+
+
+def main():
+    print("Calibrating the HNSW index ...")
+    setup_logging()
+    config = load_config(ConfigConstants.DEFAULT_CONFIG_FILE)
+    config_calibration = config.get(ConfigConstants.KEY_CALIBRATION) or {}
+    pipeline = config_calibration.get(
+        ConfigConstants.KEY_PIPELINE, ConfigConstants.KEY_OPENAI
+    )
+    method = config[ConfigConstants.KEY_SPLITTER][ConfigConstants.KEY_METHOD]
+    chunk_size = config[ConfigConstants.KEY_SPLITTER][ConfigConstants.KEY_CHUNK_SIZE]
+    chunk_overlap = config[ConfigConstants.KEY_SPLITTER][
+        ConfigConstants.KEY_CHUNK_OVERLAP
+    ]
+
+    database = ChromaDB(config, f"{pipeline}_{method}_{chunk_size}_{chunk_overlap}")
+    vectors = database.get_all_embeddings()
+    print(f"Loaded {len(vectors)} embeddings of collection {database.collection_name}")
+
+    results = calibrate(
+        vectors,
+        num_queries=config_calibration.get(
+            ConfigConstants.KEY_NUM_QUERIES, CalibrationConstants.DEFAULT_NUM_QUERIES
+        ),
+        top_k=(config.get(ConfigConstants.KEY_RETRIEVAL) or {}).get(
+            ConfigConstants.KEY_TOP_K, RetrievalConstants.DEFAULT_TOP_K
+        ),
+        grid_M=config_calibration.get(
+            DatabaseConstants.HNSW_M, CalibrationConstants.DEFAULT_M
+        ),
+        grid_construction_ef=config_calibration.get(
+            DatabaseConstants.HNSW_CONSTRUCTION_EF,
+            CalibrationConstants.DEFAULT_CONSTRUCTION_EF,
+        ),
+        grid_search_ef=config_calibration.get(
+            DatabaseConstants.HNSW_SEARCH_EF, CalibrationConstants.DEFAULT_SEARCH_EF
+        ),
+    )
+    print("Recall and query latency in ms:")
+    print(format_results(results))
+
+    target_recall = config_calibration.get(
+        ConfigConstants.KEY_TARGET_RECALL, CalibrationConstants.DEFAULT_TARGET_RECALL
+    )
+    best = best_setting(results, target_recall)
+    if best is None:
+        print("Not enough embeddings to calibrate!")
+    else:
+        if best.recall < target_recall:
+            print(f"No setting reaches a recall of {target_recall}!")
+        print(
+            f"Best setting (recall {best.recall:.3f}), add to `pipelines.{pipeline}`:"
+        )
+        print(yaml.safe_dump({ConfigConstants.KEY_HNSW: best.parameters}))
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
-from openai_pipeline import OpenAIPipeline
-from local_pipeline import LocalPipeline
-from shared.models import ExperimentResults
-from shared.utils import (
+import time
+
+START_TIME = time.perf_counter()
+
+from shared.models import ExperimentResults  # noqa: E402
+from shared.instrumentation import format_summary  # noqa: E402
+from shared.registry import format_import_times, get_pipeline  # noqa: E402
+from shared.results import ResultsWriter  # noqa: E402
+from shared.results_store import ResultsStore  # noqa: E402
+from shared.service import ServiceClient  # noqa: E402
+from shared.utils import (  # noqa: E402
     load_config,
     load_prompt_queries,
-    save_experiments_results_to_json,
     setup_logging,
 )
-from shared.constants import ConfigConstants
-from evaluators import RetrievalEvaluator
-
+from shared.constants import ConfigConstants  # noqa: E402
+from evaluators import GenerationEvaluator, RetrievalEvaluator  # noqa: E402
+from evaluators.runner import EvaluatorRunner  # noqa: E402
 
 PROMPT_QUERIES_FILE = "prompts_queries.json"
 
@@ -19,28 +25,60 @@ def main():
     setup_logging()
     config = load_config(ConfigConstants.DEFAULT_CONFIG_FILE)
     prompts_queries = load_prompt_queries(PROMPT_QUERIES_FILE)
+    config_output = config[ConfigConstants.KEY_OUTPUT]
+    writer = ResultsWriter(
+        config_output[ConfigConstants.KEY_DIRECTORY],
+        compress=config_output.get(ConfigConstants.KEY_COMPRESS, False),
+    )
+    store = (
+        ResultsStore(config_output[ConfigConstants.KEY_STORE])
+        if config_output.get(ConfigConstants.KEY_STORE)
+        else None
+    )
 
-    # OpenAI
-    print("Running OpenAI pipeline ...")
-    openai_pipeline = OpenAIPipeline(config, prompts_queries)
-    results_openai: ExperimentResults = openai_pipeline.run_queries()
-
-    print("Evaluating results ...")
-    retrieval_evaluators = RetrievalEvaluator(config, prompts_queries)
-    results_with_evals_openai = retrieval_evaluators.run(results_openai)
-
-    # Run with local
-    print("Running local pipeline ...")
-    # local_pipeline = LocalPipeline(config, prompts_queries)
-    # results_local: ExperimentResults = local_pipeline.run_queries()
-    # results_with_eval_local = evaluator_order_unaware.run(results_local)
-
-    # Save results to a file
-    print("Saving results ...")
-    save_experiments_results_to_json(
-        [results_with_evals_openai],
-        config["output"]["directory"],
+    # The retrieval and generation evaluators run concurrently.
+    evaluators = EvaluatorRunner(
+        RetrievalEvaluator(config, prompts_queries).evaluators
+        + GenerationEvaluator(config, prompts_queries).evaluators
     )
+    config_experiments = config.get(ConfigConstants.KEY_EXPERIMENTS) or {}
+    pipelines = config_experiments.get(
+        ConfigConstants.KEY_PIPELINES, [ConfigConstants.KEY_OPENAI]
+    )
+    # With a running query service, the pipelines run there with warm models.
+    client = (
+        ServiceClient(config_experiments[ConfigConstants.KEY_URL])
+        if config_experiments.get(ConfigConstants.KEY_URL)
+        else None
+    )
+    for ind, name in enumerate(pipelines):
+        print(f"Running {name} pipeline ...")
+        if client:
+            results: ExperimentResults = client.run(
+                name, prompts_queries.get(ConfigConstants.KEY_QUERIES)
+            )
+        else:
+            pipeline = get_pipeline(name)(config, prompts_queries)
+            if ind == 0:
+                print(f"Started in {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+                print("Imports in ms:")
+                print(format_import_times())
+            results = pipeline.run_queries()
+        print("Timings in ms:")
+        print(format_summary(results.timings))
+        print(f"Cost: ${results.cost:.4f}")
+
+        print("Evaluating results ...")
+        results_with_evals = evaluators.run(results)
+        writer.write_experiment(results_with_evals)
+        if store:
+            store.add_experiment(results_with_evals, results_file=writer.path)
+
+    evaluators.close()
+    writer.close()
+    if store:
+        store.close()
+    print(f"Saved results to file: {writer.path}!")
     print("Done!")
 
 
@@ -1,14 +1,40 @@
 import logging
+import time
 
-from openai_pipeline.embedding import OpenAIEmbeddings
-from local_pipeline.embedding import LocalEmbeddings
-from shared.database import ChromaDB
-from shared.loader import Loader
-from shared.models import Document
-from shared.splitter import TextSplitter
-from shared.utils import load_config
-from shared.utils import setup_logging
-from shared.constants import ConfigConstants
+START_TIME = time.perf_counter()
+
+from shared.costs import PriceTable  # noqa: E402
+from shared.database import ChromaDB  # noqa: E402
+from shared.instrumentation import format_summary, instrumentation  # noqa: E402
+from shared.loader import Loader  # noqa: E402
+from shared.registry import format_import_times, get_embedder  # noqa: E402
+from shared.models import Document  # noqa: E402
+from shared.splitter import TextSplitter  # noqa: E402
+from shared.utils import load_config  # noqa: E402
+from shared.utils import setup_logging  # noqa: E402
+from shared.constants import ConfigConstants, LoaderConstants  # noqa: E402
+
+
+def update_lexical_index(
+    database: ChromaDB, ids: list[str], chunks: list[Document]
+) -> None:
+    """Adds chunks to the lexical index stored alongside a collection.
+
+    Chunks that are already indexed, e.g. when ingesting the same files again,
+    are skipped.
+    """
+    from shared.lexical import LexicalIndex, lexical_index_path
+
+    path = lexical_index_path(database.path, database.collection_name)
+    index = LexicalIndex.load_or_create(path)
+    known = set(index.ids)
+    texts = {}
+    for chunk_id, chunk in zip(ids, chunks):
+        if chunk_id not in known:
+            texts.setdefault(chunk_id, chunk.page_content)
+    if texts:
+        index.add(list(texts), list(texts.values()))
+        index.save(path)
 
 
 def main():
@@ -21,7 +47,14 @@ def main():
     print("Loading configuration ...")
     config = load_config(ConfigConstants.DEFAULT_CONFIG_FILE)
 
-    loader = Loader(paths=config[ConfigConstants.KEY_LOADER][ConfigConstants.KEY_PATHS])
+    loader_config = config[ConfigConstants.KEY_LOADER]
+    loader = Loader(
+        paths=loader_config[ConfigConstants.KEY_PATHS],
+        cache_directory=loader_config.get(ConfigConstants.KEY_CACHE),
+        extraction_mode=loader_config.get(
+            ConfigConstants.KEY_EXTRACTION_MODE, LoaderConstants.DEFAULT_EXTRACTION_MODE
+        ),
+    )
     documents: list[Document] = loader.load_pdf()
 
     splitter = TextSplitter(config=config[ConfigConstants.KEY_SPLITTER])
@@ -34,26 +67,37 @@ def main():
         ConfigConstants.KEY_CHUNK_OVERLAP
     ]
 
-    # OpenAI pipeline
-    print("Running OpenAI pipeline ...")
-    embeddings_openai = OpenAIEmbeddings(
-        config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_OPENAI]
-    )
-    chunks_openai = embeddings_openai.add_embeddings_to_docs(docs_chunks)
-
-    database_openai = ChromaDB(config, f"openai_{method}_{chunk_size}_{chunk_overlap}")
-    database_openai.add_chunks(chunks_openai)
-
-    # Local pipeline
-    print("Running local pipeline ...")
-    embeddings_local = LocalEmbeddings(
-        config[ConfigConstants.KEY_PIPELINES][ConfigConstants.KEY_LOCAL]
+    price_table = PriceTable(config.get(ConfigConstants.KEY_PRICING))
+    cost = 0.0
+    pipelines = (config.get(ConfigConstants.KEY_INGESTION) or {}).get(
+        ConfigConstants.KEY_PIPELINES,
+        [ConfigConstants.KEY_OPENAI, ConfigConstants.KEY_LOCAL],
     )
-    chunks_local = embeddings_local.add_embeddings_to_docs(docs_chunks)
+    for ind, name in enumerate(pipelines):
+        print(f"Running {name} pipeline ...")
+        config_pipeline = config[ConfigConstants.KEY_PIPELINES][name]
+        embedder = get_embedder(name)(config_pipeline)
+        if ind == 0:
+            print(f"Started in {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+            print("Imports in ms:")
+            print(format_import_times())
+        with instrumentation.span(name) as span:
+            chunks = embedder.add_embeddings_to_docs(docs_chunks)
+            embedder.close()
 
-    database_local = ChromaDB(config, f"local_{method}_{chunk_size}_{chunk_overlap}")
-    database_local.add_chunks(chunks_local)
+            database = ChromaDB(
+                config,
+                f"{name}_{method}_{chunk_size}_{chunk_overlap}",
+                config_pipeline.get(ConfigConstants.KEY_HNSW),
+            )
+            ids = database.add_chunks(chunks)
+            update_lexical_index(database, ids, chunks)
+        cost += price_table.cost(span.totals(), embedding=embedder.model_name)
 
+    print("Timings in ms:")
+    print(format_summary(instrumentation.summary()))
+    logger.info("Counters: %s", instrumentation.totals())
+    print(f"Embedding cost: ${cost:.4f}")
     print("Done!")
 
 
@@ -0,0 +1,67 @@
+import glob
+import os
+import time
+
+from shared.results import load_experiment_results, rewrite_results_file
+from shared.results_store import ResultsStore
+from shared.utils import load_config, load_prompt_queries, setup_logging
+from shared.constants import ConfigConstants, ResultsConstants
+from evaluators import GenerationEvaluator, RetrievalEvaluator
+from evaluators.runner import EvaluatorRunner
+
+PROMPT_QUERIES_FILE = "prompts_queries.json"
+
+
+def main():
+    print("Re-scoring results ...")
+    setup_logging()
+    start = time.perf_counter()
+    config = load_config(ConfigConstants.DEFAULT_CONFIG_FILE)
+    prompts_queries = load_prompt_queries(PROMPT_QUERIES_FILE)
+    config_output = config[ConfigConstants.KEY_OUTPUT]
+    store = (
+        ResultsStore(config_output[ConfigConstants.KEY_STORE])
+        if config_output.get(ConfigConstants.KEY_STORE)
+        else None
+    )
+    evaluators = EvaluatorRunner(
+        RetrievalEvaluator(config, prompts_queries).evaluators
+        + GenerationEvaluator(config, prompts_queries).evaluators
+    )
+
+    directory = config_output[ConfigConstants.KEY_DIRECTORY]
+    # Results files in the former JSON format are rewritten in that format.
+    paths = sorted(
+        path
+        for pattern in ResultsConstants.FILE_PATTERNS
+        + (ResultsConstants.LEGACY_FILE_PATTERN,)
+        for path in glob.glob(os.path.join(directory, pattern))
+    )
+    num_rescored = 0
+    for path in paths:
+        experiments = load_experiment_results(path)
+        rescored = [evaluators.rerun(results) for results in experiments]
+        if not any(names for _, names in rescored):
+            continue
+        experiments = [results for results, _ in rescored]
+        names = sorted({name for _, run in rescored for name in run})
+        print(f"{path}: {', '.join(names)}")
+        rewrite_results_file(path, experiments)
+        if store:
+            store.remove_results_file(path)
+            for results in experiments:
+                store.add_experiment(results, results_file=path)
+        num_rescored += 1
+
+    evaluators.close()
+    if store:
+        store.close()
+    print(
+        f"Re-scored {num_rescored} of {len(paths)} results files in "
+        f"{time.perf_counter() - start:.1f} s!"
+    )
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import time
+
+START_TIME = time.perf_counter()
+
+from shared.registry import format_import_times  # noqa: E402
+from shared.service import QueryService, create_server  # noqa: E402
+from shared.utils import load_config, load_prompt_queries, setup_logging  # noqa: E402
+from shared.constants import ConfigConstants, ServiceConstants  # noqa: E402
+
+PROMPT_QUERIES_FILE = "prompts_queries.json"
+
+
+def main():
+    print("Starting query service ...")
+    setup_logging()
+    config = load_config(ConfigConstants.DEFAULT_CONFIG_FILE)
+    prompts_queries = load_prompt_queries(PROMPT_QUERIES_FILE)
+    config_server = config.get(ConfigConstants.KEY_SERVER) or {}
+
+    service = QueryService.from_config(config, prompts_queries)
+    server = create_server(
+        service,
+        config_server.get(ConfigConstants.KEY_HOST, ServiceConstants.DEFAULT_HOST),
+        config_server.get(ConfigConstants.KEY_PORT, ServiceConstants.DEFAULT_PORT),
+    )
+    host, port = server.server_address[:2]
+    print(f"Started in {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+    print("Imports in ms:")
+    print(format_import_times())
+    print(f"Serving {', '.join(service.pipelines)} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
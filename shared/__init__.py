@@ -1,5 +1,8 @@
 from abc import ABCMeta, abstractmethod
 
+from shared.constants import InstrumentationConstants
+from shared.instrumentation import instrumentation
+
 
 class AbstractTokenizer(metaclass=ABCMeta):
     """Abstract base class for Tokenizers."""
@@ -13,21 +16,31 @@ class AbstractTokenizer(metaclass=ABCMeta):
         """Checks the number of tokens in the texts against the defined limit."""
 
     def check_tokenlimit_exceeded(self, texts: list[str]) -> bool:
-        """Checks the number of tokens in the texts against the defined limit."""
+        """Checks the number of tokens in the texts against the defined limit.
+
+        The total number of tokens is added to the `tokens` counter of the active
+        instrumentation span.
+        """
         self.logger.info(
             "Checking if number of tokens exceeds the maximum for embedding model %s...",
             self.model,
         )
         max_count_tokens = 0
+        total_count_tokens = 0
+        exceeded = False
         for text in texts:
             count_tokens = len(self.tokenize_text(text))
+            total_count_tokens += count_tokens
             max_count_tokens = max(count_tokens, max_count_tokens)
-            if count_tokens > self.max_tokens:
+            if count_tokens > self.max_tokens and not exceeded:
                 self.logger.warning(
                     "Number of %s tokens in input exceeds limit of %s tokens!",
                     count_tokens,
                     self.max_tokens,
                 )
-                return True
+                exceeded = True
+        instrumentation.count(
+            InstrumentationConstants.COUNTER_TOKENS, total_count_tokens
+        )
         self.logger.info("Highest token count for embedding: %s", max_count_tokens)
-        return False
+        return exceeded
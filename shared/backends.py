@@ -0,0 +1,317 @@
+from array import array
+import base64
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Iterator, Optional
+
+from shared.constants import (
+    BackendConstants,
+    ConfigConstants,
+    LLMConstants,
+    ResourceConstants,
+)
+from shared.resources import resources
+
+
+class StubBackendError(RuntimeError):
+    """Raised by the stub backends to simulate a failed request."""
+
+
+def hash_embedding(text: str, dimension: int) -> array:
+    """Returns a deterministic unit-length float32 embedding derived from a hash
+    of the text, standing in for an embedding model."""
+    digest = hashlib.shake_256(text.encode()).digest(4 * dimension)
+    values = [value / 2**31 - 1.0 for value in array("I", digest)]
+    norm = math.sqrt(sum(value * value for value in values)) or 1.0
+    return array("f", [value / norm for value in values])
+
+
+def count_words(text: str) -> int:
+    """Approximates the number of tokens of a text by its number of words."""
+    return len(text.split())
+
+
+class LatencyModel:
+    """Samples simulated request latencies.
+
+    Each request takes a base latency drawn from the configured distribution,
+    plus a fixed time per input item, e.g. per text of an embedding batch.
+
+    Attributes:
+        distribution: One of `constant`, `normal`, `lognormal` or `exponential`.
+        mean:         The mean base latency in seconds.
+        stddev:       The standard deviation of the base latency in seconds.
+        per_item:     The additional latency per input item in seconds.
+    """
+
+    def __init__(
+        self,
+        distribution: str = BackendConstants.DISTRIBUTION_CONSTANT,
+        mean: float = 0.0,
+        stddev: float = 0.0,
+        per_item: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in BackendConstants.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.mean = mean
+        self.stddev = stddev
+        self.per_item = per_item
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_latency: Optional[dict], seed: Optional[int] = None):
+        return cls(**(config_latency or {}), seed=seed)
+
+    def _sample_base(self) -> float:
+        if self.distribution == BackendConstants.DISTRIBUTION_NORMAL:
+            return self.random.gauss(self.mean, self.stddev)
+        if self.distribution == BackendConstants.DISTRIBUTION_LOGNORMAL:
+            if self.mean <= 0:
+                return 0.0
+            # Parameters of the underlying normal distribution for the given
+            # mean and standard deviation of the lognormal distribution.
+            sigma2 = math.log(1 + (self.stddev / self.mean) ** 2)
+            mu = math.log(self.mean) - sigma2 / 2
+            return self.random.lognormvariate(mu, math.sqrt(sigma2))
+        if self.distribution == BackendConstants.DISTRIBUTION_EXPONENTIAL:
+            return self.random.expovariate(1 / self.mean) if self.mean > 0 else 0.0
+        return self.mean
+
+    def sample(self, num_items: int = 1) -> float:
+        """Returns the latency of a request with `num_items` inputs in seconds."""
+        with self.lock:
+            base = self._sample_base()
+        return max(0.0, base) + self.per_item * num_items
+
+
+class StubBackend:
+    """Base class of the offline stub clients.
+
+    Every request sleeps for a latency drawn from the `LatencyModel` and fails
+    with a `StubBackendError` at the configured error rate. Streamed responses
+    additionally sleep for `token_latency` seconds per word after the first.
+    """
+
+    def __init__(self, config_client: dict):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        seed = config_client.get(ConfigConstants.KEY_SEED)
+        self.latency = LatencyModel.from_config(
+            config_client.get(ConfigConstants.KEY_LATENCY), seed=seed
+        )
+        self.error_rate: float = config_client.get(ConfigConstants.KEY_ERROR_RATE, 0.0)
+        self.response_template: str = config_client.get(
+            ConfigConstants.KEY_RESPONSE_TEMPLATE,
+            BackendConstants.DEFAULT_RESPONSE_TEMPLATE,
+        )
+        self.token_latency: float = config_client.get(
+            ConfigConstants.KEY_TOKEN_LATENCY, 0.0
+        )
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _simulate_request(self, num_items: int = 1) -> None:
+        time.sleep(self.latency.sample(num_items))
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+        if failed:
+            raise StubBackendError("Simulated backend error")
+
+    def _render_response(self, model: str, prompt: str) -> str:
+        return self.response_template.format(
+            model=model, words=count_words(prompt), prompt=prompt
+        )
+
+    def _stream_response(self, model: str, prompt: str) -> Iterator[str]:
+        """Yields a templated response word by word. The first word arrives after
+        the request latency, every further word after `token_latency` seconds."""
+        self._simulate_request()
+        for ind, word in enumerate(self._render_response(model, prompt).split(" ")):
+            if ind:
+                time.sleep(self.token_latency)
+                word = " " + word
+            yield word
+
+
+class _StubEmbeddings:
+    def __init__(self, backend: "StubOpenAI"):
+        self.backend = backend
+
+    def create(self, input: list[str], model: str, encoding_format: str = "float"):
+        """Returns hash-based embeddings in the format of the OpenAI API."""
+        self.backend._simulate_request(len(input))
+        data = []
+        for index, text in enumerate(input):
+            embedding = hash_embedding(text, self.backend.dimension)
+            if encoding_format == "base64":
+                embedding = base64.b64encode(embedding.tobytes()).decode()
+            else:
+                embedding = embedding.tolist()
+            data.append(SimpleNamespace(embedding=embedding, index=index))
+        num_tokens = sum(count_words(text) for text in input)
+        return SimpleNamespace(
+            data=data,
+            model=model,
+            usage=SimpleNamespace(prompt_tokens=num_tokens, total_tokens=num_tokens),
+        )
+
+
+class _StubCompletions:
+    def __init__(self, backend: "StubOpenAI"):
+        self.backend = backend
+
+    def create(
+        self,
+        model: str,
+        messages: list[dict],
+        stream: bool = False,
+        stream_options: Optional[dict] = None,
+    ):
+        """Returns a templated chat completion in the format of the OpenAI API,
+        or an iterator of chunks with `stream`."""
+        prompt = "\n".join(message["content"] for message in messages)
+        if stream:
+            return self._stream(model, prompt, stream_options or {})
+        self.backend._simulate_request()
+        content = self.backend._render_response(model, prompt)
+        prompt_tokens = count_words(prompt)
+        completion_tokens = count_words(content)
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(
+                    index=0,
+                    message=SimpleNamespace(role="assistant", content=content),
+                    finish_reason="stop",
+                )
+            ],
+            model=model,
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+    def _stream(self, model: str, prompt: str, stream_options: dict) -> Iterator:
+        completion_tokens = 0
+        for content in self.backend._stream_response(model, prompt):
+            completion_tokens += 1
+            yield SimpleNamespace(
+                choices=[
+                    SimpleNamespace(
+                        index=0,
+                        delta=SimpleNamespace(content=content),
+                        finish_reason=None,
+                    )
+                ],
+                model=model,
+                usage=None,
+            )
+        if stream_options.get("include_usage"):
+            prompt_tokens = count_words(prompt)
+            yield SimpleNamespace(
+                choices=[],
+                model=model,
+                usage=SimpleNamespace(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            )
+
+
+class StubOpenAI(StubBackend):
+    """An offline stand-in for the `OpenAI` client.
+
+    Supports `embeddings.create()` with hash-based embeddings and
+    `chat.completions.create()` with templated responses, optionally streamed.
+    """
+
+    def __init__(self, config_client: dict):
+        super().__init__(config_client)
+        self.dimension: int = config_client.get(
+            ConfigConstants.KEY_DIMENSION, BackendConstants.DEFAULT_DIMENSION
+        )
+        self.embeddings = _StubEmbeddings(self)
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
+
+
+class StubOllama(StubBackend):
+    """An offline stand-in for the Langchain `Ollama` LLM."""
+
+    def __init__(self, model: str, config_client: dict):
+        super().__init__(config_client)
+        self.model = model
+
+    def invoke(self, text: str) -> str:
+        """Returns a templated response."""
+        self._simulate_request()
+        return self._render_response(self.model, text)
+
+    def stream(self, text: str) -> Iterator[str]:
+        """Yields a templated response word by word."""
+        return self._stream_response(self.model, text)
+
+    def generate(self, prompts: list[str]):
+        """Returns templated responses in the format of a Langchain `LLMResult`,
+        with the token counts Ollama reports in the generation info."""
+        generations = []
+        for prompt in prompts:
+            text = self.invoke(prompt)
+            generation_info = {
+                LLMConstants.OLLAMA_PROMPT_TOKENS: count_words(prompt),
+                LLMConstants.OLLAMA_COMPLETION_TOKENS: count_words(text),
+            }
+            generations.append(
+                [SimpleNamespace(text=text, generation_info=generation_info)]
+            )
+        return SimpleNamespace(generations=generations)
+
+
+def _client_type(config_pipeline: dict, default: str) -> tuple[str, dict]:
+    config_client = config_pipeline.get(ConfigConstants.KEY_CLIENT) or {}
+    return config_client.get(ConfigConstants.KEY_TYPE, default), config_client
+
+
+def create_openai_client(config_pipeline: dict):
+    """Creates the OpenAI client selected in the `client` section of a pipeline
+    config, defaulting to the `OpenAI` API client.
+
+    The API client is shared by all pipelines of the process, so they reuse its
+    connection pool. Stub clients are created per pipeline.
+    """
+    client_type, config_client = _client_type(
+        config_pipeline, BackendConstants.CLIENT_OPENAI
+    )
+    if client_type == BackendConstants.CLIENT_STUB:
+        return StubOpenAI(config_client)
+    if client_type == BackendConstants.CLIENT_OPENAI:
+        from openai import OpenAI
+
+        return resources.get(ResourceConstants.KIND_OPENAI_CLIENT, None, OpenAI)
+    raise ValueError(f"Unknown OpenAI client type: {client_type}")
+
+
+def create_ollama_client(config_pipeline: dict, model: str):
+    """Creates the Ollama client selected in the `client` section of a pipeline
+    config, defaulting to the Langchain `Ollama` LLM, which is shared by all
+    pipelines of the process using the same model."""
+    client_type, config_client = _client_type(
+        config_pipeline, BackendConstants.CLIENT_OLLAMA
+    )
+    if client_type == BackendConstants.CLIENT_STUB:
+        return StubOllama(model, config_client)
+    if client_type == BackendConstants.CLIENT_OLLAMA:
+        from langchain_community.llms import Ollama
+
+        return resources.get(
+            ResourceConstants.KIND_OLLAMA_CLIENT, model, lambda: Ollama(model=model)
+        )
+    raise ValueError(f"Unknown Ollama client type: {client_type}")
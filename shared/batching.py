@@ -0,0 +1,197 @@
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from shared.constants import (
+    BatchingConstants,
+    ConfigConstants,
+    InstrumentationConstants,
+)
+from shared.instrumentation import instrumentation, percentile
+
+
+def create_batcher(
+    function: Callable[[list], list], config_micro_batch: Optional[dict], name: str
+) -> Optional["MicroBatcher"]:
+    """Creates a batcher from a `micro_batch` config section, or returns `None`
+    if the section is missing."""
+    if not config_micro_batch:
+        return None
+    return MicroBatcher(
+        function,
+        max_batch_size=config_micro_batch.get(
+            ConfigConstants.KEY_MAX_BATCH_SIZE,
+            BatchingConstants.DEFAULT_MAX_BATCH_SIZE,
+        ),
+        max_wait=config_micro_batch.get(
+            ConfigConstants.KEY_MAX_WAIT_MS, BatchingConstants.DEFAULT_MAX_WAIT_MS
+        )
+        / 1000,
+        name=name,
+    )
+
+
+class MicroBatcher:
+    """Merges the items of concurrent requests into batched calls.
+
+    Callers submit a list of items and block until its results are ready. A
+    worker thread takes the first waiting request, keeps collecting requests
+    until `max_batch_size` items are pending or `max_wait` seconds have passed,
+    calls `function` once with all pending items and hands each caller the
+    results of its own items. The items of one request always go into the same
+    batch, so a request larger than `max_batch_size` forms a batch of its own.
+
+    Each batch is timed as a stage called `name` with the number of requests and
+    items as counters, and the stages `function` records are nested under it.
+    Since the batch runs on the worker thread, each caller gets a copy of the
+    batch span with the counters in proportion to its number of items, e.g. its
+    share of the embedding tokens, nested under its active span. The time a
+    request waited for its batch to start is recorded as the
+    `<name>_queue_wait` stage in the span of the caller, and `stats()`
+    summarizes the batch fill and queueing delay.
+
+    Example usage:
+        ```
+        batcher = MicroBatcher(pipeline.retrieve, max_batch_size=64, max_wait=0.005)
+        contexts = batcher.submit(query_texts)
+        batcher.close()
+        ```
+    """
+
+    def __init__(
+        self,
+        function: Callable[[list], list],
+        max_batch_size: int,
+        max_wait: float,
+        name: str = InstrumentationConstants.STAGE_BATCH,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.function = function
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._requests: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._batch_sizes: list[int] = []
+        self._num_requests = 0
+        self._queue_waits: list[float] = []
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, items: list) -> list:
+        """Returns the results of `function` for the items, computed in a batch
+        with the items of concurrent requests."""
+        future: Future = Future()
+        submitted = time.perf_counter()
+        # Checked and enqueued under the lock, so no request is enqueued after
+        # the stop signal of `close()`.
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The batcher is closed.")
+            if not items:
+                return []
+            self._requests.put((items, future))
+        results, started, span = future.result()
+        queue_wait = started - submitted
+        instrumentation.record(
+            f"{self.name}_{InstrumentationConstants.STAGE_QUEUE_WAIT}", queue_wait
+        )
+        instrumentation.attach(span)
+        with self._lock:
+            self._queue_waits.append(queue_wait)
+        return results
+
+    def stats(self) -> dict:
+        """Summarizes the batches processed so far.
+
+        Returns:
+            The number of `batches`, `requests` and `items`, the `mean_batch_size`,
+            the `mean_fill` as a fraction of `max_batch_size`, and the 50th and
+            95th percentile of the queueing delay in seconds.
+        """
+        with self._lock:
+            num_batches = len(self._batch_sizes)
+            num_items = sum(self._batch_sizes)
+            mean_batch_size = num_items / num_batches if num_batches else 0.0
+            return {
+                BatchingConstants.KEY_BATCHES: num_batches,
+                BatchingConstants.KEY_REQUESTS: self._num_requests,
+                BatchingConstants.KEY_ITEMS: num_items,
+                BatchingConstants.KEY_MEAN_BATCH_SIZE: mean_batch_size,
+                BatchingConstants.KEY_MEAN_FILL: min(
+                    mean_batch_size / self.max_batch_size, 1.0
+                ),
+                BatchingConstants.KEY_QUEUE_WAIT_P50: percentile(self._queue_waits, 50),
+                BatchingConstants.KEY_QUEUE_WAIT_P95: percentile(self._queue_waits, 95),
+            }
+
+    def close(self) -> None:
+        """Stops the worker after the pending requests are done."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self._worker.join()
+
+    def _collect(self) -> list[tuple[list, Future]]:
+        """Waits for the requests of the next batch."""
+        request = self._requests.get()
+        if request is None:
+            return []
+        requests = [request]
+        num_items = len(request[0])
+        deadline = time.perf_counter() + self.max_wait
+        while num_items < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # Serve the collected requests before stopping.
+                self._requests.put(None)
+                break
+            requests.append(request)
+            num_items += len(request[0])
+        return requests
+
+    def _run(self) -> None:
+        while True:
+            requests = self._collect()
+            if not requests:
+                return
+            self._process(requests)
+
+    def _process(self, requests: list[tuple[list, Future]]) -> None:
+        items = [item for request_items, _ in requests for item in request_items]
+        started = time.perf_counter()
+        with self._lock:
+            self._batch_sizes.append(len(items))
+            self._num_requests += len(requests)
+        try:
+            with instrumentation.span(self.name) as span:
+                span.add(InstrumentationConstants.COUNTER_BATCH_REQUESTS, len(requests))
+                span.add(InstrumentationConstants.COUNTER_BATCH_ITEMS, len(items))
+                results: Any = self.function(items)
+        except Exception as error:
+            for _, future in requests:
+                future.set_exception(error)
+            return
+
+        shares = span.split([len(request_items) for request_items, _ in requests])
+        start = 0
+        for (request_items, future), share in zip(requests, shares):
+            future.set_result(
+                (results[start : start + len(request_items)], started, share)
+            )
+            start += len(request_items)
+        self.logger.debug(
+            "Processed %s requests with %s items", len(requests), len(items)
+        )
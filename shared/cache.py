@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Iterable
+
+from shared.chunk_store import MAX_VARIABLES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def text_hash(texts: Iterable[str]) -> str:
+    """Returns a hash of a sequence of texts, which differs if any text, their
+    order or their boundaries change."""
+    digest = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def json_hash(obj: Any) -> str:
+    """Returns a hash of a JSON-serializable object, independent of the order of
+    dict keys."""
+    return text_hash([json.dumps(obj, sort_keys=True)])
+
+
+def cache_key(*parts: str) -> str:
+    """Returns a cache key derived from all parts."""
+    return text_hash(parts)
+
+
+class Cache:
+    """A persistent key-value cache of JSON-serializable values in SQLite.
+
+    Lookups and writes take many keys at once, so a batch of requests costs one
+    query and one transaction.
+
+    Example usage:
+        ```
+        cache = Cache("data/results/judgments.sqlite")
+        cached = cache.get_many(keys)
+        cache.put_many({key: value for key, value in computed})
+        ```
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        # Shared by the worker threads of an evaluator, access is serialized by
+        # the lock.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Returns the cached values of the keys that are stored."""
+        values = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self.lock:
+            for start in range(0, len(unique_keys), MAX_VARIABLES):
+                batch = unique_keys[start : start + MAX_VARIABLES]
+                values.update(
+                    (key, json.loads(value))
+                    for key, value in self.connection.execute(
+                        "SELECT key, value FROM cache WHERE key IN "
+                        f"({', '.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+        return values
+
+    def put_many(self, items: dict[str, Any]) -> None:
+        """Stores values by key, replacing stored values."""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                ((key, json.dumps(value)) for key, value in items.items()),
+            )
+        self.logger.debug("Stored %s values", len(items))
@@ -0,0 +1,129 @@
+import itertools
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+from shared.constants import DatabaseConstants
+from shared.instrumentation import percentile
+from shared.models import CalibrationResult
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """Returns the indices of the `top_k` vectors with the highest cosine
+    similarity to each query, by brute force."""
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    similarities = queries @ vectors.T
+    top = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+    return top
+
+
+def recall_at_k(approximate: np.ndarray, exact: np.ndarray) -> float:
+    """Returns the mean fraction of the exact neighbours that were found."""
+    found = [
+        len(set(approximate_row) & set(exact_row)) / len(exact_row)
+        for approximate_row, exact_row in zip(approximate, exact)
+    ]
+    return float(np.mean(found))
+
+
+def calibrate(
+    vectors: np.ndarray,
+    num_queries: int,
+    top_k: int,
+    grid_M: list[int],
+    grid_construction_ef: list[int],
+    grid_search_ef: list[int],
+    num_threads: int = -1,
+    seed: int = 0,
+) -> list[CalibrationResult]:
+    """Measures the recall and query latency of HNSW settings.
+
+    A sample of `num_queries` vectors is held out as queries, and an index of
+    the remaining vectors is built with `hnswlib`, the library Chroma uses, for
+    every combination of `M` and `construction_ef`. Each index is queried with
+    every `search_ef`, one query at a time as in the pipelines, and compared
+    with the exact neighbours.
+
+    Returns no results if there are not more than `top_k` vectors, since no
+    query would have `top_k` neighbours left.
+    """
+    if len(vectors) <= top_k or num_queries < 1:
+        return []
+
+    import hnswlib
+
+    logger = logging.getLogger(__name__)
+    rng = np.random.default_rng(seed)
+    num_queries = min(num_queries, len(vectors) - top_k)
+    is_query = np.zeros(len(vectors), dtype=bool)
+    is_query[rng.choice(len(vectors), num_queries, replace=False)] = True
+    queries = vectors[is_query]
+    vectors = vectors[~is_query]
+    exact = exact_top_k(vectors, queries, top_k)
+
+    results = []
+    for M, construction_ef in itertools.product(grid_M, grid_construction_ef):
+        start = time.perf_counter()
+        index = hnswlib.Index(
+            space=DatabaseConstants.SPACE_COSINE, dim=vectors.shape[1]
+        )
+        index.init_index(
+            max_elements=len(vectors), ef_construction=construction_ef, M=M
+        )
+        index.add_items(vectors, np.arange(len(vectors)), num_threads=num_threads)
+        build_time = time.perf_counter() - start
+
+        for search_ef in grid_search_ef:
+            index.set_ef(max(search_ef, top_k))
+            latencies = []
+            approximate = np.empty((len(queries), top_k), dtype=np.int64)
+            for ind, query in enumerate(queries):
+                start = time.perf_counter()
+                labels, _ = index.knn_query(query, k=top_k, num_threads=1)
+                latencies.append(time.perf_counter() - start)
+                approximate[ind] = labels[0]
+            result = CalibrationResult(
+                M=M,
+                construction_ef=construction_ef,
+                search_ef=search_ef,
+                recall=recall_at_k(approximate, exact),
+                latency_p50=percentile(latencies, 50),
+                latency_p95=percentile(latencies, 95),
+                build_time=build_time,
+            )
+            logger.info("Calibrated %s", result)
+            results.append(result)
+    return results
+
+
+def best_setting(
+    results: list[CalibrationResult], target_recall: float
+) -> Optional[CalibrationResult]:
+    """Returns the fastest setting reaching the target recall, or the setting
+    with the highest recall if none does."""
+    if not results:
+        return None
+    reaching = [result for result in results if result.recall >= target_recall]
+    if reaching:
+        return min(reaching, key=lambda result: result.latency_p50)
+    return max(results, key=lambda result: result.recall)
+
+
+def format_results(results: list[CalibrationResult]) -> str:
+    """Formats calibration results as a table with latencies in milliseconds."""
+    lines = [
+        f"{'M':>4}{'construction_ef':>17}{'search_ef':>11}{'recall':>9}"
+        f"{'p50':>9}{'p95':>9}{'build_s':>10}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.M:>4}{result.construction_ef:>17}{result.search_ef:>11}"
+            f"{result.recall:>9.3f}"
+            f"{result.latency_p50 * 1000:>9.3f}"
+            f"{result.latency_p95 * 1000:>9.3f}"
+            f"{result.build_time:>10.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+from shared.models import Document
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Stays below the bound variable limit of older SQLite versions.
+MAX_VARIABLES = 900
+
+
+def get_chunk_id(chunk: Document) -> str:
+    """Returns a deterministic id of a chunk, derived from its source, page and
+    text.
+
+    Identical chunks produced by different pipelines or splitter settings get the
+    same id, so their text is stored once.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (chunk.source.source, str(chunk.page), chunk.page_content):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ChunkStore:
+    """Stores the texts of chunks by chunk id in a SQLite database.
+
+    The store is shared by all collections of a database directory, which only
+    hold ids and vectors, so each chunk text is written once no matter how many
+    embedding models and splitter settings index it.
+
+    Example usage:
+        ```
+        store = ChunkStore("data/db/chunks.sqlite")
+        store.add(ids, texts)
+        texts = store.get(ids)
+        ```
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        # Shared by the threads of a pipeline, access is serialized by the lock.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, ids: list[str], texts: list[str]) -> int:
+        """Adds chunk texts, skipping ids that are already stored, and returns the
+        number of new chunks."""
+        with self.lock, self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO chunks (chunk_id, text) VALUES (?, ?)",
+                zip(ids, texts),
+            )
+            added = self.connection.total_changes - before
+        self.logger.debug("Stored %s new of %s chunks", added, len(ids))
+        return added
+
+    def get(self, ids: list[str]) -> list[Optional[str]]:
+        """Returns the texts of chunks in the given order, `None` for unknown ids."""
+        texts = {}
+        unique_ids = list(dict.fromkeys(ids))
+        with self.lock:
+            for start in range(0, len(unique_ids), MAX_VARIABLES):
+                batch = unique_ids[start : start + MAX_VARIABLES]
+                texts.update(
+                    self.connection.execute(
+                        "SELECT chunk_id, text FROM chunks WHERE chunk_id IN "
+                        f"({', '.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+        return [texts.get(chunk_id) for chunk_id in ids]
+
+    def find(self, texts: list[str]) -> dict[str, list[str]]:
+        """Returns the ids of the stored chunks with each of the given texts.
+
+        Texts are not indexed, so each batch of texts scans the store once.
+        """
+        ids: dict[str, list[str]] = {}
+        unique_texts = list(dict.fromkeys(texts))
+        with self.lock:
+            for start in range(0, len(unique_texts), MAX_VARIABLES):
+                batch = unique_texts[start : start + MAX_VARIABLES]
+                for chunk_id, text in self.connection.execute(
+                    "SELECT chunk_id, text FROM chunks WHERE text IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                ):
+                    ids.setdefault(text, []).append(chunk_id)
+        return ids
@@ -1,34 +1,219 @@
 class ConfigConstants:
     DEFAULT_CONFIG_FILE = "config.yaml"
     DEFAULT_LOGGING_FILE = "logging.yaml"
+    KEY_BACKEND = "backend"
+    KEY_BATCH_SIZE = "batch_size"
+    KEY_CACHE = "cache"
+    KEY_CALIBRATION = "calibration"
+    KEY_CANDIDATES = "candidates"
     KEY_CHUNK_SIZE = "chunk_size"
     KEY_CHUNK_OVERLAP = "chunk_overlap"
+    KEY_CLIENT = "client"
+    KEY_COMPRESS = "compress"
     KEY_CONFIG_DATABASE = "database"
     KEY_CONFIG_PATH = "path"
+    KEY_DEDUP = "dedup"
+    KEY_DIMENSION = "dimension"
+    KEY_DIRECTORY = "directory"
     KEY_EMBEDDING = "embedding"
+    KEY_ERROR_RATE = "error_rate"
     KEY_EVALUATORS = "evaluators"
+    KEY_EVALUATORS_EMBEDDING_SIMILARITY = "embedding_similarity"
+    KEY_EXPERIMENTS = "experiments"
+    KEY_FUSION = "fusion"
+    KEY_EVALUATORS_LLM_JUDGE = "llm_judge"
     KEY_EVALUATORS_ORDER_AWARE = "order_aware"
     KEY_EVALUATORS_ORDER_UNAWARE = "order_unaware"
     KEY_EVALUATORS_ORDER_UNAWARE_K = "k"
+    KEY_EXTRACTION_MODE = "extraction_mode"
+    KEY_HNSW = "hnsw"
+    KEY_HOST = "host"
+    KEY_HYBRID = "hybrid"
+    KEY_INGESTION = "ingestion"
+    KEY_INPUT = "input"
+    KEY_LATENCY = "latency"
     KEY_LOADER = "loader"
     KEY_LOCAL = "local"
     KEY_LLM = "llm"
+    KEY_MAX_BATCH_SIZE = "max_batch_size"
+    KEY_MAX_PROMPT_TOKENS = "max_prompt_tokens"
     KEY_MAX_TOKENS = "max_tokens"
+    KEY_MAX_WAIT_MS = "max_wait_ms"
+    KEY_MAX_WORKERS = "max_workers"
     KEY_METHOD = "method"
+    KEY_MICRO_BATCH = "micro_batch"
+    KEY_MMR_LAMBDA = "mmr_lambda"
+    KEY_MODEL = "model"
+    KEY_NUM_PROCESSES = "num_processes"
+    KEY_NUM_QUERIES = "num_queries"
     KEY_OPENAI = "openai"
+    KEY_OUTPUT = "output"
+    KEY_PRICING = "pricing"
     KEY_PATHS = "paths"
+    KEY_PIPELINE = "pipeline"
     KEY_PIPELINES = "pipelines"
+    KEY_PORT = "port"
+    KEY_PRECISION = "precision"
     KEY_PROMPT = "prompt"
     KEY_QUERIES = "queries"
+    KEY_RERANK = "rerank"
+    KEY_RESPONSE_TEMPLATE = "response_template"
+    KEY_RETRIEVAL = "retrieval"
+    KEY_REUSE_INDEX = "reuse_index"
+    KEY_RRF_K = "rrf_k"
+    KEY_SEED = "seed"
+    KEY_SERVER = "server"
+    KEY_STREAM = "stream"
     KEY_SPLITTER = "splitter"
+    KEY_STORE = "store"
+    KEY_TARGET_RECALL = "target_recall"
+    KEY_THRESHOLD = "threshold"
+    KEY_TOKEN_LATENCY = "token_latency"
+    KEY_TOP_K = "top_k"
+    KEY_TYPE = "type"
+    KEY_URL = "url"
+    KEY_WARMUP = "warmup"
+    KEY_WEIGHT = "weight"
+
+
+class BackendConstants:
+    CLIENT_OLLAMA = "ollama"
+    CLIENT_OPENAI = "openai"
+    CLIENT_STUB = "stub"
+    DEFAULT_DIMENSION = 1536
+    DEFAULT_RESPONSE_TEMPLATE = "Stub response of {model} to a prompt of {words} words."
+    DISTRIBUTION_CONSTANT = "constant"
+    DISTRIBUTION_EXPONENTIAL = "exponential"
+    DISTRIBUTION_LOGNORMAL = "lognormal"
+    DISTRIBUTION_NORMAL = "normal"
+    DISTRIBUTIONS = (
+        DISTRIBUTION_CONSTANT,
+        DISTRIBUTION_EXPONENTIAL,
+        DISTRIBUTION_LOGNORMAL,
+        DISTRIBUTION_NORMAL,
+    )
 
 
 class DatabaseConstants:
+    FILE_CHUNK_STORE = "chunks.sqlite"
+    HNSW_CONSTRUCTION_EF = "construction_ef"
+    HNSW_M = "M"
+    HNSW_NUM_THREADS = "num_threads"
+    HNSW_PARAMETERS = (
+        "M",
+        "construction_ef",
+        "search_ef",
+        "num_threads",
+        "batch_size",
+        "sync_threshold",
+    )
+    HNSW_PREFIX = "hnsw:"
+    HNSW_SEARCH_EF = "search_ef"
+    HNSW_SPACE = "hnsw:space"
+    KEY_DATABASE_DISTANCES = "distances"
     KEY_DATABASE_DOCUMENTS = "documents"
+    KEY_DATABASE_EMBEDDINGS = "embeddings"
+    KEY_DATABASE_IDS = "ids"
+    SPACE_COSINE = "cosine"
+
+
+class BatchingConstants:
+    DEFAULT_MAX_BATCH_SIZE = 64
+    DEFAULT_MAX_WAIT_MS = 5
+    KEY_BATCHES = "batches"
+    KEY_ITEMS = "items"
+    KEY_MEAN_BATCH_SIZE = "mean_batch_size"
+    KEY_MEAN_FILL = "mean_fill"
+    KEY_QUEUE_WAIT_P50 = "queue_wait_p50"
+    KEY_QUEUE_WAIT_P95 = "queue_wait_p95"
+    KEY_REQUESTS = "requests"
+
+
+class CalibrationConstants:
+    DEFAULT_CONSTRUCTION_EF = [100, 200]
+    DEFAULT_M = [16, 32]
+    DEFAULT_NUM_QUERIES = 200
+    DEFAULT_SEARCH_EF = [10, 20, 50, 100, 200]
+    DEFAULT_TARGET_RECALL = 0.95
 
 
 class EmbeddingConstants:
+    BACKEND_ONNX = "onnx"
+    BACKEND_OPENVINO = "openvino"
+    BACKEND_TORCH = "torch"
+    BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_OPENVINO)
+    DEFAULT_BATCH_SIZE = 32
+    DEVICE_CPU = "cpu"
     KEY_TEXT = "text"
+    OPENAI_MAX_BATCH_SIZE = 2048
+    PRECISION_FLOAT16 = "float16"
+    PRECISION_FLOAT32 = "float32"
+    PRECISION_INT8 = "int8"
+    PRECISIONS = (PRECISION_FLOAT32, PRECISION_FLOAT16, PRECISION_INT8)
+
+
+class InstrumentationConstants:
+    COUNTER_BATCH_ITEMS = "batch_items"
+    COUNTER_BATCH_REQUESTS = "batch_requests"
+    COUNTER_CACHED_PAGES = "cached_pages"
+    COUNTER_CANDIDATES = "candidates"
+    COUNTER_CHUNKS = "chunks"
+    COUNTER_COMPLETION_TOKENS = "completion_tokens"
+    COUNTER_EMBEDDING_TOKENS = "embedding_tokens"
+    COUNTER_JUDGE_CACHE_HITS = "judge_cache_hits"
+    COUNTER_JUDGE_REQUESTS = "judge_requests"
+    COUNTER_PAGES = "pages"
+    COUNTER_PAIRS = "pairs"
+    COUNTER_PROMPT_TOKENS = "prompt_tokens"
+    COUNTER_QUERIES = "queries"
+    COUNTER_REUSED_EMBEDDINGS = "reused_embeddings"
+    COUNTER_TEXTS = "texts"
+    COUNTER_TOKENS = "tokens"
+    STAGE_BATCH = "batch"
+    STAGE_DATABASE_ADD = "database_add"
+    STAGE_DEDUP = "dedup"
+    STAGE_EMBEDDING = "embedding"
+    STAGE_EMBEDDING_BATCH = "embedding_batch"
+    STAGE_GENERATION = "generation"
+    STAGE_JUDGE = "judge"
+    STAGE_LEXICAL = "lexical"
+    STAGE_LOAD = "load"
+    STAGE_PACK = "pack"
+    STAGE_QUERY = "query"
+    STAGE_QUEUE_WAIT = "queue_wait"
+    STAGE_RERANK = "rerank"
+    STAGE_RETRIEVAL = "retrieval"
+    STAGE_RETRIEVAL_BATCH = "retrieval_batch"
+    STAGE_RUN = "run"
+    STAGE_SIMILARITY = "similarity"
+    STAGE_SPLIT = "split"
+    STAGE_TTFT = "ttft"
+
+
+class EvaluatorConstants:
+    KEY_FINGERPRINT = "fingerprint"
+    KEY_METRICS = "metrics"
+    NAME_GRADED_RELEVANCE = "graded_relevance"
+    PREFIX_AVERAGE = "avg_"
+
+
+class JudgeConstants:
+    DEFAULT_MAX_WORKERS = 8
+    MAX_SCORE = 5
+    METRIC_ANSWER_RELEVANCE = "answer_relevance"
+    METRIC_FAITHFULNESS = "faithfulness"
+    MIN_SCORE = 1
+
+
+class LoaderConstants:
+    DEFAULT_EXTRACTION_MODE = "plain"
+    HASH_BLOCK_SIZE = 1 << 20
+    PAGE_FILE_SUFFIX = ".pages"
+
+
+class LLMConstants:
+    OLLAMA_COMPLETION_TOKENS = "eval_count"
+    OLLAMA_PROMPT_TOKENS = "prompt_eval_count"
 
 
 class InputConstants:
@@ -38,6 +223,103 @@ class InputConstants:
     KEY_RELEVANCE = "relevance"
 
 
+class LexicalConstants:
+    DEFAULT_B = 0.75
+    DEFAULT_K1 = 1.5
+    DIRECTORY = "lexical"
+    FILE_TERM_COUNTS = "term_counts.npz"
+    FILE_VOCABULARY = "vocabulary.json"
+    KEY_IDS = "ids"
+    KEY_TERMS = "terms"
+
+
+class RetrievalConstants:
+    DEDUP_COSINE = "cosine"
+    DEDUP_MINHASH = "minhash"
+    DEDUP_MMR = "mmr"
+    DEDUP_NONE = "none"
+    DEFAULT_CANDIDATES = 20
+    DEFAULT_FUSION_WEIGHT = 0.5
+    DEFAULT_MMR_LAMBDA = 0.5
+    DEFAULT_RERANK_BATCH_SIZE = 64
+    DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    DEFAULT_RRF_K = 60
+    DEFAULT_THRESHOLD = 0.9
+    DEFAULT_TOP_K = 5
+    FUSION_RRF = "rrf"
+    FUSION_WEIGHTED = "weighted"
+    MINHASH_NUM_PERMUTATIONS = 128
+    MINHASH_SHINGLE_SIZE = 3
+
+
+class ResourceConstants:
+    KIND_CHROMA_CLIENT = "chroma_client"
+    KIND_CHUNK_STORE = "chunk_store"
+    KIND_CROSS_ENCODER = "cross_encoder"
+    KIND_OLLAMA_CLIENT = "ollama_client"
+    KIND_OPENAI_CLIENT = "openai_client"
+    KIND_SENTENCE_TRANSFORMER = "sentence_transformer"
+    KIND_TIKTOKEN = "tiktoken"
+    KIND_TOKENIZER = "tokenizer"
+
+
+class ResultsConstants:
+    FILE_PATTERNS = ("results_*.jsonl", "results_*.jsonl.gz")
+    LEGACY_FILE_PATTERN = "results_*.json"
+    KEY_CONTEXTS = "contexts"
+    KEY_COST = "cost"
+    KEY_COUNTERS = "counters"
+    KEY_EVALUATIONS = "evaluations"
+    KEY_EVALUATORS = "evaluators"
+    KEY_EXPERIMENT = "experiment"
+    KEY_INDEX = "index"
+    KEY_MODEL = "model"
+    KEY_PARAMETERS = "parameters"
+    KEY_PROMPT = "prompt"
+    KEY_PROMPT_CONTEXTS = "prompt_contexts"
+    KEY_TOKENS_PER_SECOND = "tokens_per_second"
+    KEY_QUERY = "query"
+    KEY_RESPONSE = "response"
+    KEY_RESULTS = "results"
+    KEY_TEMPLATE = "template"
+    KEY_TIMESTAMP_END = "timestamp_end"
+    KEY_TIMINGS = "timings"
+    KEY_TYPE = "type"
+    PREFIX_COUNTER = "count."
+    PREFIX_TIMING = "time."
+    RECORD_EXPERIMENT = "experiment"
+    RECORD_QUERY = "query"
+    RECORD_SUMMARY = "summary"
+    TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ServiceConstants:
+    CONTENT_TYPE_JSON = "application/json"
+    CONTENT_TYPE_JSONL = "application/x-ndjson"
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_MAX_BATCH_SIZE = 64
+    DEFAULT_MAX_WAIT_MS = 5
+    DEFAULT_PORT = 8765
+    KEY_CONTEXTS = "contexts"
+    KEY_COUNTERS = "counters"
+    KEY_BATCHERS = "batchers"
+    KEY_ERROR = "error"
+    KEY_PIPELINE = "pipeline"
+    KEY_PIPELINES = "pipelines"
+    KEY_QUERIES = "queries"
+    KEY_TIMINGS = "timings"
+    PATH_HEALTH = "/health"
+    PATH_RETRIEVE = "/retrieve"
+    PATH_RUN = "/run"
+    PATH_STATS = "/stats"
+    WARMUP_QUERY = "warmup"
+
+
+class SimilarityConstants:
+    METRIC_ANSWER_CONTEXT_SIMILARITY = "answer_context_similarity"
+    METRIC_ANSWER_QUERY_SIMILARITY = "answer_query_similarity"
+
+
 class ModelConstants:
     KEY_PAGE = "page"
     KEY_SOURCE = "source"
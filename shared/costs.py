@@ -0,0 +1,52 @@
+import logging
+from typing import Optional
+
+from shared.constants import ConfigConstants, InstrumentationConstants
+
+
+class PriceTable:
+    """Computes the cost of token counters from a table of model prices.
+
+    Prices are given in USD per million tokens for `input` and `output` tokens,
+    per model. Models without an entry, like local models, are free.
+
+    Example config:
+        ```
+        pricing:
+          gpt-3.5-turbo:
+            input: 0.5
+            output: 1.5
+        ```
+    """
+
+    def __init__(self, config_pricing: Optional[dict]):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.prices: dict[str, dict] = config_pricing or {}
+
+    def _price(self, model: Optional[str], kind: str) -> float:
+        return self.prices.get(model, {}).get(kind, 0.0) / 1_000_000
+
+    def cost(
+        self,
+        counters: Optional[dict[str, int]],
+        llm: Optional[str] = None,
+        embedding: Optional[str] = None,
+    ) -> float:
+        """Returns the cost in USD of the token counters of a query or run.
+
+        Args:
+            counters:   The counters, e.g. `QueryResult.counters`.
+            llm:        The LLM the `prompt_tokens` and `completion_tokens`
+                        were consumed by.
+            embedding:  The embedding model the `embedding_tokens` were
+                        consumed by.
+        """
+        counters = counters or {}
+        return (
+            counters.get(InstrumentationConstants.COUNTER_PROMPT_TOKENS, 0)
+            * self._price(llm, ConfigConstants.KEY_INPUT)
+            + counters.get(InstrumentationConstants.COUNTER_COMPLETION_TOKENS, 0)
+            * self._price(llm, ConfigConstants.KEY_OUTPUT)
+            + counters.get(InstrumentationConstants.COUNTER_EMBEDDING_TOKENS, 0)
+            * self._price(embedding, ConfigConstants.KEY_INPUT)
+        )
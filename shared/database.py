@@ -1,65 +1,382 @@
-import chromadb
 import logging
-from typing import Optional
-import uuid
+import numpy as np
+import os
+from typing import Optional, TYPE_CHECKING
 
-from shared.constants import ConfigConstants, DatabaseConstants
-from shared.models import Document
+from shared.constants import (
+    ConfigConstants,
+    DatabaseConstants,
+    InstrumentationConstants,
+    ResourceConstants,
+    RetrievalConstants,
+)
+from shared.chunk_store import ChunkStore, get_chunk_id
+from shared.instrumentation import instrumentation
+from shared.resources import resources
+from shared.models import Candidates, Document
+
+if TYPE_CHECKING:
+    import chromadb
 
 
 class ChromaDB:
-    """Chroma database methods."""
+    """Chroma database methods.
+
+    The collections only hold chunk ids and vectors. The chunk texts are kept in
+    a `ChunkStore` shared by all collections of the database directory, and are
+    looked up by id after a query.
+    """
 
-    def __init__(self, config: dict, collection_name: str) -> None:
+    def __init__(
+        self,
+        config: dict,
+        collection_name: str,
+        config_hnsw: Optional[dict] = None,
+    ) -> None:
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.client = chromadb.PersistentClient(
-            path=config[ConfigConstants.KEY_CONFIG_DATABASE][
-                ConfigConstants.KEY_CONFIG_PATH
-            ]
+        self.path: str = config[ConfigConstants.KEY_CONFIG_DATABASE][
+            ConfigConstants.KEY_CONFIG_PATH
+        ]
+        self.collection_name = collection_name
+        # The client and chunk store of a path are shared by all collections.
+        self.client = resources.get(
+            ResourceConstants.KIND_CHROMA_CLIENT, self.path, self._create_client
+        )
+        chunk_store_path = os.path.join(self.path, DatabaseConstants.FILE_CHUNK_STORE)
+        self.chunk_store = resources.get(
+            ResourceConstants.KIND_CHUNK_STORE,
+            chunk_store_path,
+            lambda: ChunkStore(chunk_store_path),
         )
-        self.collection = self._get_or_create_collection(collection_name)
-        self.n_results = 5
+        self.collection = self._get_or_create_collection(
+            collection_name, config_hnsw or {}
+        )
+        self.n_results = (config.get(ConfigConstants.KEY_RETRIEVAL) or {}).get(
+            ConfigConstants.KEY_TOP_K, RetrievalConstants.DEFAULT_TOP_K
+        )
+
+    def _create_client(self) -> "chromadb.ClientAPI":
+        """Creates the client of the database directory, importing `chromadb` on
+        first use."""
+        import chromadb
+
+        return chromadb.PersistentClient(path=self.path)
+
+    def _get_or_create_collection(
+        self, name: str, config_hnsw: dict
+    ) -> "chromadb.Collection":
+        """Loads a collection, or creates it with the given HNSW parameters if it
+        does not exist.
+
+        Chroma only applies the HNSW parameters when the index is created, so an
+        existing collection keeps its parameters. A warning is logged if they
+        differ from the configured ones. The collection is not opened with
+        `get_or_create_collection`, which would overwrite the stored parameters
+        with the configured ones, or drop them if none are configured.
+        """
+        metadata = {DatabaseConstants.HNSW_SPACE: DatabaseConstants.SPACE_COSINE}
+        for key, value in config_hnsw.items():
+            if key not in DatabaseConstants.HNSW_PARAMETERS:
+                raise ValueError(f"Unknown HNSW parameter `{key}`.")
+            metadata[DatabaseConstants.HNSW_PREFIX + key] = value
 
-    def _get_or_create_collection(self, name: str) -> None:
-        """Creates a new collection."""
         try:
             collection = self.client.get_collection(name=name)
-            self.logger.info("Loaded collection `%s`!", name)
-            return collection
-        except ValueError:
-            collection = self.client.create_collection(
-                name=name, metadata={"hnsw:space": "cosine"}
-            )
+        except Exception:
+            # Chroma raises a ValueError, or its own NotFoundError in later
+            # versions, for a missing collection.
+            collection = None
+        if collection is None:
+            collection = self.client.create_collection(name=name, metadata=metadata)
             self.logger.info("Created collection `%s`!", name)
-            return collection
+        else:
+            different = {
+                key: value
+                for key, value in metadata.items()
+                if (collection.metadata or {}).get(key) != value
+            }
+            if different:
+                self.logger.warning(
+                    "Collection `%s` was created with different HNSW parameters "
+                    "than %s, re-create it to apply them.",
+                    name,
+                    different,
+                )
+        self.logger.info(
+            "Opened collection `%s` with %s entries!", name, collection.count()
+        )
+        return collection
+
+    def add_chunks(self, chunks: list[Document]) -> list[str]:
+        """Adds documents to database and returns their ids.
 
-    def add_chunks(self, chunks: list[Document]) -> None:
-        """Adds documents to database."""
+        The ids are derived from the chunks with `get_chunk_id()`, so adding the same
+        chunks again overwrites their vectors instead of duplicating them. The
+        texts go to the chunk store, where chunks already stored by another
+        collection are skipped. The embeddings are handed to the collection as
+        slices of one float32 matrix, in batches of the maximum size the client
+        accepts.
+        """
         n = len(chunks)
         self.logger.info("Adding %s chunks ...", n)
 
-        self.collection.add(
-            embeddings=[chunk.embedding for chunk in chunks],
-            documents=[chunk.page_content for chunk in chunks],
-            ids=[str(uuid.uuid4()) for i in range(n)],
+        with instrumentation.span(InstrumentationConstants.STAGE_DATABASE_ADD) as span:
+            ids = [get_chunk_id(chunk) for chunk in chunks]
+            # Identical chunks of a page share an id and are added once.
+            positions = {}
+            for ind, chunk_id in enumerate(ids):
+                positions.setdefault(chunk_id, ind)
+            first = list(positions.values())
+            unique_ids = list(positions)
+            self.chunk_store.add(
+                unique_ids, [chunks[ind].page_content for ind in first]
+            )
+
+            embeddings = embeddings_to_matrix([chunk.embedding for chunk in chunks])
+            if len(first) < n:
+                embeddings = embeddings[first]
+            batch_size = self.client.get_max_batch_size()
+            for start in range(0, len(unique_ids), batch_size):
+                end = min(start + batch_size, len(unique_ids))
+                self.collection.upsert(
+                    embeddings=embeddings[start:end],
+                    ids=unique_ids[start:end],
+                )
+            span.add(InstrumentationConstants.COUNTER_CHUNKS, n)
+        return ids
+
+    def get_documents(self, ids: list[str]) -> list[str]:
+        """Returns the texts of chunks in the given order.
+
+        Texts missing from the chunk store, as in collections ingested before it
+        existed, are read from the collection itself.
+        """
+        documents = self.chunk_store.get(ids)
+        missing = list(
+            dict.fromkeys(
+                chunk_id
+                for chunk_id, document in zip(ids, documents)
+                if document is None
+            )
         )
+        if missing:
+            response_obj = self.collection.get(
+                ids=missing, include=[DatabaseConstants.KEY_DATABASE_DOCUMENTS]
+            )
+            stored = dict(
+                zip(
+                    response_obj[DatabaseConstants.KEY_DATABASE_IDS],
+                    response_obj[DatabaseConstants.KEY_DATABASE_DOCUMENTS],
+                )
+            )
+            documents = [
+                document if document is not None else stored.get(chunk_id)
+                for chunk_id, document in zip(ids, documents)
+            ]
+            if any(document is None for document in documents):
+                raise KeyError(
+                    f"No text stored for chunks of collection `{self.collection_name}`."
+                )
+        return documents
+
+    def _get_documents_per_query(self, ids: list[list[str]]) -> list[list[str]]:
+        """Looks up the texts of the results of several queries at once."""
+        documents = self.get_documents([chunk_id for row in ids for chunk_id in row])
+        rows = []
+        start = 0
+        for row in ids:
+            rows.append(documents[start : start + len(row)])
+            start += len(row)
+        return rows
 
-    def query(self, query_embeddings: list[list[float]]) -> list[Optional[list[str]]]:
+    def query(self, query_embeddings: np.ndarray) -> list[Optional[list[str]]]:
         """Queries the database.
 
-        Takes in a list of embeddings, typically one embedding per query to run
-        those in a batch.
+        Takes in a float32 matrix of embeddings, typically one row per query to
+        run those in a batch.
 
         Returns a list of list of string, where each string is a relevent context.
         The outer list corresponds to the queries.
 
         """
-        response_obj = self.collection.query(
-            query_embeddings=query_embeddings,
-            n_results=self.n_results,
-        )
-
-        docs = response_obj.get(DatabaseConstants.KEY_DATABASE_DOCUMENTS, [])
+        with instrumentation.span(InstrumentationConstants.STAGE_RETRIEVAL) as span:
+            span.add(InstrumentationConstants.COUNTER_QUERIES, len(query_embeddings))
+            response_obj = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=self.n_results,
+                include=[DatabaseConstants.KEY_DATABASE_DISTANCES],
+            )
+            docs = self._get_documents_per_query(
+                response_obj[DatabaseConstants.KEY_DATABASE_IDS]
+            )
         assert len(docs) == len(query_embeddings)
 
         return docs
+
+    def query_candidates(
+        self, query_embeddings: np.ndarray, n_results: int
+    ) -> list[Candidates]:
+        """Queries the database for `n_results` candidates per query.
+
+        Unlike `query()`, the ids, stored embeddings and distances of the
+        candidates are returned as well, so they can be reranked or deduplicated
+        without another round trip.
+        """
+        with instrumentation.span(InstrumentationConstants.STAGE_RETRIEVAL) as span:
+            span.add(InstrumentationConstants.COUNTER_QUERIES, len(query_embeddings))
+            response_obj = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                include=[
+                    DatabaseConstants.KEY_DATABASE_EMBEDDINGS,
+                    DatabaseConstants.KEY_DATABASE_DISTANCES,
+                ],
+            )
+            documents = self._get_documents_per_query(
+                response_obj[DatabaseConstants.KEY_DATABASE_IDS]
+            )
+
+        candidates = [
+            Candidates(
+                ids=ids,
+                documents=documents,
+                embeddings=np.asarray(embeddings, dtype=np.float32),
+                distances=distances,
+            )
+            for ids, documents, embeddings, distances in zip(
+                response_obj[DatabaseConstants.KEY_DATABASE_IDS],
+                documents,
+                response_obj[DatabaseConstants.KEY_DATABASE_EMBEDDINGS],
+                response_obj[DatabaseConstants.KEY_DATABASE_DISTANCES],
+            )
+        ]
+        assert len(candidates) == len(query_embeddings)
+
+        return candidates
+
+    def get_all_embeddings(self) -> np.ndarray:
+        """Returns the embeddings of all chunks as a float32 matrix."""
+        batch_size = self.client.get_max_batch_size()
+        batches = []
+        for offset in range(0, self.collection.count(), batch_size):
+            response_obj = self.collection.get(
+                include=[DatabaseConstants.KEY_DATABASE_EMBEDDINGS],
+                limit=batch_size,
+                offset=offset,
+            )
+            batches.append(
+                np.asarray(
+                    response_obj[DatabaseConstants.KEY_DATABASE_EMBEDDINGS],
+                    dtype=np.float32,
+                )
+            )
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(batches)
+
+    def get_embeddings_by_text(self, texts: list[str]) -> dict[str, np.ndarray]:
+        """Returns the stored embeddings of the chunks of this collection with the
+        given texts, so texts embedded at ingestion need not be embedded again.
+
+        Texts without a chunk in the collection are left out.
+        """
+        ids_by_text = self.chunk_store.find(texts)
+        ids = [chunk_id for chunk_ids in ids_by_text.values() for chunk_id in chunk_ids]
+        embeddings = {}
+        batch_size = self.client.get_max_batch_size()
+        for start in range(0, len(ids), batch_size):
+            response_obj = self.collection.get(
+                ids=ids[start : start + batch_size],
+                include=[DatabaseConstants.KEY_DATABASE_EMBEDDINGS],
+            )
+            embeddings.update(
+                zip(
+                    response_obj[DatabaseConstants.KEY_DATABASE_IDS],
+                    np.asarray(
+                        response_obj[DatabaseConstants.KEY_DATABASE_EMBEDDINGS],
+                        dtype=np.float32,
+                    ),
+                )
+            )
+        # Chunks with the same text have the same embedding, any one will do.
+        return {
+            text: embeddings[chunk_id]
+            for text, chunk_ids in ids_by_text.items()
+            for chunk_id in chunk_ids
+            if chunk_id in embeddings
+        }
+
+    def get_candidates(self, ids: list[str]) -> Candidates:
+        """Gets chunks by id, with their stored embeddings, in the given order.
+
+        Ids missing from the collection are left out, e.g. chunks still listed by
+        a lexical index after the collection was re-created. The distances are
+        not known without a query and are set to zero.
+        """
+        response_obj = self.collection.get(
+            ids=ids,
+            include=[DatabaseConstants.KEY_DATABASE_EMBEDDINGS],
+        )
+        # The collection does not return the chunks in the requested order.
+        positions = {
+            chunk_id: ind
+            for ind, chunk_id in enumerate(
+                response_obj[DatabaseConstants.KEY_DATABASE_IDS]
+            )
+        }
+        found = [chunk_id for chunk_id in ids if chunk_id in positions]
+        if len(found) < len(ids):
+            self.logger.warning(
+                "%s of %s chunks are missing from collection `%s`.",
+                len(ids) - len(found),
+                len(ids),
+                self.collection_name,
+            )
+        embeddings = np.asarray(
+            response_obj[DatabaseConstants.KEY_DATABASE_EMBEDDINGS], dtype=np.float32
+        )
+        return Candidates(
+            ids=found,
+            documents=self.get_documents(found),
+            embeddings=embeddings[[positions[chunk_id] for chunk_id in found]],
+            distances=[0.0] * len(found),
+        )
+
+
+def embeddings_to_matrix(embeddings: list[np.ndarray]) -> np.ndarray:
+    """Returns a list of embedding vectors as a single float32 matrix.
+
+    If the vectors are consecutive row views of one matrix, as handed out by the
+    embedders, a view of that matrix is returned without copying. Otherwise the
+    vectors are stacked into a new matrix.
+    """
+    if not embeddings:
+        return np.empty((0, 0), dtype=np.float32)
+
+    first = embeddings[0]
+    if (
+        isinstance(first, np.ndarray)
+        and first.dtype == np.float32
+        and first.ndim == 1
+        and first.base is not None
+        and first.flags.c_contiguous
+    ):
+        row_stride = first.nbytes
+        address = first.ctypes.data
+        for ind, embedding in enumerate(embeddings):
+            if (
+                not isinstance(embedding, np.ndarray)
+                or embedding.base is not first.base
+                or embedding.shape != first.shape
+                or embedding.ctypes.data != address + ind * row_stride
+            ):
+                break
+        else:
+            return np.lib.stride_tricks.as_strided(
+                first,
+                shape=(len(embeddings), len(first)),
+                strides=(row_stride, first.itemsize),
+                writeable=False,
+            )
+
+    return np.vstack(embeddings).astype(np.float32, copy=False)
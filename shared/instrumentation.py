@@ -0,0 +1,244 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import math
+import threading
+import time
+from typing import Iterator, Optional
+
+from shared.constants import InstrumentationConstants
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Calculates the q-th percentile of a list of values.
+
+    Uses linear interpolation between the closest ranks.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def tokens_per_second(
+    timings: dict[str, float], counters: dict[str, int]
+) -> Optional[float]:
+    """Returns the decoding rate of a streamed generation: the completion tokens
+    after the first token per second after the first token.
+
+    Returns `None` if the generation was not streamed or produced a single token.
+    """
+    ttft = timings.get(InstrumentationConstants.STAGE_TTFT)
+    completion_tokens = counters.get(
+        InstrumentationConstants.COUNTER_COMPLETION_TOKENS, 0
+    )
+    if ttft is None or completion_tokens < 2:
+        return None
+    decoding_time = timings.get(InstrumentationConstants.STAGE_GENERATION, 0.0) - ttft
+    if decoding_time <= 0:
+        return None
+    return (completion_tokens - 1) / decoding_time
+
+
+def summarize_durations(durations: dict[str, list[float]]) -> dict[str, dict]:
+    """Summarizes durations per stage with count, total, mean and percentiles."""
+    return {
+        name: {
+            "count": len(values),
+            "total": sum(values),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+        for name, values in durations.items()
+        if values
+    }
+
+
+def format_summary(summary: dict[str, dict]) -> str:
+    """Formats a summary of durations as a table in milliseconds."""
+    lines = [f"{'stage':<16}{'count':>8}{'total':>12}{'p50':>10}{'p95':>10}{'p99':>10}"]
+    for name, statistics in summary.items():
+        lines.append(
+            f"{name:<16}{statistics['count']:>8}"
+            f"{statistics['total'] * 1000:>12.1f}"
+            f"{statistics['p50'] * 1000:>10.1f}"
+            f"{statistics['p95'] * 1000:>10.1f}"
+            f"{statistics['p99'] * 1000:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+class Span:
+    """A timed stage with counters and nested child spans.
+
+    Attributes:
+        name:     The name of the stage.
+        duration: The wall-clock duration in seconds, set when the span ends.
+        counters: Counters recorded in this span, e.g. the number of tokens.
+        children: Spans that were started while this span was active.
+    """
+
+    __slots__ = ("name", "duration", "counters", "children")
+
+    def __init__(self, name: str, counters: Optional[dict[str, int]] = None):
+        self.name = name
+        self.duration = 0.0
+        self.counters: dict[str, int] = dict(counters or {})
+        self.children: list["Span"] = []
+
+    def add(self, counter: str, value: int = 1) -> None:
+        """Increments a counter of this span."""
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def iter_spans(self) -> Iterator["Span"]:
+        """Yields this span and all of its descendants."""
+        yield self
+        for child in self.children:
+            yield from child.iter_spans()
+
+    def durations(self) -> dict[str, float]:
+        """Returns the total duration per stage in this span's tree."""
+        durations = defaultdict(float)
+        for span in self.iter_spans():
+            durations[span.name] += span.duration
+        return dict(durations)
+
+    def totals(self) -> dict[str, int]:
+        """Returns the counters summed over this span's tree."""
+        totals = defaultdict(int)
+        for span in self.iter_spans():
+            for counter, value in span.counters.items():
+                totals[counter] += value
+        return dict(totals)
+
+    def summary(self) -> dict[str, dict]:
+        """Summarizes the durations per stage in this span's tree."""
+        durations = defaultdict(list)
+        for span in self.iter_spans():
+            durations[span.name].append(span.duration)
+        return summarize_durations(durations)
+
+    def split(self, weights: list[int]) -> list["Span"]:
+        """Returns one copy of this span's tree per weight, with the same
+        durations and the counters divided in proportion to the weights.
+
+        The shares of each counter add up to its value, so the copies can be
+        nested under the spans of the requests a batch served without counting
+        e.g. its tokens more than once.
+        """
+        total = sum(weights)
+        copies = [Span(self.name) for _ in weights]
+        for copy in copies:
+            copy.duration = self.duration
+        for counter, value in self.counters.items():
+            shares = [value * weight // total if total else 0 for weight in weights]
+            # Hand the remainder out one by one, starting with the first copy.
+            for ind in range(value - sum(shares)):
+                shares[ind % len(shares)] += 1
+            for copy, share in zip(copies, shares):
+                if share:
+                    copy.counters[counter] = share
+        for child in self.children:
+            for copy, child_copy in zip(copies, child.split(weights)):
+                copy.children.append(child_copy)
+        return copies
+
+
+class Instrumentation:
+    """Records the durations and counters of pipeline stages.
+
+    Spans started while another span is active on the same thread are nested
+    under it, so a pipeline can read per-query timings from a query span while
+    the components record their own stages. The durations and counters of all
+    finished spans are also aggregated process-wide.
+
+    Example usage:
+        ```
+        with instrumentation.span("embedding", texts=len(texts)) as span:
+            ...
+            span.add("tokens", num_tokens)
+        instrumentation.summary()
+        ```
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._durations: dict[str, list[float]] = defaultdict(list)
+        self._counters: dict[str, int] = defaultdict(int)
+
+    def _stack(self) -> list[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **counters: int) -> Iterator[Span]:
+        """Times the enclosed block as a stage called `name`."""
+        stack = self._stack()
+        span = Span(name, counters)
+        if stack:
+            stack[-1].children.append(span)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self._durations[name].append(span.duration)
+                for counter, value in span.counters.items():
+                    self._counters[counter] += value
+
+    def record(self, name: str, duration: float) -> None:
+        """Records a duration that was measured outside of a span, such as the
+        time a request waited in a queue, as a finished stage.
+
+        The stage is nested under the innermost active span, if there is one.
+        """
+        span = Span(name)
+        span.duration = duration
+        stack = self._stack()
+        if stack:
+            stack[-1].children.append(span)
+        with self._lock:
+            self._durations[name].append(duration)
+
+    def attach(self, span: Span) -> None:
+        """Nests a span that finished on another thread, such as the share of
+        a request in a batch, under the innermost active span, if there is one.
+
+        The span was already aggregated process-wide when it finished.
+        """
+        stack = self._stack()
+        if stack:
+            stack[-1].children.append(span)
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Increments a counter of the innermost active span, if there is one."""
+        stack = self._stack()
+        if stack:
+            stack[-1].add(counter, value)
+
+    def summary(self) -> dict[str, dict]:
+        """Summarizes the durations per stage of all finished spans."""
+        with self._lock:
+            return summarize_durations(self._durations)
+
+    def totals(self) -> dict[str, int]:
+        """Returns the counters summed over all finished spans."""
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+from shared.constants import LexicalConstants
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits a text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def lexical_index_path(db_path: str, collection_name: str) -> str:
+    """Returns the directory of the lexical index of a collection."""
+    return os.path.join(db_path, LexicalConstants.DIRECTORY, collection_name)
+
+
+class LexicalIndex:
+    """A BM25 inverted index over chunk texts.
+
+    The term counts are held as a sparse chunk-term matrix, from which the BM25
+    weights of all chunks are precomputed, so scoring a whole set of queries is
+    a single sparse matrix product.
+
+    Example usage:
+        ```
+        index = LexicalIndex()
+        index.add(ids, texts)
+        index.save(lexical_index_path(db_path, collection_name))
+        ids, scores = index.search(queries, n_results=20)
+        ```
+
+    Attributes:
+        ids:        The chunk ids, one per row of the matrix.
+        vocabulary: The column of each term.
+        k1:         The BM25 term frequency saturation.
+        b:          The BM25 length normalization.
+    """
+
+    def __init__(
+        self,
+        k1: float = LexicalConstants.DEFAULT_K1,
+        b: float = LexicalConstants.DEFAULT_B,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.k1 = k1
+        self.b = b
+        self.ids: list[str] = []
+        self.vocabulary: dict[str, int] = {}
+        self.term_counts = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._weights: Optional[sparse.csr_matrix] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: list[str], texts: list[str]) -> None:
+        """Adds chunks to the index."""
+        rows = []
+        columns = []
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                rows.append(row)
+                columns.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+        # Duplicate entries are summed into term counts.
+        term_counts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(texts), len(self.vocabulary)),
+        )
+        previous = self.term_counts
+        previous.resize((previous.shape[0], len(self.vocabulary)))
+        self.term_counts = sparse.vstack([previous, term_counts], format="csr")
+        self.ids.extend(ids)
+        self._weights = None
+
+    @property
+    def weights(self) -> sparse.csr_matrix:
+        """The BM25 weight of each term in each chunk."""
+        if self._weights is None:
+            self._weights = self._compute_weights()
+        return self._weights
+
+    def _compute_weights(self) -> sparse.csr_matrix:
+        term_counts = self.term_counts.tocsr()
+        num_chunks = term_counts.shape[0]
+        lengths = np.asarray(term_counts.sum(axis=1)).ravel()
+        average_length = lengths.mean() if num_chunks else 0.0
+        document_frequencies = np.bincount(
+            term_counts.indices, minlength=term_counts.shape[1]
+        )
+        idf = np.log(
+            1 + (num_chunks - document_frequencies + 0.5) / (document_frequencies + 0.5)
+        ).astype(np.float32)
+
+        # Length normalization of each stored entry, by the row it belongs to.
+        norms = self.k1 * (
+            1 - self.b + self.b * lengths / max(average_length, np.finfo(float).tiny)
+        )
+        entry_norms = np.repeat(norms, np.diff(term_counts.indptr))
+        tf = term_counts.data
+        data = idf[term_counts.indices] * tf * (self.k1 + 1) / (tf + entry_norms)
+        return sparse.csr_matrix(
+            (data.astype(np.float32), term_counts.indices, term_counts.indptr),
+            shape=term_counts.shape,
+        )
+
+    def query_matrix(self, queries: list[str]) -> sparse.csr_matrix:
+        """Returns the binary query-term matrix of the known terms of queries."""
+        rows = []
+        columns = []
+        for row, query in enumerate(queries):
+            for token in set(tokenize(query)):
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(queries), len(self.vocabulary)),
+        )
+
+    def scores(self, queries: list[str]) -> np.ndarray:
+        """Returns the BM25 scores of all chunks for each query.
+
+        Returns:
+            A float32 array of shape `(len(queries), len(self))`.
+        """
+        return (self.query_matrix(queries) @ self.weights.T).toarray()
+
+    def search(
+        self, queries: list[str], n_results: int
+    ) -> tuple[list[list[str]], list[list[float]]]:
+        """Returns the ids and scores of the best matching chunks of each query.
+
+        Chunks without any query term are not returned.
+        """
+        scores = self.scores(queries)
+        n_results = min(n_results, len(self))
+        if n_results == 0:
+            return [[] for _ in queries], [[] for _ in queries]
+
+        top = np.argpartition(-scores, n_results - 1, axis=1)[:, :n_results]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        ids = []
+        result_scores = []
+        for row_top, row_scores in zip(top, top_scores):
+            matches = row_scores > 0
+            ids.append([self.ids[ind] for ind in row_top[matches]])
+            result_scores.append(row_scores[matches].tolist())
+        return ids, result_scores
+
+    def save(self, path: str) -> None:
+        """Saves the index to a directory."""
+        os.makedirs(path, exist_ok=True)
+        sparse.save_npz(
+            os.path.join(path, LexicalConstants.FILE_TERM_COUNTS), self.term_counts
+        )
+        with open(
+            os.path.join(path, LexicalConstants.FILE_VOCABULARY), "w", encoding="utf-8"
+        ) as file:
+            json.dump(
+                {
+                    LexicalConstants.KEY_IDS: self.ids,
+                    LexicalConstants.KEY_TERMS: list(self.vocabulary),
+                },
+                file,
+            )
+        self.logger.info("Saved lexical index with %s chunks to %s", len(self), path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LexicalIndex":
+        """Loads an index saved with `save()`."""
+        index = cls(**kwargs)
+        index.term_counts = sparse.load_npz(
+            os.path.join(path, LexicalConstants.FILE_TERM_COUNTS)
+        ).tocsr()
+        with open(
+            os.path.join(path, LexicalConstants.FILE_VOCABULARY), "r", encoding="utf-8"
+        ) as file:
+            data = json.load(file)
+        index.ids = data[LexicalConstants.KEY_IDS]
+        index.vocabulary = {
+            term: column for column, term in enumerate(data[LexicalConstants.KEY_TERMS])
+        }
+        return index
+
+    @classmethod
+    def load_or_create(cls, path: str, **kwargs) -> "LexicalIndex":
+        """Loads an index, or creates an empty one if it does not exist."""
+        if os.path.exists(os.path.join(path, LexicalConstants.FILE_VOCABULARY)):
+            return cls.load(path, **kwargs)
+        return cls(**kwargs)
@@ -1,19 +1,66 @@
 import logging
+import pypdf
 from pypdf import PdfReader
 import re
+import sys
+from typing import Optional
 
-from shared.models import Document
-from shared.constants import ModelConstants
+from shared.constants import InstrumentationConstants, LoaderConstants
+from shared.instrumentation import instrumentation, Span
+from shared.models import Document, Source
+from shared.page_cache import PageCache
 
 filename_pattern = re.compile(r"([^/]+)(?=\.[^.]+$)")
 
 
 class Loader:
-    """Loads and chunks documents from file."""
+    """Loads and chunks documents from file.
 
-    def __init__(self, paths: list[str]):
+    With a `cache_directory`, the extracted page texts are cached by the content
+    of each PDF, so loading unchanged files again skips parsing them.
+    """
+
+    def __init__(
+        self,
+        paths: list[str],
+        cache_directory: Optional[str] = None,
+        extraction_mode: str = LoaderConstants.DEFAULT_EXTRACTION_MODE,
+    ):
         self.paths = paths
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.extraction_mode = extraction_mode
+        self.page_cache: Optional[PageCache] = (
+            PageCache(
+                cache_directory,
+                pypdf.__version__,
+                {"extraction_mode": extraction_mode},
+            )
+            if cache_directory
+            else None
+        )
+
+    def _extract_pages(self, path: str) -> list[str]:
+        """Extracts the text of each page of a PDF file."""
+        with open(path, "rb") as file:
+            reader = PdfReader(file)
+            return [
+                page.extract_text(extraction_mode=self.extraction_mode)
+                for page in reader.pages
+            ]
+
+    def _load_pages(self, path: str, span: Span) -> list[str]:
+        """Returns the page texts of a PDF file from the cache, or extracts and
+        caches them."""
+        if self.page_cache is None:
+            return self._extract_pages(path)
+        key = self.page_cache.key(path)
+        pages = self.page_cache.get(path, key)
+        if pages is None:
+            pages = self._extract_pages(path)
+            self.page_cache.put(path, pages, key)
+        else:
+            span.add(InstrumentationConstants.COUNTER_CACHED_PAGES, len(pages))
+        return pages
 
     def load_pdf(self) -> list[Document]:
         """Loads a list of PDF files into a list of `Document` objects.
@@ -28,29 +75,26 @@ class Loader:
         )
         documents = []
 
-        for path in self.paths:
-            try:
-                title = self._extract_filename(path)
-                with open(path, "rb") as file:
-                    reader = PdfReader(file)
-                    for page_num in range(len(reader.pages)):
-                        page = reader.pages[page_num]
-                        content = page.extract_text()
+        with instrumentation.span(InstrumentationConstants.STAGE_LOAD) as span:
+            for path in self.paths:
+                try:
+                    source = Source(
+                        title=sys.intern(self._extract_filename(path)),
+                        source=sys.intern(path),
+                    )
+                    for page_num, content in enumerate(self._load_pages(path, span)):
                         documents.append(
                             Document(
                                 page_content=content,
-                                title=title,
-                                metadata={
-                                    ModelConstants.KEY_PAGE: page_num + 1,
-                                    ModelConstants.KEY_SOURCE: path,
-                                    ModelConstants.KEY_TITLE: title,
-                                },
+                                source=source,
+                                page=page_num + 1,
                             )
                         )
-            except ValueError:
-                self.logger.warning("Failed to load file.")
+                except ValueError:
+                    self.logger.warning("Failed to load file.")
 
-            self.logger.info("Loaded PDF from %s!", path)
+                self.logger.info("Loaded PDF from %s!", path)
+            span.add(InstrumentationConstants.COUNTER_PAGES, len(documents))
         return documents
 
     @staticmethod
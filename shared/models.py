@@ -1,35 +1,176 @@
 from dataclasses import dataclass
 from datetime import time
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
+from shared.constants import (
+    DatabaseConstants,
+    InstrumentationConstants,
+    ModelConstants,
+)
+from shared.prompt import create_prompt
 
-@dataclass
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(slots=True)
 class Metadata:
     title: str
     page: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class Source:
+    """Metadata shared by all pages and chunks of one file.
+
+    A single instance is created per file, so chunks only hold a reference to it.
+    """
+
+    title: str
+    source: str
+
+
+@dataclass(slots=True)
 class Document:
     page_content: str
-    title: str
-    metadata: dict
-    embedding: Optional[list[float]] = None
+    source: Source
+    page: int
+    embedding: Optional["np.ndarray"] = None  # Row view into a float32 matrix.
+
+    @property
+    def title(self) -> str:
+        return self.source.title
+
+    @property
+    def metadata(self) -> dict:
+        """The metadata as a dict, created on access."""
+        return {
+            ModelConstants.KEY_PAGE: self.page,
+            ModelConstants.KEY_SOURCE: self.source.source,
+            ModelConstants.KEY_TITLE: self.source.title,
+        }
+
+
+@dataclass(slots=True)
+class Candidates:
+    """The candidate contexts retrieved for a single query, in rank order.
+
+    `embeddings` holds the stored embeddings of the candidates as a float32
+    matrix with one row per candidate, and `distances` their cosine distances to
+    the query.
+    """
+
+    ids: list[str]
+    documents: list[str]
+    embeddings: Optional["np.ndarray"]
+    distances: list[float]
 
+    def select(self, indices: list[int]) -> "Candidates":
+        """Returns the candidates at the given indices, in that order."""
+        return Candidates(
+            ids=[self.ids[ind] for ind in indices],
+            documents=[self.documents[ind] for ind in indices],
+            embeddings=(
+                self.embeddings[indices] if self.embeddings is not None else None
+            ),
+            distances=[self.distances[ind] for ind in indices],
+        )
 
-@dataclass
+
+@dataclass(slots=True)
 class QueryResult:
+    """The result of a single query.
+
+    The prompt is not stored but rendered from the shared template on access,
+    with the `prompt_contexts` packed into the token budget of the LLM if
+    contexts were packed, otherwise with all retrieved `contexts`.
+    `timings` holds the duration in seconds per stage of this query and
+    `counters` the counters recorded in those stages, e.g. `tokens`, and
+    `cost` the cost of its generation in USD. Streamed generations also record
+    the time to the first token as the `ttft` stage and the decoding rate as
+    `tokens_per_second`.
+    """
+
     query: str
     contexts: list[str]
-    prompt: str
+    template: str
     response: str
     evaluations: Optional[dict] = None
+    timings: Optional[dict[str, float]] = None
+    counters: Optional[dict[str, int]] = None
+    cost: Optional[float] = None
+    prompt_contexts: Optional[list[str]] = None
+    tokens_per_second: Optional[float] = None
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """The time to the first token of a streamed generation in seconds."""
+        return (self.timings or {}).get(InstrumentationConstants.STAGE_TTFT)
 
+    @property
+    def prompt(self) -> str:
+        contexts = (
+            self.prompt_contexts if self.prompt_contexts is not None else self.contexts
+        )
+        return create_prompt(self.template, self.query, contexts)
 
-@dataclass
+
+@dataclass(slots=True)
 class ExperimentResults:
+    """The results of running all queries against a pipeline.
+
+    `timings` summarizes the durations per stage with count, total, mean and
+    p50/p95/p99 percentiles in seconds. `counters` holds the totals of the
+    counters recorded during the run and `cost` the cost of the run in USD,
+    including the query embeddings. `evaluators` maps the name of each
+    evaluator that evaluated the results to its `fingerprint` and the names of
+    the `metrics` it added, so unchanged evaluators can be skipped when the
+    results are evaluated again.
+    """
+
     results: list[QueryResult]
     model: str
     parameters: dict[str, any]
     timestamp_end: Optional[time]
     evaluations: Optional[dict] = None
+    timings: Optional[dict[str, dict]] = None
+    counters: Optional[dict[str, int]] = None
+    cost: Optional[float] = None
+    evaluators: Optional[dict[str, dict]] = None
+
+
+@dataclass(slots=True)
+class Evaluations:
+    """The evaluations of a run by one evaluator.
+
+    `queries` holds the metrics of each query, in the order of the results, and
+    `aggregate` the metrics of the whole run. The name and fingerprint of the
+    evaluator are set by the `EvaluatorRunner`.
+    """
+
+    queries: list[dict[str, Optional[float]]]
+    aggregate: dict[str, Optional[float]]
+    evaluator: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+
+@dataclass(slots=True)
+class CalibrationResult:
+    """The recall and latency of one HNSW setting."""
+
+    M: int
+    construction_ef: int
+    search_ef: int
+    recall: float
+    latency_p50: float
+    latency_p95: float
+    build_time: float
+
+    @property
+    def parameters(self) -> dict[str, int]:
+        """The setting as `hnsw` config values."""
+        return {
+            DatabaseConstants.HNSW_M: self.M,
+            DatabaseConstants.HNSW_CONSTRUCTION_EF: self.construction_ef,
+            DatabaseConstants.HNSW_SEARCH_EF: self.search_ef,
+        }
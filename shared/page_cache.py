@@ -0,0 +1,135 @@
+from array import array
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Optional
+import zlib
+
+from shared.cache import json_hash
+from shared.constants import LoaderConstants
+
+# A file starts with the magic bytes and the number of pages, followed by the
+# offsets of the compressed pages relative to the end of the offset table.
+HEADER = struct.Struct("<4sI")
+MAGIC = b"PGC1"
+
+
+def file_hash(path: str) -> str:
+    """Returns a hash of the content of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while chunk := file.read(LoaderConstants.HASH_BLOCK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_pages(path: str, pages: list[str]) -> None:
+    """Writes page texts to a page file, each page compressed on its own.
+
+    The file is written to a uniquely named file next to its final path and
+    moved into place, so a concurrent reader never sees a partial file and
+    concurrent writers of the same key do not write into the same file.
+    """
+    compressed = [zlib.compress(page.encode()) for page in pages]
+    offsets = array("Q", [0])
+    for data in compressed:
+        offsets.append(offsets[-1] + len(data))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path) or ".",
+        prefix=os.path.basename(path),
+        suffix=".tmp",
+        delete=False,
+    ) as file:
+        try:
+            file.write(HEADER.pack(MAGIC, len(pages)))
+            file.write(offsets.tobytes())
+            for data in compressed:
+                file.write(data)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def read_pages(path: str) -> list[str]:
+    """Reads the page texts of a page file through a memory map."""
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, num_pages = HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                raise ValueError(f"Not a page file: {path}")
+            offsets = array("Q")
+            start = HEADER.size + offsets.itemsize * (num_pages + 1)
+            if len(mapped) < start:
+                raise ValueError(f"Truncated page file: {path}")
+            offsets.frombytes(mapped[HEADER.size : start])
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            if offsets[-1] != len(mapped) - start:
+                raise ValueError(f"Truncated page file: {path}")
+            with memoryview(mapped) as view:
+                pages = [
+                    zlib.decompress(
+                        view[start + offsets[ind] : start + offsets[ind + 1]]
+                    ).decode()
+                    for ind in range(num_pages)
+                ]
+    return pages
+
+
+class PageCache:
+    """Caches the extracted page texts of PDF files in a directory.
+
+    Entries are keyed by the content hash of the PDF, the pypdf version and the
+    extraction options, so a changed file, an upgraded parser or different
+    options extract the pages again, while a renamed or copied file does not.
+    Each entry is one file of zlib-compressed pages behind an offset table,
+    read through a memory map.
+
+    Example usage:
+        ```
+        cache = PageCache("data/page_cache", pypdf.__version__, {})
+        pages = cache.get(path)
+        if pages is None:
+            pages = extract_pages(path)
+            cache.put(path, pages)
+        ```
+    """
+
+    def __init__(self, directory: str, parser_version: str, options: dict):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = directory
+        self.parser_version = parser_version
+        self.options = options
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + LoaderConstants.PAGE_FILE_SUFFIX)
+
+    def key(self, path: str) -> str:
+        """Returns the cache key of a PDF file."""
+        return json_hash([file_hash(path), self.parser_version, self.options])
+
+    def get(self, path: str, key: Optional[str] = None) -> Optional[list[str]]:
+        """Returns the cached page texts of a PDF file, or `None` if there are
+        none or they cannot be read."""
+        cache_path = self._path(key or self.key(path))
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            return read_pages(cache_path)
+        except (ValueError, zlib.error, struct.error) as error:
+            self.logger.warning("Ignoring unreadable page file: %s", error)
+            return None
+
+    def put(self, path: str, pages: list[str], key: Optional[str] = None) -> None:
+        """Stores the page texts of a PDF file."""
+        write_pages(self._path(key or self.key(path)), pages)
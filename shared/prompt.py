@@ -0,0 +1,100 @@
+import logging
+
+from shared import AbstractTokenizer
+
+CONTEXT_SEPARATOR = "|"
+
+
+def create_prompt(template, query: str, contexts: list[str]) -> str:
+    """Constructs a prompt from a template, a query, and a list of contexts."""
+    contexts_strs = CONTEXT_SEPARATOR.join(contexts)
+    prompt = template.format(query=query, contexts=contexts_strs)
+    return prompt
+
+
+class ContextPacker:
+    """Packs retrieved contexts into the token budget of a prompt.
+
+    Contexts are taken in rank order. Exact duplicates are skipped, and the
+    first context that does not fit into the remaining budget is truncated, after
+    which packing stops. The token counts of contexts are cached, so packing
+    contexts that were seen before does not tokenize them again.
+
+    Example usage:
+        ```
+        packer = ContextPacker(tokenizer, max_tokens=4096)
+        contexts = packer.pack(template, query, contexts)
+        prompt = create_prompt(template, query, contexts)
+        ```
+    """
+
+    def __init__(
+        self,
+        tokenizer: AbstractTokenizer,
+        max_tokens: int,
+        min_truncated_tokens: int = 32,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.min_truncated_tokens = min_truncated_tokens
+        self.token_counts: dict[str, int] = {}
+
+    def count_tokens(self, text: str) -> int:
+        """Returns the number of tokens of a text, cached by text."""
+        count = self.token_counts.get(text)
+        if count is None:
+            count = len(self.tokenizer.tokenize_text(text))
+            self.token_counts[text] = count
+        return count
+
+    def _truncate(self, context: str, count: int, budget: int) -> str:
+        """Truncates a context to at most `budget` tokens.
+
+        The cut is estimated from the share of tokens that fit and shortened
+        until the truncated context fits.
+        """
+        length = len(context) * budget // count
+        while length > 0:
+            truncated = context[:length]
+            if len(self.tokenizer.tokenize_text(truncated)) <= budget:
+                return truncated
+            length = length * 9 // 10
+        return ""
+
+    def pack(self, template: str, query: str, contexts: list[str]) -> list[str]:
+        """Returns the contexts that fit into the token budget, in rank order."""
+        budget = self.max_tokens - self.count_tokens(
+            template.format(query=query, contexts="")
+        )
+        separator_tokens = self.count_tokens(CONTEXT_SEPARATOR)
+
+        packed = []
+        seen = set()
+        for context in contexts:
+            if context in seen:
+                continue
+            seen.add(context)
+
+            if packed:
+                budget -= separator_tokens
+            count = self.count_tokens(context)
+            if count <= budget:
+                packed.append(context)
+                budget -= count
+                continue
+
+            if budget >= self.min_truncated_tokens:
+                truncated = self._truncate(context, count, budget)
+                if truncated:
+                    packed.append(truncated)
+            break
+
+        if len(packed) < len(contexts):
+            self.logger.debug(
+                "Packed %s of %s contexts into %s tokens",
+                len(packed),
+                len(contexts),
+                self.max_tokens,
+            )
+        return packed
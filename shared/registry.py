@@ -0,0 +1,68 @@
+import importlib
+import logging
+import time
+from typing import Any
+
+from shared.constants import ConfigConstants
+
+# Import paths of the components of each pipeline, as `module:attribute`. The
+# modules are imported on first use, so a run only pays for the dependencies of
+# the pipelines it uses.
+PIPELINES = {
+    ConfigConstants.KEY_OPENAI: "openai_pipeline:OpenAIPipeline",
+    ConfigConstants.KEY_LOCAL: "local_pipeline:LocalPipeline",
+}
+EMBEDDERS = {
+    ConfigConstants.KEY_OPENAI: "openai_pipeline.embedding:OpenAIEmbeddings",
+    ConfigConstants.KEY_LOCAL: "local_pipeline.embedding:LocalEmbeddings",
+}
+LLMS = {
+    ConfigConstants.KEY_OPENAI: "openai_pipeline.llm:OpenAILLM",
+    ConfigConstants.KEY_LOCAL: "local_pipeline.llm:LLAMA3",
+}
+
+# Seconds spent importing each loaded path, for the startup report.
+import_times: dict[str, float] = {}
+
+
+def load_object(path: str) -> Any:
+    """Imports a `module:attribute` path and returns the attribute."""
+    module_name, _, attribute = path.partition(":")
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if path not in import_times:
+        import_times[path] = time.perf_counter() - start
+        logging.getLogger(__name__).info(
+            "Imported %s in %.0f ms", path, import_times[path] * 1000
+        )
+    return getattr(module, attribute)
+
+
+def _lookup(registry: dict[str, str], kind: str, name: str) -> Any:
+    if name not in registry:
+        raise ValueError(
+            f"Unknown {kind} `{name}`, expected one of {', '.join(registry)}."
+        )
+    return load_object(registry[name])
+
+
+def get_pipeline(name: str) -> type:
+    """Returns the pipeline class registered under a name."""
+    return _lookup(PIPELINES, "pipeline", name)
+
+
+def get_embedder(name: str) -> type:
+    """Returns the embedder class of the pipeline registered under a name."""
+    return _lookup(EMBEDDERS, "pipeline", name)
+
+
+def get_llm(name: str) -> type:
+    """Returns the LLM class of the pipeline registered under a name."""
+    return _lookup(LLMS, "pipeline", name)
+
+
+def format_import_times() -> str:
+    """Formats the import times of the loaded paths in milliseconds."""
+    return "\n".join(
+        f"{path}: {seconds * 1000:.0f}" for path, seconds in import_times.items()
+    )
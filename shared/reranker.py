@@ -0,0 +1,103 @@
+import hashlib
+import logging
+from typing import Any
+
+import numpy as np
+
+from shared.constants import (
+    ConfigConstants,
+    InstrumentationConstants,
+    ResourceConstants,
+    RetrievalConstants,
+)
+from shared.instrumentation import instrumentation
+from shared.resources import resources
+from shared.models import Candidates
+
+
+def hash_query(query: str) -> str:
+    """Returns a short, stable hash of a query for use in cache keys."""
+    return hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
+
+
+class CrossEncoderReranker:
+    """Reranks retrieved candidates with a sentence-transformers `CrossEncoder`.
+
+    The (query, chunk) pairs of all queries are scored in one `predict()` call,
+    sorted by length to minimise padding. Scores are cached by query hash and
+    chunk id, so pairs that were scored before, e.g. in an earlier experiment
+    on the same collection, are not scored again.
+
+    Example usage:
+        ```
+        reranker = CrossEncoderReranker(config["retrieval"]["rerank"])
+        orders = reranker.rerank(queries, candidates)
+        ```
+    """
+
+    def __init__(self, config_rerank: dict):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.model_name: str = config_rerank.get(
+            ConfigConstants.KEY_MODEL, RetrievalConstants.DEFAULT_RERANK_MODEL
+        )
+        self.batch_size: int = config_rerank.get(
+            ConfigConstants.KEY_BATCH_SIZE, RetrievalConstants.DEFAULT_RERANK_BATCH_SIZE
+        )
+        self.model = self._load_model()
+        self.scores: dict[tuple[str, str], float] = {}
+
+    def _load_model(self) -> Any:
+        """Loads the cross-encoder, shared by all rerankers of the process."""
+        from sentence_transformers import CrossEncoder
+
+        return resources.get(
+            ResourceConstants.KIND_CROSS_ENCODER,
+            self.model_name,
+            lambda: CrossEncoder(self.model_name),
+        )
+
+    def score(self, pairs: list[tuple[str, str]]) -> np.ndarray:
+        """Scores (query, text) pairs in batches, shortest pairs first."""
+        order = np.argsort([len(query) + len(text) for query, text in pairs])
+        scores = self.model.predict(
+            [pairs[ind] for ind in order],
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        unsorted = np.empty(len(pairs), dtype=np.float32)
+        unsorted[order] = scores
+        return unsorted
+
+    def rerank(
+        self, queries: list[str], candidates: list[Candidates]
+    ) -> list[list[int]]:
+        """Returns the indices of the candidates of each query by descending
+        cross-encoder score."""
+        query_hashes = [hash_query(query) for query in queries]
+
+        keys = []
+        pairs = []
+        for query, query_hash, query_candidates in zip(
+            queries, query_hashes, candidates
+        ):
+            for chunk_id, document in zip(
+                query_candidates.ids, query_candidates.documents
+            ):
+                key = (query_hash, chunk_id)
+                if key not in self.scores:
+                    keys.append(key)
+                    pairs.append((query, document))
+
+        with instrumentation.span(InstrumentationConstants.STAGE_RERANK) as span:
+            span.add(InstrumentationConstants.COUNTER_PAIRS, len(pairs))
+            if pairs:
+                self.scores.update(zip(keys, self.score(pairs).tolist()))
+
+        return [
+            sorted(
+                range(len(query_candidates.ids)),
+                key=lambda ind: -self.scores[(query_hash, query_candidates.ids[ind])],
+            )
+            for query_hash, query_candidates in zip(query_hashes, candidates)
+        ]
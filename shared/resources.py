@@ -0,0 +1,65 @@
+import logging
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+
+class Resources:
+    """A process-wide pool of expensive resources, such as API clients, loaded
+    models and tokenizers, shared by all pipelines of a process.
+
+    Resources are created by a factory on first request and reused for every
+    later request of the same kind and key, so a sweep that constructs many
+    pipelines loads each model and opens each connection pool once. Creation is
+    serialized per key, so concurrent requests for a resource that is still
+    loading wait for it instead of loading it twice.
+
+    Example usage:
+        ```
+        model = resources.get("sentence_transformer", model_name, load_model)
+        ```
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._resources: dict[tuple[str, Hashable], Any] = {}
+        self._locks: dict[tuple[str, Hashable], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Returns the resource of a kind and key, creating it with `factory` if
+        it does not exist yet."""
+        resource_key = (kind, key)
+        with self._lock:
+            if resource_key in self._resources:
+                self.hits += 1
+                return self._resources[resource_key]
+            key_lock = self._locks.setdefault(resource_key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if resource_key in self._resources:
+                    self.hits += 1
+                    return self._resources[resource_key]
+            resource = factory()
+            with self._lock:
+                self._resources[resource_key] = resource
+                self.misses += 1
+        self.logger.info("Created %s %s", kind, key)
+        return resource
+
+    def __contains__(self, resource_key: tuple[str, Hashable]) -> bool:
+        return resource_key in self._resources
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        """Drops all resources, or those of one kind, so they are created again on
+        the next request."""
+        with self._lock:
+            for resource_key in list(self._resources):
+                if kind is None or resource_key[0] == kind:
+                    del self._resources[resource_key]
+                    self._locks.pop(resource_key, None)
+
+
+resources = Resources()
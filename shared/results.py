@@ -0,0 +1,327 @@
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+from typing import IO, Iterable, Iterator, Optional
+
+from shared.constants import ResultsConstants
+from shared.models import ExperimentResults, QueryResult
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    """Opens a results file, transparently handling gzip compression."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _serialize(obj):
+    if isinstance(obj, datetime):
+        return obj.strftime(ResultsConstants.TIMESTAMP_FORMAT)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.strptime(value, ResultsConstants.TIMESTAMP_FORMAT)
+
+
+def experiment_record(
+    experiment_id: int, model: str, parameters: dict, template: Optional[str]
+) -> dict:
+    """Returns the header record of an experiment."""
+    return {
+        ResultsConstants.KEY_TYPE: ResultsConstants.RECORD_EXPERIMENT,
+        ResultsConstants.KEY_EXPERIMENT: experiment_id,
+        ResultsConstants.KEY_MODEL: model,
+        ResultsConstants.KEY_PARAMETERS: parameters,
+        ResultsConstants.KEY_TEMPLATE: template,
+    }
+
+
+def query_record(experiment_id: int, index: int, query_result: QueryResult) -> dict:
+    """Returns the record of a single query result, without the prompt."""
+    return {
+        ResultsConstants.KEY_TYPE: ResultsConstants.RECORD_QUERY,
+        ResultsConstants.KEY_EXPERIMENT: experiment_id,
+        ResultsConstants.KEY_INDEX: index,
+        ResultsConstants.KEY_QUERY: query_result.query,
+        ResultsConstants.KEY_CONTEXTS: query_result.contexts,
+        ResultsConstants.KEY_PROMPT_CONTEXTS: query_result.prompt_contexts,
+        ResultsConstants.KEY_RESPONSE: query_result.response,
+        ResultsConstants.KEY_EVALUATIONS: query_result.evaluations,
+        ResultsConstants.KEY_TIMINGS: query_result.timings,
+        ResultsConstants.KEY_COUNTERS: query_result.counters,
+        ResultsConstants.KEY_COST: query_result.cost,
+        ResultsConstants.KEY_TOKENS_PER_SECOND: query_result.tokens_per_second,
+    }
+
+
+def summary_record(
+    experiment_id: int,
+    timestamp_end: Optional[datetime],
+    evaluations: Optional[dict],
+    timings: Optional[dict] = None,
+    counters: Optional[dict] = None,
+    cost: Optional[float] = None,
+    evaluators: Optional[dict] = None,
+) -> dict:
+    """Returns the closing summary record of an experiment."""
+    return {
+        ResultsConstants.KEY_TYPE: ResultsConstants.RECORD_SUMMARY,
+        ResultsConstants.KEY_EXPERIMENT: experiment_id,
+        ResultsConstants.KEY_TIMESTAMP_END: timestamp_end,
+        ResultsConstants.KEY_EVALUATIONS: evaluations,
+        ResultsConstants.KEY_TIMINGS: timings,
+        ResultsConstants.KEY_COUNTERS: counters,
+        ResultsConstants.KEY_COST: cost,
+        ResultsConstants.KEY_EVALUATORS: evaluators,
+    }
+
+
+def experiment_records(
+    experiment_results: ExperimentResults, experiment_id: int = 0
+) -> Iterator[dict]:
+    """Yields the records of a complete `ExperimentResults` object."""
+    template = (
+        experiment_results.results[0].template if experiment_results.results else None
+    )
+    yield experiment_record(
+        experiment_id,
+        experiment_results.model,
+        experiment_results.parameters,
+        template,
+    )
+    for index, query_result in enumerate(experiment_results.results):
+        yield query_record(experiment_id, index, query_result)
+    yield summary_record(
+        experiment_id,
+        experiment_results.timestamp_end,
+        experiment_results.evaluations,
+        experiment_results.timings,
+        experiment_results.counters,
+        experiment_results.cost,
+        experiment_results.evaluators,
+    )
+
+
+def dump_record(record: dict) -> str:
+    """Serializes a record as a single JSON line, without the newline."""
+    return json.dumps(record, default=_serialize)
+
+
+class ResultsWriter:
+    """Streams experiment results to a JSON Lines file.
+
+    Every experiment is written as an `experiment` header record, followed by one
+    `query` record per `QueryResult` and a closing `summary` record with the
+    aggregate evaluations. Each experiment is flushed as soon as it is written,
+    so a crash only loses the experiments not written yet.
+
+    Example usage:
+        ```
+        with ResultsWriter("data/results", compress=True) as writer:
+            writer.write_experiment(results_with_evals)
+        ```
+
+    Attributes:
+        path: The path of the results file.
+    """
+
+    def __init__(self, base_path: str, compress: bool = False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        formatted_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.path = f"{base_path}/results_{formatted_time}.jsonl"
+        if compress:
+            self.path += ".gz"
+        self.file = _open(self.path, "w")
+        self.num_experiments = 0
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def _write(self, record: dict) -> None:
+        self.file.write(dump_record(record))
+        self.file.write("\n")
+        self.file.flush()
+
+    def write_experiment(self, experiment_results: ExperimentResults) -> None:
+        """Writes a complete `ExperimentResults` object."""
+        experiment_id = self.num_experiments
+        self.num_experiments += 1
+        for record in experiment_records(experiment_results, experiment_id):
+            self._write(record)
+        self.logger.info(
+            "Wrote %s query results to %s",
+            len(experiment_results.results),
+            self.path,
+        )
+
+
+def rewrite_results_file(path: str, experiments: list[ExperimentResults]) -> None:
+    """Replaces the experiments of a results file.
+
+    Files in the former JSON format are written in that format again. The file
+    is written next to the original and moved into place, so it is never left
+    half-written.
+    """
+    temporary_path = f"{path}.tmp"
+    if path.endswith(".gz"):
+        # Keep the extension, which selects the compression.
+        temporary_path = f"{path[:-3]}.tmp.gz"
+    with _open(temporary_path, "w") as file:
+        if path.endswith(".json"):
+            _dump_legacy_json(file, experiments)
+        else:
+            for experiment_id, experiment_results in enumerate(experiments):
+                for record in experiment_records(experiment_results, experiment_id):
+                    file.write(dump_record(record))
+                    file.write("\n")
+    os.replace(temporary_path, path)
+
+
+def _query_result_from_record(record: dict, template: Optional[str]) -> QueryResult:
+    return QueryResult(
+        query=record[ResultsConstants.KEY_QUERY],
+        contexts=record[ResultsConstants.KEY_CONTEXTS],
+        template=template,
+        response=record[ResultsConstants.KEY_RESPONSE],
+        evaluations=record[ResultsConstants.KEY_EVALUATIONS],
+        timings=record.get(ResultsConstants.KEY_TIMINGS),
+        counters=record.get(ResultsConstants.KEY_COUNTERS),
+        cost=record.get(ResultsConstants.KEY_COST),
+        prompt_contexts=record.get(ResultsConstants.KEY_PROMPT_CONTEXTS),
+        tokens_per_second=record.get(ResultsConstants.KEY_TOKENS_PER_SECOND),
+    )
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    """Lazily yields the records of a JSON Lines results file."""
+    with _open(path, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_query_results(path: str) -> Iterator[tuple[int, QueryResult]]:
+    """Lazily yields `(experiment_id, QueryResult)` pairs of a results file."""
+    templates: dict[int, Optional[str]] = {}
+    for record in iter_records(path):
+        record_type = record[ResultsConstants.KEY_TYPE]
+        experiment_id = record[ResultsConstants.KEY_EXPERIMENT]
+        if record_type == ResultsConstants.RECORD_EXPERIMENT:
+            templates[experiment_id] = record[ResultsConstants.KEY_TEMPLATE]
+        elif record_type == ResultsConstants.RECORD_QUERY:
+            yield experiment_id, _query_result_from_record(
+                record, templates.get(experiment_id)
+            )
+
+
+def load_experiment_results(path: str) -> list[ExperimentResults]:
+    """Loads all experiments of a results file.
+
+    Supports JSON Lines files written by `ResultsWriter`, optionally gzipped, as
+    well as the JSON files written by earlier versions.
+    """
+    if path.endswith(".json"):
+        return _load_legacy_json(path)
+    return experiments_from_records(iter_records(path))
+
+
+def experiments_from_records(records: Iterable[dict]) -> list[ExperimentResults]:
+    """Assembles `ExperimentResults` objects from experiment, query and summary
+    records."""
+    experiments: dict[int, ExperimentResults] = {}
+    templates: dict[int, Optional[str]] = {}
+    for record in records:
+        record_type = record[ResultsConstants.KEY_TYPE]
+        experiment_id = record[ResultsConstants.KEY_EXPERIMENT]
+        if record_type == ResultsConstants.RECORD_EXPERIMENT:
+            templates[experiment_id] = record[ResultsConstants.KEY_TEMPLATE]
+            experiments[experiment_id] = ExperimentResults(
+                results=[],
+                model=record[ResultsConstants.KEY_MODEL],
+                parameters=record[ResultsConstants.KEY_PARAMETERS],
+                timestamp_end=None,
+            )
+        elif record_type == ResultsConstants.RECORD_QUERY:
+            experiments[experiment_id].results.append(
+                _query_result_from_record(record, templates[experiment_id])
+            )
+        elif record_type == ResultsConstants.RECORD_SUMMARY:
+            experiment = experiments[experiment_id]
+            experiment.timestamp_end = _parse_timestamp(
+                record[ResultsConstants.KEY_TIMESTAMP_END]
+            )
+            experiment.evaluations = record[ResultsConstants.KEY_EVALUATIONS]
+            experiment.timings = record.get(ResultsConstants.KEY_TIMINGS)
+            experiment.counters = record.get(ResultsConstants.KEY_COUNTERS)
+            experiment.cost = record.get(ResultsConstants.KEY_COST)
+            experiment.evaluators = record.get(ResultsConstants.KEY_EVALUATORS)
+
+    return list(experiments.values())
+
+
+def _dump_legacy_json(file: IO[str], experiments: list[ExperimentResults]) -> None:
+    """Writes experiments in the former single JSON document format, with the
+    rendered prompt of each query and the fingerprints of the evaluators."""
+    data_list = [
+        {
+            ResultsConstants.KEY_RESULTS: [
+                {
+                    ResultsConstants.KEY_QUERY: query_result.query,
+                    ResultsConstants.KEY_CONTEXTS: query_result.contexts,
+                    ResultsConstants.KEY_PROMPT: query_result.prompt,
+                    ResultsConstants.KEY_RESPONSE: query_result.response,
+                    ResultsConstants.KEY_EVALUATIONS: query_result.evaluations,
+                }
+                for query_result in experiment_results.results
+            ],
+            ResultsConstants.KEY_MODEL: experiment_results.model,
+            ResultsConstants.KEY_PARAMETERS: experiment_results.parameters,
+            ResultsConstants.KEY_TIMESTAMP_END: experiment_results.timestamp_end,
+            ResultsConstants.KEY_EVALUATIONS: experiment_results.evaluations,
+            ResultsConstants.KEY_EVALUATORS: experiment_results.evaluators,
+        }
+        for experiment_results in experiments
+    ]
+    json.dump(data_list, file, indent=4, default=_serialize)
+
+
+def _load_legacy_json(path: str) -> list[ExperimentResults]:
+    """Loads a results file in the former single JSON document format."""
+    with open(path, "r", encoding="utf-8") as file:
+        data_list = json.load(file)
+
+    return [
+        ExperimentResults(
+            results=[
+                QueryResult(
+                    query=result[ResultsConstants.KEY_QUERY],
+                    contexts=result[ResultsConstants.KEY_CONTEXTS],
+                    # The rendered prompt is stored, so escape it into a template
+                    # that formats back to itself.
+                    template=result[ResultsConstants.KEY_PROMPT]
+                    .replace("{", "{{")
+                    .replace("}", "}}"),
+                    response=result[ResultsConstants.KEY_RESPONSE],
+                    evaluations=result[ResultsConstants.KEY_EVALUATIONS],
+                )
+                for result in data[ResultsConstants.KEY_RESULTS]
+            ],
+            model=data[ResultsConstants.KEY_MODEL],
+            parameters=data[ResultsConstants.KEY_PARAMETERS],
+            timestamp_end=_parse_timestamp(data[ResultsConstants.KEY_TIMESTAMP_END]),
+            evaluations=data[ResultsConstants.KEY_EVALUATIONS],
+            evaluators=data.get(ResultsConstants.KEY_EVALUATORS),
+        )
+        for data in data_list
+    ]
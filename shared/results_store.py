@@ -0,0 +1,234 @@
+from datetime import datetime
+import logging
+import sqlite3
+from typing import Any, Optional
+
+from shared.constants import ResultsConstants
+from shared.models import ExperimentResults, QueryResult
+from shared.results import load_experiment_results
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    model TEXT NOT NULL,
+    timestamp_end TEXT,
+    results_file TEXT
+);
+CREATE TABLE IF NOT EXISTS run_parameters (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    key TEXT NOT NULL,
+    value
+);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    metric TEXT NOT NULL,
+    value REAL
+);
+CREATE TABLE IF NOT EXISTS query_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    query_index INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS idx_run_parameters ON run_parameters(key, value, run_id);
+CREATE INDEX IF NOT EXISTS idx_run_metrics ON run_metrics(metric, run_id);
+CREATE INDEX IF NOT EXISTS idx_query_metrics ON query_metrics(metric, run_id);
+"""
+
+
+def flatten_parameters(parameters: Any, prefix: str = "") -> dict[str, Any]:
+    """Flattens experiment parameters into a single level dict.
+
+    Lists of dicts, such as the splitter and pipeline configs stored in
+    `ExperimentResults.parameters`, are merged. Nested dicts use dotted keys.
+    """
+    flat = {}
+    if isinstance(parameters, list):
+        for item in parameters:
+            flat.update(flatten_parameters(item, prefix))
+    elif isinstance(parameters, dict):
+        for key, value in parameters.items():
+            flat.update(flatten_parameters(value, f"{prefix}{key}."))
+    else:
+        flat[prefix[:-1]] = parameters
+    return flat
+
+
+def run_metrics(experiment_results: ExperimentResults) -> dict[str, float]:
+    """Returns the aggregate evaluations, timings, counters and cost of a run.
+
+    Timings are stored as `time.<stage>.<statistic>`, counters as
+    `count.<counter>` and the cost as `cost`.
+    """
+    metrics = dict(experiment_results.evaluations or {})
+    for stage, statistics in (experiment_results.timings or {}).items():
+        for statistic, value in statistics.items():
+            metrics[f"{ResultsConstants.PREFIX_TIMING}{stage}.{statistic}"] = value
+    for counter, value in (experiment_results.counters or {}).items():
+        metrics[f"{ResultsConstants.PREFIX_COUNTER}{counter}"] = value
+    if experiment_results.cost is not None:
+        metrics[ResultsConstants.KEY_COST] = experiment_results.cost
+    return metrics
+
+
+def query_metrics(query_result: QueryResult) -> dict[str, float]:
+    """Returns the evaluations, timings, counters, cost and decoding rate of a
+    query.
+
+    Timings are stored as `time.<stage>`, e.g. `time.ttft`, counters as
+    `count.<counter>`, the cost as `cost` and the decoding rate of streamed
+    generations as `tokens_per_second`.
+    """
+    metrics = dict(query_result.evaluations or {})
+    for stage, value in (query_result.timings or {}).items():
+        metrics[f"{ResultsConstants.PREFIX_TIMING}{stage}"] = value
+    for counter, value in (query_result.counters or {}).items():
+        metrics[f"{ResultsConstants.PREFIX_COUNTER}{counter}"] = value
+    if query_result.cost is not None:
+        metrics[ResultsConstants.KEY_COST] = query_result.cost
+    if query_result.tokens_per_second is not None:
+        metrics[ResultsConstants.KEY_TOKENS_PER_SECOND] = query_result.tokens_per_second
+    return metrics
+
+
+class ResultsStore:
+    """Stores the metrics of experiment runs in a SQLite database.
+
+    Only the model, the flattened parameters and the per-query and aggregate
+    metrics, timings and counters are stored, not the contexts or prompts, so
+    metrics can be compared across many runs without reading the results files.
+
+    Example usage:
+        ```
+        store = ResultsStore("data/results/results.sqlite")
+        store.add_experiment(results_with_evals, results_file=writer.path)
+        store.metric_by_parameter("avg_NDCG@3", "chunk_size")
+        ```
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add_experiment(
+        self, experiment_results: ExperimentResults, results_file: Optional[str] = None
+    ) -> int:
+        """Adds the metrics of an experiment and returns its run id."""
+        timestamp_end = experiment_results.timestamp_end
+        if isinstance(timestamp_end, datetime):
+            timestamp_end = timestamp_end.strftime(ResultsConstants.TIMESTAMP_FORMAT)
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (model, timestamp_end, results_file) VALUES (?, ?, ?)",
+                (experiment_results.model, timestamp_end, results_file),
+            )
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO run_parameters (run_id, key, value) VALUES (?, ?, ?)",
+                [
+                    (run_id, key, value)
+                    for key, value in flatten_parameters(
+                        experiment_results.parameters
+                    ).items()
+                ],
+            )
+            self.connection.executemany(
+                "INSERT INTO run_metrics (run_id, metric, value) VALUES (?, ?, ?)",
+                [
+                    (run_id, metric, value)
+                    for metric, value in run_metrics(experiment_results).items()
+                ],
+            )
+            self.connection.executemany(
+                "INSERT INTO query_metrics (run_id, query_index, query, metric, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, index, query_result.query, metric, value)
+                    for index, query_result in enumerate(experiment_results.results)
+                    for metric, value in query_metrics(query_result).items()
+                ],
+            )
+        return run_id
+
+    def remove_results_file(self, path: str) -> int:
+        """Removes all runs of a results file and returns their number."""
+        run_ids = [
+            (row[0],)
+            for row in self.connection.execute(
+                "SELECT run_id FROM runs WHERE results_file = ?", (path,)
+            )
+        ]
+        with self.connection:
+            for table in ("run_parameters", "run_metrics", "query_metrics", "runs"):
+                self.connection.executemany(
+                    f"DELETE FROM {table} WHERE run_id = ?", run_ids
+                )
+        return len(run_ids)
+
+    def import_results_file(self, path: str) -> list[int]:
+        """Adds all experiments of a results file and returns their run ids."""
+        run_ids = [
+            self.add_experiment(experiment_results, results_file=path)
+            for experiment_results in load_experiment_results(path)
+        ]
+        self.logger.info("Imported %s runs from %s", len(run_ids), path)
+        return run_ids
+
+    def find_runs(self, **parameters) -> list[int]:
+        """Returns the ids of all runs matching the given parameter values."""
+        query = "SELECT run_id FROM runs"
+        clauses = []
+        args = []
+        for key, value in parameters.items():
+            clauses.append(
+                "run_id IN (SELECT run_id FROM run_parameters WHERE key = ? AND value = ?)"
+            )
+            args.extend([key, value])
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return [
+            row[0] for row in self.connection.execute(query + " ORDER BY run_id", args)
+        ]
+
+    def metric_by_parameter(
+        self, metric: str, parameter: str, per_query: bool = False
+    ) -> list[tuple]:
+        """Returns a metric against a parameter across all runs.
+
+        Args:
+            metric:     The name of the metric, for example `avg_NDCG@3`, or
+                        `NDCG@3` with `per_query`. Timings and counters are
+                        available as e.g. `time.generation.p95` and
+                        `count.tokens`, the cost in USD as `cost`.
+            parameter:  The flattened name of the parameter, for example
+                        `chunk_size`.
+            per_query:  Whether to return the per-query metrics instead of the
+                        aggregate metrics of each run.
+
+        Returns:
+            A list of `(parameter_value, metric_value, run_id, model)` tuples,
+            ordered by the parameter value. With `per_query`, the query index is
+            appended to each tuple.
+        """
+        if per_query:
+            query = (
+                "SELECT p.value, m.value, r.run_id, r.model, m.query_index "
+                "FROM query_metrics m"
+            )
+        else:
+            query = "SELECT p.value, m.value, r.run_id, r.model FROM run_metrics m"
+        query += (
+            " JOIN run_parameters p ON p.run_id = m.run_id AND p.key = ?"
+            " JOIN runs r ON r.run_id = m.run_id"
+            " WHERE m.metric = ?"
+            " ORDER BY p.value, r.run_id"
+        )
+        if per_query:
+            query += ", m.query_index"
+        return self.connection.execute(query, (parameter, metric)).fetchall()
@@ -0,0 +1,398 @@
+import logging
+from typing import Optional, TYPE_CHECKING
+import zlib
+
+import numpy as np
+
+from shared.constants import (
+    ConfigConstants,
+    InstrumentationConstants,
+    RetrievalConstants,
+)
+from shared.instrumentation import instrumentation
+from shared.models import Candidates
+from shared.reranker import CrossEncoderReranker
+
+if TYPE_CHECKING:
+    from shared.database import ChromaDB
+    from shared.lexical import LexicalIndex
+
+# A Mersenne prime larger than any 32-bit shingle hash, for universal hashing.
+MERSENNE_PRIME = (1 << 61) - 1
+# Bound of the hash coefficients, so `a * hash + b` does not overflow 64 bits.
+MAX_COEFFICIENT = 1 << 31
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Returns the rows of a matrix scaled to unit length."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def dedup_cosine(embeddings: np.ndarray, top_k: int, threshold: float) -> list[int]:
+    """Selects up to `top_k` candidates in rank order, skipping every candidate
+    whose cosine similarity to an already selected candidate exceeds
+    `threshold`.
+
+    Returns:
+        The indices of the selected candidates.
+    """
+    if len(embeddings) == 0:
+        return []
+    similarities = normalize_rows(embeddings) @ normalize_rows(embeddings).T
+    return _select_greedy(similarities, top_k, threshold)
+
+
+def mmr(
+    query_embedding: np.ndarray,
+    embeddings: np.ndarray,
+    top_k: int,
+    mmr_lambda: float,
+) -> list[int]:
+    """Selects up to `top_k` candidates by maximal marginal relevance.
+
+    Each step selects the candidate maximizing
+    `mmr_lambda * sim(query, candidate) - (1 - mmr_lambda) * max sim(candidate,
+    selected)`, trading off relevance against redundancy.
+
+    Returns:
+        The indices of the selected candidates, in order of selection.
+    """
+    if len(embeddings) == 0:
+        return []
+    embeddings = normalize_rows(embeddings)
+    relevance = embeddings @ (query_embedding / np.linalg.norm(query_embedding))
+    similarities = embeddings @ embeddings.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarities[selected[0]].copy()
+    available = np.ones(len(embeddings), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < min(top_k, len(embeddings)):
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarities[best], out=redundancy)
+    return selected
+
+
+def minhash_signatures(
+    texts: list[str],
+    num_permutations: int = RetrievalConstants.MINHASH_NUM_PERMUTATIONS,
+    shingle_size: int = RetrievalConstants.MINHASH_SHINGLE_SIZE,
+    seed: int = 0,
+) -> np.ndarray:
+    """Returns the MinHash signatures of the word shingles of each text.
+
+    The fraction of equal entries of two signatures estimates the Jaccard
+    similarity of the shingle sets of the texts.
+
+    Returns:
+        An array of shape `(len(texts), num_permutations)`.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MAX_COEFFICIENT, num_permutations, dtype=np.uint64)
+    b = rng.integers(0, MAX_COEFFICIENT, num_permutations, dtype=np.uint64)
+    signatures = np.full(
+        (len(texts), num_permutations), np.iinfo(np.uint64).max, dtype=np.uint64
+    )
+    for ind, text in enumerate(texts):
+        words = text.split()
+        shingles = {
+            " ".join(words[start : start + shingle_size])
+            for start in range(max(1, len(words) - shingle_size + 1))
+        }
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode()) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (a[:, None] * hashes[None, :] + b[:, None]) % MERSENNE_PRIME
+        signatures[ind] = permuted.min(axis=1)
+    return signatures
+
+
+def dedup_minhash(
+    texts: list[str],
+    top_k: int,
+    threshold: float,
+    num_permutations: int = RetrievalConstants.MINHASH_NUM_PERMUTATIONS,
+) -> list[int]:
+    """Selects up to `top_k` texts in rank order, skipping every text whose
+    estimated Jaccard similarity to an already selected text exceeds
+    `threshold`.
+
+    Returns:
+        The indices of the selected texts.
+    """
+    if not texts:
+        return []
+    signatures = minhash_signatures(texts, num_permutations)
+    similarities = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+    return _select_greedy(similarities, top_k, threshold)
+
+
+def _select_greedy(similarities: np.ndarray, top_k: int, threshold: float) -> list[int]:
+    selected: list[int] = []
+    for ind in range(len(similarities)):
+        if len(selected) == top_k:
+            break
+        if not selected or similarities[ind, selected].max() <= threshold:
+            selected.append(ind)
+    return selected
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int) -> dict[str, float]:
+    """Fuses rankings of ids by summing `1 / (k + rank)` over the rankings."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (k + rank)
+    return scores
+
+
+def weighted_fusion(
+    dense_ids: list[str],
+    dense_scores: list[float],
+    lexical_ids: list[str],
+    lexical_scores: list[float],
+    weight: float,
+) -> dict[str, float]:
+    """Fuses dense and lexical scores as `weight * dense + (1 - weight) *
+    lexical`, after min-max normalizing the scores of each retriever."""
+    scores: dict[str, float] = {}
+    for ids, values, factor in (
+        (dense_ids, dense_scores, weight),
+        (lexical_ids, lexical_scores, 1 - weight),
+    ):
+        if not values:
+            continue
+        low = min(values)
+        spread = max(values) - low or 1.0
+        for chunk_id, value in zip(ids, values):
+            scores[chunk_id] = (
+                scores.get(chunk_id, 0.0) + factor * (value - low) / spread
+            )
+    return scores
+
+
+class Retriever:
+    """Retrieves the contexts of queries, optionally removing near-duplicates.
+
+    Without hybrid retrieval, reranking or deduplication, the `top_k` nearest
+    contexts are returned. Otherwise a larger pool of `candidates` is retrieved,
+    fused with the BM25 matches of the lexical index if `hybrid` is configured,
+    reranked with a cross-encoder if `rerank` is configured, and reduced to
+    `top_k` contexts, optionally by one of the following methods:
+
+    - `cosine`: Skips candidates whose embedding has a cosine similarity above
+      `threshold` to a higher ranked context.
+    - `mmr`:    Selects by maximal marginal relevance with `mmr_lambda`.
+    - `minhash`: Skips candidates whose text has an estimated Jaccard similarity
+      of word shingles above `threshold` to a higher ranked context.
+
+    Example usage:
+        ```
+        retriever = Retriever(database, config.get("retrieval"))
+        contexts = retriever.retrieve(query_embeddings, queries)
+        ```
+    """
+
+    def __init__(self, database: "ChromaDB", config_retrieval: Optional[dict]):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        config_retrieval = config_retrieval or {}
+        self.database = database
+        self.top_k: int = config_retrieval.get(
+            ConfigConstants.KEY_TOP_K, RetrievalConstants.DEFAULT_TOP_K
+        )
+        self.dedup: str = config_retrieval.get(
+            ConfigConstants.KEY_DEDUP, RetrievalConstants.DEDUP_NONE
+        )
+        self.num_candidates: int = config_retrieval.get(
+            ConfigConstants.KEY_CANDIDATES, RetrievalConstants.DEFAULT_CANDIDATES
+        )
+        self.threshold: float = config_retrieval.get(
+            ConfigConstants.KEY_THRESHOLD, RetrievalConstants.DEFAULT_THRESHOLD
+        )
+        self.mmr_lambda: float = config_retrieval.get(
+            ConfigConstants.KEY_MMR_LAMBDA, RetrievalConstants.DEFAULT_MMR_LAMBDA
+        )
+        if self.dedup not in (
+            RetrievalConstants.DEDUP_NONE,
+            RetrievalConstants.DEDUP_COSINE,
+            RetrievalConstants.DEDUP_MINHASH,
+            RetrievalConstants.DEDUP_MMR,
+        ):
+            raise ValueError(f"Unknown deduplication method: {self.dedup}")
+        config_rerank: Optional[dict] = config_retrieval.get(ConfigConstants.KEY_RERANK)
+        self.reranker: Optional[CrossEncoderReranker] = (
+            CrossEncoderReranker(config_rerank) if config_rerank else None
+        )
+        config_hybrid: Optional[dict] = config_retrieval.get(ConfigConstants.KEY_HYBRID)
+        self.lexical_index: Optional["LexicalIndex"] = None
+        if config_hybrid:
+            # Imported here, so retrieval without hybrid search needs no `scipy`.
+            from shared import lexical
+
+            self.fusion: str = config_hybrid.get(
+                ConfigConstants.KEY_FUSION, RetrievalConstants.FUSION_RRF
+            )
+            if self.fusion not in (
+                RetrievalConstants.FUSION_RRF,
+                RetrievalConstants.FUSION_WEIGHTED,
+            ):
+                raise ValueError(f"Unknown fusion method: {self.fusion}")
+            self.fusion_weight: float = config_hybrid.get(
+                ConfigConstants.KEY_WEIGHT, RetrievalConstants.DEFAULT_FUSION_WEIGHT
+            )
+            self.rrf_k: int = config_hybrid.get(
+                ConfigConstants.KEY_RRF_K, RetrievalConstants.DEFAULT_RRF_K
+            )
+            self.lexical_index = lexical.LexicalIndex.load(
+                lexical.lexical_index_path(database.path, database.collection_name)
+            )
+
+    def select(self, query_embedding: np.ndarray, candidates: Candidates) -> list[int]:
+        """Returns the indices of the candidates to keep, in context order."""
+        if self.dedup == RetrievalConstants.DEDUP_COSINE:
+            return dedup_cosine(candidates.embeddings, self.top_k, self.threshold)
+        if self.dedup == RetrievalConstants.DEDUP_MMR:
+            return mmr(
+                query_embedding, candidates.embeddings, self.top_k, self.mmr_lambda
+            )
+        if self.dedup == RetrievalConstants.DEDUP_MINHASH:
+            return dedup_minhash(candidates.documents, self.top_k, self.threshold)
+        return list(range(min(self.top_k, len(candidates.documents))))
+
+    def fuse(
+        self,
+        query_embeddings: np.ndarray,
+        queries: list[str],
+        candidates: list[Candidates],
+    ) -> list[Candidates]:
+        """Fuses the dense candidates of each query with the BM25 matches of the
+        lexical index.
+
+        Chunks only found by the lexical index are fetched from the database in
+        one request, and the cosine distances of all fused candidates to their
+        query are computed from the stored embeddings.
+        """
+        num_candidates = max(self.num_candidates, self.top_k)
+        with instrumentation.span(InstrumentationConstants.STAGE_LEXICAL):
+            lexical_ids, lexical_scores = self.lexical_index.search(
+                queries, num_candidates
+            )
+
+            rankings = []
+            for dense, ids, scores in zip(candidates, lexical_ids, lexical_scores):
+                if self.fusion == RetrievalConstants.FUSION_WEIGHTED:
+                    fused = weighted_fusion(
+                        dense.ids,
+                        [1 - distance for distance in dense.distances],
+                        ids,
+                        scores,
+                        self.fusion_weight,
+                    )
+                else:
+                    fused = reciprocal_rank_fusion([dense.ids, ids], self.rrf_k)
+                rankings.append(sorted(fused, key=fused.get, reverse=True))
+
+            chunks = {}
+            for dense in candidates:
+                for ind, chunk_id in enumerate(dense.ids):
+                    chunks[chunk_id] = (dense.documents[ind], dense.embeddings[ind])
+            missing = list(
+                {
+                    chunk_id: None
+                    for ranking in rankings
+                    for chunk_id in ranking[:num_candidates]
+                    if chunk_id not in chunks
+                }
+            )
+            if missing:
+                fetched = self.database.get_candidates(missing)
+                for ind, chunk_id in enumerate(fetched.ids):
+                    chunks[chunk_id] = (fetched.documents[ind], fetched.embeddings[ind])
+
+            fused_candidates = []
+            for query_embedding, ranking in zip(query_embeddings, rankings):
+                # Chunks missing from the collection are left out.
+                ids = [
+                    chunk_id
+                    for chunk_id in ranking[:num_candidates]
+                    if chunk_id in chunks
+                ]
+                if not ids:
+                    # Neither retriever found a candidate, e.g. in an empty index.
+                    fused_candidates.append(
+                        Candidates(
+                            ids=[],
+                            documents=[],
+                            embeddings=np.empty(
+                                (0, len(query_embedding)), dtype=np.float32
+                            ),
+                            distances=[],
+                        )
+                    )
+                    continue
+                embeddings = np.array([chunks[chunk_id][1] for chunk_id in ids])
+                query_embedding = query_embedding / np.linalg.norm(query_embedding)
+                distances = 1 - normalize_rows(embeddings) @ query_embedding
+                fused_candidates.append(
+                    Candidates(
+                        ids=ids,
+                        documents=[chunks[chunk_id][0] for chunk_id in ids],
+                        embeddings=embeddings,
+                        distances=distances.tolist(),
+                    )
+                )
+        return fused_candidates
+
+    def retrieve(
+        self, query_embeddings: np.ndarray, queries: Optional[list[str]] = None
+    ) -> list[list[str]]:
+        """Returns the contexts of each query, in rank order.
+
+        The query texts are required for hybrid retrieval and reranking.
+        """
+        if (
+            self.dedup == RetrievalConstants.DEDUP_NONE
+            and self.reranker is None
+            and self.lexical_index is None
+        ):
+            return self.database.query(query_embeddings)
+
+        if queries is None and (
+            self.reranker is not None or self.lexical_index is not None
+        ):
+            raise ValueError("Hybrid retrieval and reranking require the query texts.")
+
+        candidates = self.database.query_candidates(
+            query_embeddings, max(self.num_candidates, self.top_k)
+        )
+        if self.lexical_index is not None:
+            candidates = self.fuse(query_embeddings, queries, candidates)
+        if self.reranker is not None:
+            orders = self.reranker.rerank(queries, candidates)
+            candidates = [
+                query_candidates.select(order)
+                for query_candidates, order in zip(candidates, orders)
+            ]
+        if self.dedup == RetrievalConstants.DEDUP_NONE:
+            return [
+                query_candidates.documents[: self.top_k]
+                for query_candidates in candidates
+            ]
+
+        with instrumentation.span(InstrumentationConstants.STAGE_DEDUP) as span:
+            contexts = []
+            for query_embedding, query_candidates in zip(query_embeddings, candidates):
+                selected = self.select(query_embedding, query_candidates)
+                span.add(
+                    InstrumentationConstants.COUNTER_CANDIDATES,
+                    len(query_candidates.documents),
+                )
+                contexts.append([query_candidates.documents[ind] for ind in selected])
+        return contexts
@@ -0,0 +1,252 @@
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+from typing import Any, Optional
+import urllib.error
+import urllib.request
+
+from shared.batching import MicroBatcher
+from shared.constants import (
+    ConfigConstants,
+    InstrumentationConstants,
+    ServiceConstants,
+)
+from shared.instrumentation import instrumentation
+from shared.models import ExperimentResults
+from shared.registry import get_pipeline
+from shared.results import dump_record, experiment_records, experiments_from_records
+
+
+class QueryService:
+    """Keeps pipelines warm and serves their retrieval and query runs.
+
+    The pipelines, with their embedding models, Chroma collections and LLM
+    clients, are constructed once. The retrievals of concurrent requests to a
+    pipeline are merged by a `MicroBatcher`, so their queries are embedded and
+    retrieved in one batch.
+
+    Example usage:
+        ```
+        service = QueryService.from_config(config, prompts_queries)
+        server = create_server(service, "127.0.0.1", 8765)
+        server.serve_forever()
+        ```
+    """
+
+    def __init__(self, pipelines: dict[str, Any], max_batch_size: int, max_wait: float):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.pipelines = pipelines
+        self.batchers = {
+            name: MicroBatcher(
+                pipeline.retrieve,
+                max_batch_size,
+                max_wait,
+                name=InstrumentationConstants.STAGE_RETRIEVAL_BATCH,
+            )
+            for name, pipeline in pipelines.items()
+        }
+
+    @classmethod
+    def from_config(cls, config: dict, prompts_queries: dict) -> "QueryService":
+        """Constructs the pipelines listed in the `server` section of the config,
+        and warms them up with a retrieval unless `warmup` is disabled."""
+        config_server = config.get(ConfigConstants.KEY_SERVER) or {}
+        pipelines = {
+            name: get_pipeline(name)(config, prompts_queries)
+            for name in config_server.get(
+                ConfigConstants.KEY_PIPELINES, [ConfigConstants.KEY_OPENAI]
+            )
+        }
+        if config_server.get(ConfigConstants.KEY_WARMUP, True):
+            for pipeline in pipelines.values():
+                pipeline.retrieve([ServiceConstants.WARMUP_QUERY])
+        return cls(
+            pipelines,
+            max_batch_size=config_server.get(
+                ConfigConstants.KEY_MAX_BATCH_SIZE,
+                ServiceConstants.DEFAULT_MAX_BATCH_SIZE,
+            ),
+            max_wait=config_server.get(
+                ConfigConstants.KEY_MAX_WAIT_MS, ServiceConstants.DEFAULT_MAX_WAIT_MS
+            )
+            / 1000,
+        )
+
+    def _batcher(self, pipeline: str) -> MicroBatcher:
+        if pipeline not in self.batchers:
+            raise ValueError(f"Pipeline `{pipeline}` is not served.")
+        return self.batchers[pipeline]
+
+    def retrieve(self, pipeline: str, query_texts: list[str]) -> list:
+        """Returns the contexts of queries."""
+        return self._batcher(pipeline).submit(query_texts)
+
+    def run(self, pipeline: str, queries: Optional[list[dict]]) -> ExperimentResults:
+        """Runs queries through a pipeline, the configured queries if `None`."""
+        batcher = self._batcher(pipeline)
+        return self.pipelines[pipeline].run_queries(queries, retrieve=batcher.submit)
+
+    def stats(self) -> dict:
+        """Returns the timings and counters of all requests so far, and the
+        statistics of the retrieval batches of each pipeline."""
+        return {
+            ServiceConstants.KEY_TIMINGS: instrumentation.summary(),
+            ServiceConstants.KEY_COUNTERS: instrumentation.totals(),
+            ServiceConstants.KEY_BATCHERS: {
+                name: batcher.stats() for name, batcher in self.batchers.items()
+            },
+        }
+
+    def close(self) -> None:
+        for batcher in self.batchers.values():
+            batcher.close()
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Handles the JSON requests of a `QueryService`.
+
+    - `GET /health`: The served pipelines.
+    - `GET /stats`: The timings and counters of the service.
+    - `POST /retrieve` with `pipeline` and a list of query texts as `queries`:
+      The contexts of each query.
+    - `POST /run` with `pipeline` and optionally a list of query objects as
+      `queries`: The results of the run, as JSON Lines records in the format of
+      the results files.
+    """
+
+    service: QueryService
+
+    def log_message(self, format: str, *args) -> None:
+        logging.getLogger(self.__class__.__name__).debug(format, *args)
+
+    def _send(self, status: HTTPStatus, body: str, content_type: str) -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, obj: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        self._send(status, json.dumps(obj), ServiceConstants.CONTENT_TYPE_JSON)
+
+    def _send_error(self, status: HTTPStatus, error: Exception) -> None:
+        self._send_json({ServiceConstants.KEY_ERROR: str(error)}, status)
+
+    def do_GET(self) -> None:
+        if self.path == ServiceConstants.PATH_HEALTH:
+            self._send_json(
+                {ServiceConstants.KEY_PIPELINES: list(self.service.pipelines)}
+            )
+        elif self.path == ServiceConstants.PATH_STATS:
+            self._send_json(self.service.stats())
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, ValueError(self.path))
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            pipeline = request[ServiceConstants.KEY_PIPELINE]
+            queries = request.get(ServiceConstants.KEY_QUERIES)
+        except (ValueError, KeyError) as error:
+            self._send_error(HTTPStatus.BAD_REQUEST, error)
+            return
+
+        try:
+            if self.path == ServiceConstants.PATH_RETRIEVE:
+                contexts = self.service.retrieve(pipeline, queries or [])
+                self._send_json({ServiceConstants.KEY_CONTEXTS: contexts})
+            elif self.path == ServiceConstants.PATH_RUN:
+                results = self.service.run(pipeline, queries)
+                self._send(
+                    HTTPStatus.OK,
+                    "".join(
+                        dump_record(record) + "\n"
+                        for record in experiment_records(results)
+                    ),
+                    ServiceConstants.CONTENT_TYPE_JSONL,
+                )
+            else:
+                self._send_error(HTTPStatus.NOT_FOUND, ValueError(self.path))
+        except ValueError as error:
+            self._send_error(HTTPStatus.BAD_REQUEST, error)
+        except Exception as error:
+            self.service.logger.exception("Request to %s failed", self.path)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, error)
+
+
+def create_server(service: QueryService, host: str, port: int) -> ThreadingHTTPServer:
+    """Creates an HTTP server for a service, handling each request in a thread.
+
+    Port 0 binds to a free port, available as `server.server_address[1]`.
+    """
+    handler = type(
+        QueryRequestHandler.__name__, (QueryRequestHandler,), {"service": service}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class ServiceClient:
+    """Sends requests to a running `QueryService`.
+
+    Example usage:
+        ```
+        client = ServiceClient("http://127.0.0.1:8765")
+        results = client.run("openai", prompts_queries["queries"])
+        ```
+    """
+
+    def __init__(self, url: str, timeout: Optional[float] = None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Optional[dict] = None) -> str:
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode() if payload is not None else None,
+            headers={"Content-Type": ServiceConstants.CONTENT_TYPE_JSON},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read().decode()
+        except urllib.error.HTTPError as error:
+            message = json.loads(error.read() or b"{}").get(
+                ServiceConstants.KEY_ERROR, error.reason
+            )
+            raise RuntimeError(f"Request to {path} failed: {message}") from error
+
+    def health(self) -> dict:
+        return json.loads(self._request(ServiceConstants.PATH_HEALTH))
+
+    def stats(self) -> dict:
+        return json.loads(self._request(ServiceConstants.PATH_STATS))
+
+    def retrieve(self, pipeline: str, query_texts: list[str]) -> list:
+        """Returns the contexts of queries."""
+        response = self._request(
+            ServiceConstants.PATH_RETRIEVE,
+            {
+                ServiceConstants.KEY_PIPELINE: pipeline,
+                ServiceConstants.KEY_QUERIES: query_texts,
+            },
+        )
+        return json.loads(response)[ServiceConstants.KEY_CONTEXTS]
+
+    def run(
+        self, pipeline: str, queries: Optional[list[dict]] = None
+    ) -> ExperimentResults:
+        """Runs queries through a pipeline of the service."""
+        response = self._request(
+            ServiceConstants.PATH_RUN,
+            {
+                ServiceConstants.KEY_PIPELINE: pipeline,
+                ServiceConstants.KEY_QUERIES: queries,
+            },
+        )
+        records = [json.loads(line) for line in response.splitlines() if line]
+        (results,) = experiments_from_records(records)
+        return results
@@ -1,7 +1,8 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 import logging
 
-from shared.constants import ModelConstants, ConfigConstants
+from shared.constants import ConfigConstants, InstrumentationConstants
+from shared.instrumentation import instrumentation
 from shared.models import Document
 
 
@@ -22,15 +23,16 @@ class TextSplitter:
             documents: A list of ``Document``.
 
         Returns:
-            A list of split documents.
+            A list of split documents. The chunks of a page share the `Source`
+            of that page instead of holding a copy of its metadata.
 
         """
 
-        return [
-            Document(
-                page_content=split.page_content,
-                title=split.metadata.get(ModelConstants.KEY_TITLE),
-                metadata=split.metadata,
-            )
-            for split in self.splitter.split_documents(documents=documents)
-        ]
+        with instrumentation.span(InstrumentationConstants.STAGE_SPLIT) as span:
+            chunks = [
+                Document(page_content=split, source=document.source, page=document.page)
+                for document in documents
+                for split in self.splitter.split_text(document.page_content)
+            ]
+            span.add(InstrumentationConstants.COUNTER_CHUNKS, len(chunks))
+        return chunks
@@ -0,0 +1,97 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from evaluators.embedding_similarity import (  # noqa: E402
+    Evaluator,
+    answer_similarities,
+)
+from shared.backends import hash_embedding  # noqa: E402
+from shared.models import ExperimentResults, QueryResult  # noqa: E402
+
+DIMENSION = 16
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def get_embeddings(self, texts):
+        self.texts.append(texts)
+        return np.asarray([hash_embedding(text, DIMENSION) for text in texts])
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, texts):
+        self.stored = {
+            text: np.asarray(hash_embedding(text, DIMENSION)) for text in texts
+        }
+
+    def get_embeddings_by_text(self, texts):
+        return {text: self.stored[text] for text in texts if text in self.stored}
+
+
+def _results():
+    return ExperimentResults(
+        results=[
+            QueryResult(
+                query="query",
+                contexts=["Paris", "Lyon"],
+                template="",
+                response="Paris",
+            ),
+            QueryResult(query="Lyon", contexts=[], template="", response="Lyon"),
+        ],
+        model="gpt",
+        parameters={},
+        timestamp_end=None,
+        evaluations={"MRR": 1.0},
+    )
+
+
+def _config(reuse_index=False):
+    return {"evaluators": {"embedding_similarity": {"reuse_index": reuse_index}}}
+
+
+def test_answer_similarities():
+    responses = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]])
+    queries = np.array([[0.0, 1.0], [0.0, 1.0], [1.0, 0.0]])
+    contexts = np.array([[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]])
+    owners = np.array([0, 0, 1])
+    answer_context, answer_query = answer_similarities(
+        responses, queries, contexts, owners
+    )
+    np.testing.assert_allclose(answer_context[:2], [1.0, 0.8])
+    assert np.isnan(answer_context[2])
+    np.testing.assert_allclose(answer_query, [0.0, 1.0, 1.0])
+
+
+def test_run_embeds_in_one_batch():
+    embedder = FakeEmbedder()
+    results = Evaluator(_config(), embedder=embedder).run(_results())
+    assert embedder.texts == [["Paris", "Lyon", "query", "Lyon", "Paris", "Lyon"]]
+
+    evaluations = results.results[0].evaluations
+    assert evaluations["answer_context_similarity"] == pytest.approx(1.0)
+    assert evaluations["answer_query_similarity"] < 1.0
+    assert results.results[1].evaluations["answer_context_similarity"] is None
+    assert results.results[1].evaluations["answer_query_similarity"] == (
+        pytest.approx(1.0)
+    )
+    assert results.evaluations["MRR"] == 1.0
+    assert results.evaluations["avg_answer_context_similarity"] == pytest.approx(1.0)
+
+
+def test_run_reuses_stored_embeddings():
+    embedder = FakeEmbedder()
+    evaluator = Evaluator(
+        _config(reuse_index=True), embedder=embedder, database=FakeDatabase(["Lyon"])
+    )
+    results = evaluator.run(_results())
+    assert embedder.texts == [["Paris", "Lyon", "query", "Lyon", "Paris"]]
+    assert results.results[0].evaluations["answer_context_similarity"] == pytest.approx(
+        1.0
+    )
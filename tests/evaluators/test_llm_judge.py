@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from evaluators import GenerationEvaluator
+from evaluators import llm_judge
+from evaluators.llm_judge import Evaluator, parse_score
+from shared.models import ExperimentResults, QueryResult
+
+
+class FakeJudge:
+    """Rates faithfulness 5 and answer relevance 2."""
+
+    model = "judge"
+
+    def __init__(self):
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def chat_request(self, text: str) -> str:
+        with self.lock:
+            self.requests += 1
+        return "5" if "faithful" in text else "Rating: 2"
+
+
+def _config(cache=None):
+    config_judge = {"max_workers": 4}
+    if cache:
+        config_judge["cache"] = cache
+    return {"evaluators": {"llm_judge": config_judge}}
+
+
+def _results(response="Paris"):
+    return ExperimentResults(
+        results=[
+            QueryResult(
+                query=f"query {ind}",
+                contexts=["context a", "context b"],
+                template="",
+                response=response,
+                evaluations={"RR": 1.0},
+            )
+            for ind in range(3)
+        ],
+        model="gpt",
+        parameters={},
+        timestamp_end=None,
+        evaluations={"MRR": 1.0},
+    )
+
+
+@pytest.mark.parametrize(
+    "text, score",
+    [("5", 1.0), ("Rating: 1", 0.0), ("3 out of 5", 0.5), ("unsure", None)],
+)
+def test_parse_score(text, score):
+    assert parse_score(text) == score
+
+
+def test_run_adds_scores_and_keeps_evaluations():
+    judge = FakeJudge()
+    results = Evaluator(_config(), llm=judge).run(_results())
+    assert judge.requests == 6
+    assert results.results[0].evaluations == {
+        "RR": 1.0,
+        "faithfulness": 1.0,
+        "answer_relevance": 0.25,
+    }
+    assert results.evaluations == {
+        "MRR": 1.0,
+        "avg_faithfulness": 1.0,
+        "avg_answer_relevance": 0.25,
+    }
+
+
+def test_cache_skips_unchanged_results(tmp_path):
+    cache = str(tmp_path / "judgments.sqlite")
+    Evaluator(_config(cache), llm=FakeJudge()).close()
+
+    judge = FakeJudge()
+    evaluator = Evaluator(_config(cache), llm=judge)
+    evaluator.run(_results())
+    assert judge.requests == 6
+    evaluator.run(_results())
+    assert judge.requests == 6
+    evaluator.run(_results(response="Lyon"))
+    assert judge.requests == 12
+    evaluator.close()
+
+
+def test_cache_misses_after_prompt_change(tmp_path, monkeypatch):
+    cache = str(tmp_path / "judgments.sqlite")
+    judge = FakeJudge()
+    evaluator = Evaluator(_config(cache), llm=judge)
+    evaluator.run(_results())
+    fingerprint = evaluator.fingerprint()
+    monkeypatch.setitem(
+        llm_judge.JUDGE_PROMPTS,
+        "faithfulness",
+        llm_judge.FAITHFULNESS_PROMPT + "\nBe strict.",
+    )
+    assert evaluator.fingerprint() != fingerprint
+    evaluator.run(_results())
+    assert judge.requests == 9
+    evaluator.close()
+
+
+def test_failed_requests_are_not_scored():
+    class FailingJudge(FakeJudge):
+        def chat_request(self, text: str) -> str:
+            raise RuntimeError("unavailable")
+
+    results = Evaluator(_config(), llm=FailingJudge()).run(_results())
+    assert results.results[0].evaluations["faithfulness"] is None
+    assert results.evaluations["avg_faithfulness"] is None
+
+
+def test_generation_evaluator_without_config():
+    evaluators = GenerationEvaluator({"evaluators": {}}, {})
+    results = _results()
+    assert evaluators.run(results) is results
@@ -0,0 +1,100 @@
+import threading
+
+from evaluators import RetrievalEvaluator
+from evaluators.base_evaluator import BaseEvaluator
+from evaluators.runner import EvaluatorRunner
+from shared.models import Evaluations, ExperimentResults, QueryResult
+
+
+class ConstantEvaluator(BaseEvaluator):
+    def __init__(self, metric, value, barrier=None):
+        self.name = metric
+        self.metric = metric
+        self.value = value
+        self.barrier = barrier
+
+    def evaluate(self, results):
+        if self.barrier:
+            # Only passes if the other evaluators run at the same time.
+            self.barrier.wait(timeout=5)
+        return Evaluations(
+            queries=[{self.metric: self.value} for _ in results.results],
+            aggregate={f"avg_{self.metric}": self.value},
+        )
+
+
+def _results():
+    return ExperimentResults(
+        results=[
+            QueryResult(
+                query=f"query {ind}",
+                contexts=["doc1", "doc2", "doc3"],
+                template="",
+                response="",
+                evaluations={"existing": 1.0} if ind == 0 else None,
+            )
+            for ind in range(2)
+        ],
+        model="model",
+        parameters={},
+        timestamp_end=None,
+    )
+
+
+def test_run_merges_evaluations_without_modifying_results():
+    results = _results()
+    runner = EvaluatorRunner([ConstantEvaluator("a", 0.5), ConstantEvaluator("b", 1)])
+    merged = runner.run(results)
+    assert merged.results[0].evaluations == {"existing": 1.0, "a": 0.5, "b": 1}
+    assert merged.results[1].evaluations == {"a": 0.5, "b": 1}
+    assert merged.evaluations == {"avg_a": 0.5, "avg_b": 1}
+    assert results.results[0].evaluations == {"existing": 1.0}
+    assert results.results[1].evaluations is None
+    assert results.evaluations is None
+
+
+def test_later_evaluators_win():
+    runner = EvaluatorRunner([ConstantEvaluator("a", 0), ConstantEvaluator("a", 1)])
+    assert runner.run(_results()).evaluations == {"avg_a": 1}
+
+
+def test_evaluators_run_concurrently():
+    barrier = threading.Barrier(3)
+    runner = EvaluatorRunner(
+        [ConstantEvaluator(metric, 1, barrier) for metric in ("a", "b", "c")]
+    )
+    assert set(runner.run(_results()).evaluations) == {"avg_a", "avg_b", "avg_c"}
+
+
+def test_retrieval_evaluator():
+    config = {"evaluators": {"order_unaware": {"k": 3}, "order_aware": {"k": 3}}}
+    queries = [
+        {"relevant_docs": [{"doc": "doc1", "relevance": 1}]},
+        {"relevant_docs": [{"doc": "doc4", "relevance": 1}]},
+    ]
+    results = _results()
+    merged = RetrievalEvaluator(config, {"queries": queries}).run(results)
+    assert merged.evaluations["MRR"] == 0.5
+    assert merged.evaluations["avg_recall@3"] == 0.5
+    assert merged.results[0].evaluations["existing"] == 1.0
+    assert merged.results[0].evaluations["RR"] == 1.0
+    assert "NDCG@3" in merged.results[1].evaluations
+    assert results.results[1].evaluations is None
+
+
+def test_rerun_skips_current_evaluators():
+    evaluator_a = ConstantEvaluator("a", 0)
+    evaluator_b = ConstantEvaluator("b", 0)
+    runner = EvaluatorRunner([evaluator_a, evaluator_b])
+    results = runner.run(_results())
+    assert set(results.evaluators) == {"a", "b"}
+    assert runner.rerun(results) == (results, [])
+
+    # A changed config changes the fingerprint, the previous metrics are replaced.
+    evaluator_b.fingerprint_inputs = lambda: {"k": 5}
+    evaluator_b.metric = "b@5"
+    rerun, names = runner.rerun(results)
+    assert names == ["b"]
+    assert rerun.evaluations == {"avg_a": 0, "avg_b@5": 0}
+    assert rerun.results[0].evaluations == {"existing": 1.0, "a": 0, "b@5": 0}
+    assert runner.rerun(rerun)[1] == []
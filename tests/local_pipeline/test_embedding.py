@@ -0,0 +1,115 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from local_pipeline.embedding import LocalEmbeddings  # noqa: E402
+from shared.models import Document, Source  # noqa: E402
+
+
+class StubDevice:
+    def __init__(self, type):
+        self.type = type
+
+    def __str__(self):
+        return self.type
+
+
+class StubModel:
+    """Embeds a text as its length and number of words, and records its calls."""
+
+    def __init__(self, device="cpu"):
+        self.device = StubDevice(device)
+        self.batch_sizes = []
+        self.pools_started = 0
+        self.pools_stopped = 0
+        self.halved = False
+
+    def encode(self, texts, batch_size, convert_to_numpy):
+        self.batch_sizes.append(batch_size)
+        return np.array([[len(text), len(text.split())] for text in texts])
+
+    def start_multi_process_pool(self, target_devices):
+        self.pools_started += 1
+        return {"devices": target_devices}
+
+    def encode_multi_process(self, texts, pool, batch_size):
+        assert len(pool["devices"]) == 2
+        return self.encode(texts, batch_size, convert_to_numpy=True)
+
+    def stop_multi_process_pool(self, pool):
+        self.pools_stopped += 1
+
+    def half(self):
+        self.halved = True
+        return self
+
+
+class StubTokenizer:
+    def check_tokenlimit_exceeded(self, texts):
+        return False
+
+
+def _embedder(model=None, **config):
+    embedder = LocalEmbeddings({"embedding": "stub", "max_tokens": 8, **config})
+    # Replace the lazily loaded model and tokenizer.
+    embedder.model = model or StubModel()
+    embedder.tokenizer = StubTokenizer()
+    return embedder
+
+
+def test_embeddings_in_input_order():
+    embedder = _embedder(batch_size=2)
+    embeddings = embedder.get_embeddings(["a much longer text", "b", "two\nwords"])
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == [[18, 4], [1, 1], [9, 2]]
+    assert embedder.model.batch_sizes == [2]
+
+
+def test_add_embeddings_to_docs():
+    embedder = _embedder()
+    source = Source(title="doc", source="doc.pdf")
+    documents = [
+        Document(page_content=text, source=source, page=1)
+        for text in ["one", "two words"]
+    ]
+    documents = embedder.add_embeddings_to_docs(documents)
+    assert [doc.embedding.tolist() for doc in documents] == [[3, 1], [9, 2]]
+
+
+def test_multi_process_pool_started_once():
+    embedder = _embedder(num_processes=2)
+    embedder.get_embeddings(["a"])
+    embedder.get_embeddings(["b c"])
+    assert embedder.model.pools_started == 1
+    embedder.close()
+    embedder.close()
+    assert embedder.model.pools_stopped == 1
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"precision": "bfloat16"},
+        {"backend": "tensorrt"},
+        {"precision": "float16", "backend": "onnx"},
+        {"precision": "int8", "backend": "openvino"},
+    ],
+)
+def test_unsupported_options(config):
+    with pytest.raises(ValueError):
+        LocalEmbeddings({"embedding": "stub", "max_tokens": 8, **config})
+
+
+def test_float16_requires_gpu():
+    embedder = _embedder(precision="float16")
+    with pytest.raises(ValueError, match="requires a GPU"):
+        embedder._apply_precision(StubModel("cpu"))
+    model = StubModel("cuda")
+    assert embedder._apply_precision(model) is model
+    assert model.halved
+
+
+def test_float32_keeps_model():
+    model = StubModel()
+    assert _embedder()._apply_precision(model) is model
+    assert not model.halved
@@ -0,0 +1,121 @@
+from array import array
+import base64
+import math
+
+import pytest
+
+from shared.backends import (
+    LatencyModel,
+    StubBackendError,
+    StubOllama,
+    StubOpenAI,
+    create_ollama_client,
+    create_openai_client,
+    hash_embedding,
+)
+
+
+class TestHashEmbedding:
+    def test_deterministic_unit_length(self):
+        embedding = hash_embedding("retrieval", 16)
+        assert embedding == hash_embedding("retrieval", 16)
+        assert embedding != hash_embedding("generation", 16)
+        assert math.isclose(
+            sum(value * value for value in embedding), 1.0, rel_tol=1e-5
+        )
+
+
+class TestLatencyModel:
+    def test_constant_with_per_item(self):
+        latency = LatencyModel(mean=0.5, per_item=0.1)
+        assert latency.sample(3) == pytest.approx(0.8)
+
+    def test_distributions_are_non_negative(self):
+        for distribution in ("normal", "lognormal", "exponential"):
+            latency = LatencyModel(distribution, mean=0.01, stddev=0.05, seed=0)
+            assert all(latency.sample() >= 0 for _ in range(100))
+
+    def test_lognormal_mean(self):
+        latency = LatencyModel("lognormal", mean=1.0, stddev=0.5, seed=0)
+        samples = [latency.sample() for _ in range(10000)]
+        assert sum(samples) / len(samples) == pytest.approx(1.0, rel=0.05)
+
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            LatencyModel("uniform")
+
+
+class TestStubOpenAI:
+    def test_embeddings_base64(self):
+        client = StubOpenAI({"dimension": 8})
+        response = client.embeddings.create(
+            input=["a b", "c"], model="stub", encoding_format="base64"
+        )
+        assert [data.index for data in response.data] == [0, 1]
+        decoded = array("f", base64.b64decode(response.data[0].embedding))
+        assert decoded == hash_embedding("a b", 8)
+        assert response.usage.prompt_tokens == 3
+
+    def test_embeddings_float(self):
+        client = StubOpenAI({"dimension": 8})
+        response = client.embeddings.create(input=["a"], model="stub")
+        assert len(response.data[0].embedding) == 8
+
+    def test_chat_completion(self):
+        client = StubOpenAI({"response_template": "{model}: {words}"})
+        response = client.chat.completions.create(
+            model="gpt", messages=[{"role": "user", "content": "one two three"}]
+        )
+        assert response.choices[0].message.content == "gpt: 3"
+        assert response.usage.prompt_tokens == 3
+        assert response.usage.completion_tokens == 2
+
+    def test_chat_completion_stream(self):
+        client = StubOpenAI({"response_template": "{model} answers {words}"})
+        chunks = list(
+            client.chat.completions.create(
+                model="gpt",
+                messages=[{"role": "user", "content": "one two three"}],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        )
+        contents = [chunk.choices[0].delta.content for chunk in chunks[:-1]]
+        assert contents == ["gpt", " answers", " 3"]
+        assert chunks[-1].choices == []
+        assert chunks[-1].usage.completion_tokens == 3
+
+    def test_error_rate(self):
+        client = StubOpenAI({"error_rate": 1.0})
+        with pytest.raises(StubBackendError):
+            client.embeddings.create(input=["a"], model="stub")
+
+
+class TestStubOllama:
+    def test_invoke(self):
+        client = StubOllama("llama3", {"response_template": "{model} {prompt}"})
+        assert client.invoke("hello") == "llama3 hello"
+
+    def test_generate_reports_token_counts(self):
+        client = StubOllama("llama3", {"response_template": "{model} {prompt}"})
+        generation = client.generate(["hello world"]).generations[0][0]
+        assert generation.text == "llama3 hello world"
+        assert generation.generation_info == {
+            "prompt_eval_count": 2,
+            "eval_count": 3,
+        }
+
+    def test_stream(self):
+        client = StubOllama("llama3", {"response_template": "{model} {prompt}"})
+        assert list(client.stream("hello world")) == ["llama3", " hello", " world"]
+
+
+class TestCreateClient:
+    def test_stub_clients(self):
+        config = {"llm": "llama3", "client": {"type": "stub"}}
+        assert isinstance(create_openai_client(config), StubOpenAI)
+        assert isinstance(create_ollama_client(config, "llama3"), StubOllama)
+
+    def test_unknown_client(self):
+        with pytest.raises(ValueError):
+            create_openai_client({"client": {"type": "unknown"}})
@@ -0,0 +1,176 @@
+import threading
+
+import pytest
+
+from shared.batching import MicroBatcher, create_batcher
+from shared.instrumentation import Span, instrumentation
+
+
+class RecordingFunction:
+    """Doubles items and records the size of each batch."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def __call__(self, items):
+        self.release.wait(timeout=5)
+        self.batches.append(len(items))
+        return [item * 2 for item in items]
+
+
+def submit_concurrently(batcher, requests):
+    results = [None] * len(requests)
+
+    def submit(ind):
+        results[ind] = batcher.submit(requests[ind])
+
+    threads = [
+        threading.Thread(target=submit, args=(ind,)) for ind in range(len(requests))
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class TestMicroBatcher:
+    def test_single_request(self):
+        function = RecordingFunction()
+        function.release.set()
+        batcher = MicroBatcher(function, max_batch_size=8, max_wait=0.001)
+        assert batcher.submit([1, 2, 3]) == [2, 4, 6]
+        assert batcher.submit([]) == []
+        batcher.close()
+        assert function.batches == [3]
+
+    def test_concurrent_requests_are_batched(self):
+        function = RecordingFunction()
+        batcher = MicroBatcher(function, max_batch_size=100, max_wait=0.2)
+        requests = [[ind, ind + 10] for ind in range(5)]
+        threads, results = submit_concurrently(batcher, requests)
+        function.release.set()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        assert results == [[item * 2 for item in request] for request in requests]
+        assert sum(function.batches) == 10
+        assert len(function.batches) < 5
+
+    def test_batches_stop_at_max_batch_size(self):
+        function = RecordingFunction()
+        function.release.set()
+        batcher = MicroBatcher(function, max_batch_size=2, max_wait=0.5)
+        threads, results = submit_concurrently(batcher, [[1], [2], [3], [4]])
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        assert sorted(sum(results, [])) == [2, 4, 6, 8]
+        assert max(function.batches) <= 2
+
+    def test_errors_reach_all_callers(self):
+        def fail(items):
+            raise ValueError("failed")
+
+        batcher = MicroBatcher(fail, max_batch_size=8, max_wait=0.001)
+        with pytest.raises(ValueError, match="failed"):
+            batcher.submit([1])
+        batcher.close()
+
+    def test_closed(self):
+        batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait=0.001)
+        batcher.close()
+        with pytest.raises(RuntimeError):
+            batcher.submit([1])
+
+    def test_submit_racing_close_never_hangs(self):
+        for _ in range(20):
+            batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait=0)
+            outcomes = []
+
+            def submit():
+                try:
+                    outcomes.append(batcher.submit([1]))
+                except RuntimeError:
+                    outcomes.append(None)
+
+            threads = [threading.Thread(target=submit) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            batcher.close()
+            for thread in threads:
+                thread.join(timeout=5)
+            assert not any(thread.is_alive() for thread in threads)
+            assert all(outcome in ([1], None) for outcome in outcomes)
+
+    def test_stats_and_queue_wait(self):
+        instrumentation.reset()
+        function = RecordingFunction()
+        function.release.set()
+        batcher = MicroBatcher(function, max_batch_size=4, max_wait=0.001, name="test")
+        with instrumentation.span("request") as span:
+            batcher.submit([1, 2])
+        batcher.submit([3])
+        batcher.close()
+
+        stats = batcher.stats()
+        assert stats["batches"] == 2
+        assert stats["requests"] == 2
+        assert stats["items"] == 3
+        assert stats["mean_batch_size"] == 1.5
+        assert stats["mean_fill"] == pytest.approx(0.375)
+        assert stats["queue_wait_p95"] >= stats["queue_wait_p50"] >= 0
+        assert "test_queue_wait" in span.durations()
+        assert instrumentation.summary()["test_queue_wait"]["count"] == 2
+        assert instrumentation.totals()["batch_items"] == 3
+
+    def test_worker_spans_reach_callers(self):
+        def embed(items):
+            with instrumentation.span("embedding") as span:
+                span.add("embedding_tokens", 10 * len(items))
+            return items
+
+        function = RecordingFunction()
+        batcher = MicroBatcher(
+            lambda items: function(embed(items)), max_batch_size=100, max_wait=0.2
+        )
+        spans = [None] * 3
+
+        def run(ind):
+            with instrumentation.span("run") as run_span:
+                batcher.submit(list(range(ind + 1)))
+            spans[ind] = run_span
+
+        threads = [threading.Thread(target=run, args=(ind,)) for ind in range(3)]
+        for thread in threads:
+            thread.start()
+        function.release.set()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+
+        assert [span.totals()["embedding_tokens"] for span in spans] == [10, 20, 30]
+        for span in spans:
+            assert {"batch", "embedding", "batch_queue_wait"} <= set(span.durations())
+
+
+def test_split_divides_counters():
+    span = Span("batch", {"tokens": 10, "items": 3})
+    span.duration = 1.0
+    child = Span("embedding", {"tokens": 7})
+    span.children.append(child)
+    shares = span.split([1, 1, 1])
+    assert [share.counters["tokens"] for share in shares] == [4, 3, 3]
+    assert [share.counters["items"] for share in shares] == [1, 1, 1]
+    assert sum(share.children[0].counters["tokens"] for share in shares) == 7
+    assert all(
+        share.durations() == {"batch": 1.0, "embedding": 0.0} for share in shares
+    )
+
+
+def test_create_batcher():
+    assert create_batcher(lambda items: items, None, "test") is None
+    batcher = create_batcher(
+        lambda items: items, {"max_batch_size": 16, "max_wait_ms": 2}, "test"
+    )
+    assert (batcher.max_batch_size, batcher.max_wait) == (16, 0.002)
+    batcher.close()
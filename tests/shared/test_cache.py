@@ -0,0 +1,28 @@
+from shared.cache import Cache, cache_key, text_hash
+
+
+def test_text_hash_depends_on_boundaries():
+    assert text_hash(["ab", "c"]) == text_hash(["ab", "c"])
+    assert text_hash(["ab", "c"]) != text_hash(["a", "bc"])
+    assert text_hash(["a", "b"]) != text_hash(["b", "a"])
+    assert cache_key("model", "query") != cache_key("model", "query", "")
+
+
+def test_get_many_returns_stored_values(tmp_path):
+    cache = Cache(str(tmp_path / "cache.sqlite"))
+    cache.put_many({"a": 0.5, "b": {"score": 1}})
+    assert cache.get_many(["a", "b", "unknown", "a"]) == {"a": 0.5, "b": {"score": 1}}
+    cache.put_many({"a": 0.25})
+    assert cache.get_many(["a"]) == {"a": 0.25}
+    assert len(cache) == 2
+    cache.close()
+
+
+def test_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = Cache(path)
+    cache.put_many({str(ind): ind for ind in range(2000)})
+    cache.close()
+    cache = Cache(path)
+    assert len(cache.get_many([str(ind) for ind in range(2000)])) == 2000
+    cache.close()
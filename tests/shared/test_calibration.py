@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from shared.calibration import (  # noqa: E402
+    best_setting,
+    calibrate,
+    exact_top_k,
+    format_results,
+    recall_at_k,
+)
+from shared.models import CalibrationResult  # noqa: E402
+
+
+def _result(search_ef, recall, latency_p50):
+    return CalibrationResult(
+        M=16,
+        construction_ef=100,
+        search_ef=search_ef,
+        recall=recall,
+        latency_p50=latency_p50,
+        latency_p95=latency_p50 * 2,
+        build_time=1.0,
+    )
+
+
+def test_exact_top_k():
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    queries = np.array([[1.0, 0.1], [0.1, 1.0]])
+    top = exact_top_k(vectors, queries, 2)
+    assert [set(row) for row in top] == [{0, 2}, {1, 2}]
+
+
+def test_recall_at_k():
+    approximate = np.array([[0, 1], [2, 3]])
+    exact = np.array([[1, 0], [2, 4]])
+    assert recall_at_k(approximate, exact) == pytest.approx(0.75)
+
+
+def test_best_setting_fastest_reaching_target():
+    results = [
+        _result(10, 0.8, 0.001),
+        _result(50, 0.96, 0.002),
+        _result(100, 0.99, 0.004),
+    ]
+    assert best_setting(results, 0.95).search_ef == 50
+
+
+def test_best_setting_highest_recall_below_target():
+    results = [_result(10, 0.8, 0.001), _result(50, 0.9, 0.002)]
+    assert best_setting(results, 0.95).search_ef == 50
+    assert best_setting([], 0.95) is None
+
+
+def test_format_results():
+    lines = format_results([_result(10, 0.8, 0.001)]).splitlines()
+    assert len(lines) == 2
+    assert "0.800" in lines[1]
+
+
+def test_calibrate():
+    pytest.importorskip("hnswlib")
+    vectors = np.random.default_rng(0).normal(size=(300, 16)).astype(np.float32)
+    results = calibrate(
+        vectors,
+        num_queries=20,
+        top_k=5,
+        grid_M=[8],
+        grid_construction_ef=[100],
+        grid_search_ef=[10, 200],
+    )
+    assert [result.search_ef for result in results] == [10, 200]
+    assert results[1].recall >= results[0].recall
+    assert results[1].recall > 0.9
+    assert results[0].parameters["search_ef"] == 10
+
+
+@pytest.mark.parametrize("num_vectors", [0, 3, 5])
+def test_calibrate_too_few_vectors(num_vectors):
+    vectors = np.ones((num_vectors, 16), dtype=np.float32)
+    results = calibrate(
+        vectors,
+        num_queries=20,
+        top_k=5,
+        grid_M=[8],
+        grid_construction_ef=[100],
+        grid_search_ef=[10],
+    )
+    assert results == []
+    assert best_setting(results, 0.95) is None
@@ -0,0 +1,51 @@
+from shared.chunk_store import ChunkStore, get_chunk_id
+from shared.models import Document, Source
+
+
+def _chunk(text, page=1, source="a.pdf"):
+    return Document(
+        page_content=text, source=Source(title="A", source=source), page=page
+    )
+
+
+def test_chunk_id_is_deterministic():
+    assert get_chunk_id(_chunk("text")) == get_chunk_id(_chunk("text"))
+    assert get_chunk_id(_chunk("text")) != get_chunk_id(_chunk("other"))
+    assert get_chunk_id(_chunk("text")) != get_chunk_id(_chunk("text", page=2))
+    assert get_chunk_id(_chunk("text")) != get_chunk_id(_chunk("text", source="b.pdf"))
+
+
+def test_add_skips_stored_chunks(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    assert store.add(["a", "b"], ["text a", "text b"]) == 2
+    assert store.add(["b", "c"], ["changed b", "text c"]) == 1
+    assert len(store) == 3
+    assert store.get(["b"]) == ["text b"]
+    store.close()
+
+
+def test_get_keeps_order(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    ids = [str(ind) for ind in range(2000)]
+    store.add(ids, [f"text {chunk_id}" for chunk_id in ids])
+    requested = ["1999", "unknown", "0", "1999"]
+    assert store.get(requested) == ["text 1999", None, "text 0", "text 1999"]
+    store.close()
+
+
+def test_persists(tmp_path):
+    path = str(tmp_path / "chunks.sqlite")
+    store = ChunkStore(path)
+    store.add(["a"], ["text a"])
+    store.close()
+    assert ChunkStore(path).get(["a"]) == ["text a"]
+
+
+def test_find_returns_ids_by_text(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    store.add(["a", "b", "c"], ["text a", "text b", "text a"])
+    assert store.find(["text a", "unknown", "text b"]) == {
+        "text a": ["a", "c"],
+        "text b": ["b"],
+    }
+    store.close()
@@ -0,0 +1,32 @@
+import pytest
+
+from shared.costs import PriceTable
+
+
+class TestPriceTable:
+    @pytest.fixture
+    def price_table(self):
+        return PriceTable(
+            {
+                "gpt-3.5-turbo": {"input": 0.5, "output": 1.5},
+                "text-embedding-3-small": {"input": 0.02},
+            }
+        )
+
+    def test_cost(self, price_table):
+        counters = {
+            "prompt_tokens": 1_000_000,
+            "completion_tokens": 2_000_000,
+            "embedding_tokens": 500_000,
+        }
+        assert price_table.cost(
+            counters, "gpt-3.5-turbo", "text-embedding-3-small"
+        ) == pytest.approx(0.5 + 3.0 + 0.01)
+
+    def test_cost_without_embedding_model(self, price_table):
+        counters = {"prompt_tokens": 1_000_000, "embedding_tokens": 1_000_000}
+        assert price_table.cost(counters, "gpt-3.5-turbo") == pytest.approx(0.5)
+
+    def test_unknown_models_are_free(self, price_table):
+        assert price_table.cost({"prompt_tokens": 1000}, "llama3") == 0.0
+        assert PriceTable(None).cost({"prompt_tokens": 1000}, "gpt-3.5-turbo") == 0.0
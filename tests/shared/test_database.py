@@ -0,0 +1,147 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from shared.database import ChromaDB  # noqa: E402
+from shared.models import Document, Source  # noqa: E402
+
+
+class FakeCollection:
+    """Stores embeddings and optionally documents by id, returning `get` results
+    in storage order like Chroma."""
+
+    def __init__(self, name, metadata):
+        self.name = name
+        self.metadata = metadata
+        self.embeddings = {}
+        self.documents = {}
+        self.upserts = []
+
+    def count(self):
+        return len(self.embeddings)
+
+    def upsert(self, embeddings, ids):
+        self.upserts.append(list(ids))
+        self.embeddings.update(zip(ids, np.asarray(embeddings).tolist()))
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        stored = [
+            chunk_id for chunk_id in self.embeddings if ids is None or chunk_id in ids
+        ]
+        stored = stored[offset : None if limit is None else offset + limit]
+        return {
+            "ids": stored,
+            "embeddings": [self.embeddings[chunk_id] for chunk_id in stored],
+            "documents": [self.documents.get(chunk_id) for chunk_id in stored],
+        }
+
+
+class FakeClient:
+    def __init__(self, collections=None):
+        self.collections = collections or {}
+        self.created = []
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    def create_collection(self, name, metadata):
+        self.created.append(name)
+        self.collections[name] = FakeCollection(name, metadata)
+        return self.collections[name]
+
+    def get_max_batch_size(self):
+        return 2
+
+
+def _database(tmp_path, client, name="test", config_hnsw=None):
+    class FakeChromaDB(ChromaDB):
+        def _create_client(self):
+            return client
+
+    config = {"database": {"path": str(tmp_path)}}
+    return FakeChromaDB(config, name, config_hnsw)
+
+
+def test_creates_collection_with_hnsw_parameters(tmp_path):
+    client = FakeClient()
+    database = _database(tmp_path, client, config_hnsw={"M": 32})
+    assert client.created == ["test"]
+    assert database.collection.metadata == {"hnsw:space": "cosine", "hnsw:M": 32}
+
+
+def test_keeps_parameters_of_existing_collection(tmp_path, caplog):
+    metadata = {"hnsw:space": "cosine", "hnsw:M": 16}
+    client = FakeClient({"test": FakeCollection("test", dict(metadata))})
+    database = _database(tmp_path, client, config_hnsw={"M": 32})
+    assert client.created == []
+    assert database.collection.metadata == metadata
+    assert "re-create it" in caplog.text
+
+    caplog.clear()
+    _database(tmp_path, client)
+    assert database.collection.metadata == metadata
+    assert "re-create it" not in caplog.text
+
+
+def test_unknown_hnsw_parameter(tmp_path):
+    with pytest.raises(ValueError, match="Unknown HNSW parameter"):
+        _database(tmp_path, FakeClient(), config_hnsw={"ef": 10})
+
+
+def _chunk(text, embedding):
+    return Document(
+        page_content=text,
+        source=Source(title="A", source="a.pdf"),
+        page=1,
+        embedding=np.asarray(embedding, dtype=np.float32),
+    )
+
+
+def test_add_chunks_deduplicates_ids(tmp_path):
+    database = _database(tmp_path, FakeClient())
+    chunks = [
+        _chunk("a", [1, 0]),
+        _chunk("b", [0, 1]),
+        _chunk("a", [1, 0]),
+        _chunk("c", [1, 1]),
+    ]
+    ids = database.add_chunks(chunks)
+    assert ids[0] == ids[2]
+    assert len(set(ids)) == 3
+    assert database.collection.upserts == [[ids[0], ids[1]], [ids[3]]]
+    assert database.get_documents(ids) == ["a", "b", "a", "c"]
+
+
+def test_get_documents_falls_back_to_collection(tmp_path):
+    database = _database(tmp_path, FakeClient())
+    (chunk_id,) = database.add_chunks([_chunk("stored", [1, 0])])
+    # A chunk ingested before the chunk store existed.
+    database.collection.upsert(embeddings=[[0, 1]], ids=["legacy"])
+    database.collection.documents["legacy"] = "legacy text"
+    assert database.get_documents(["legacy", chunk_id]) == ["legacy text", "stored"]
+    assert database._get_documents_per_query([[chunk_id], [], ["legacy"]]) == [
+        ["stored"],
+        [],
+        ["legacy text"],
+    ]
+
+
+def test_get_documents_without_text(tmp_path):
+    database = _database(tmp_path, FakeClient())
+    database.collection.upsert(embeddings=[[0, 1]], ids=["unknown"])
+    with pytest.raises(KeyError):
+        database.get_documents(["unknown"])
+
+
+def test_get_candidates_in_requested_order(tmp_path):
+    database = _database(tmp_path, FakeClient())
+    ids = database.add_chunks(
+        [_chunk("a", [1, 0]), _chunk("b", [0, 1]), _chunk("c", [1, 1])]
+    )
+    candidates = database.get_candidates([ids[2], "missing", ids[0]])
+    assert candidates.ids == [ids[2], ids[0]]
+    assert candidates.documents == ["c", "a"]
+    assert candidates.embeddings.tolist() == [[1, 1], [1, 0]]
+    assert candidates.distances == [0.0, 0.0]
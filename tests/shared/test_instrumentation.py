@@ -0,0 +1,81 @@
+import pytest
+
+from shared.instrumentation import Instrumentation, percentile, tokens_per_second
+
+
+class TestPercentile:
+    def test_percentile_interpolates(self):
+        assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+
+    def test_percentile_bounds(self):
+        values = [3.0, 1.0, 2.0]
+        assert percentile(values, 0) == 1.0
+        assert percentile(values, 100) == 3.0
+
+    def test_percentile_empty(self):
+        assert percentile([], 95) == 0.0
+
+
+class TestInstrumentation:
+    @pytest.fixture
+    def instrumentation(self):
+        return Instrumentation()
+
+    def test_nested_spans(self, instrumentation):
+        with instrumentation.span("query") as query_span:
+            with instrumentation.span("generation"):
+                instrumentation.count("tokens", 10)
+            with instrumentation.span("generation"):
+                instrumentation.count("tokens", 5)
+
+        assert [child.name for child in query_span.children] == [
+            "generation",
+            "generation",
+        ]
+        assert set(query_span.durations()) == {"query", "generation"}
+        assert query_span.totals() == {"tokens": 15}
+        assert query_span.summary()["generation"]["count"] == 2
+
+    def test_process_wide_summary(self, instrumentation):
+        for _ in range(3):
+            with instrumentation.span("embedding", texts=2):
+                pass
+
+        summary = instrumentation.summary()
+        assert summary["embedding"]["count"] == 3
+        assert instrumentation.totals() == {"texts": 6}
+
+        instrumentation.reset()
+        assert instrumentation.summary() == {}
+
+    def test_count_without_span(self, instrumentation):
+        instrumentation.count("tokens", 3)
+        assert instrumentation.totals() == {}
+
+    def test_span_records_on_error(self, instrumentation):
+        with pytest.raises(ValueError):
+            with instrumentation.span("generation"):
+                raise ValueError
+
+        assert instrumentation.summary()["generation"]["count"] == 1
+
+    def test_record(self, instrumentation):
+        with instrumentation.span("query") as query_span:
+            instrumentation.record("queue_wait", 0.25)
+        instrumentation.record("queue_wait", 0.75)
+
+        assert query_span.durations()["queue_wait"] == 0.25
+        assert instrumentation.summary()["queue_wait"]["total"] == 1.0
+
+
+class TestTokensPerSecond:
+    def test_decoding_rate_after_first_token(self):
+        timings = {"generation": 1.5, "ttft": 0.5}
+        assert tokens_per_second(timings, {"completion_tokens": 11}) == 10.0
+
+    def test_not_streamed(self):
+        assert tokens_per_second({"generation": 1.0}, {"completion_tokens": 11}) is None
+
+    def test_single_token(self):
+        timings = {"generation": 0.5, "ttft": 0.5}
+        assert tokens_per_second(timings, {"completion_tokens": 1}) is None
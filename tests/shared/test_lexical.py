@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from shared.lexical import LexicalIndex, tokenize  # noqa: E402
+
+
+@pytest.fixture
+def index():
+    index = LexicalIndex()
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Retrieval augmented generation combines retrieval and generation.",
+            "Dense passage retrieval uses a bi-encoder.",
+            "BART is a sequence to sequence model.",
+        ],
+    )
+    return index
+
+
+class TestLexicalIndex:
+    def test_tokenize(self):
+        assert tokenize("Bi-encoder, BART!") == ["bi", "encoder", "bart"]
+
+    def test_search(self, index):
+        ids, scores = index.search(["retrieval generation", "bart model"], 2)
+        assert ids == [["a", "b"], ["c"]]
+        assert scores[0][0] > scores[0][1] > 0
+
+    def test_add_extends_vocabulary(self, index):
+        index.add(["d"], ["A completely new vocabulary."])
+        ids, _ = index.search(["vocabulary"], 5)
+        assert ids == [["d"]]
+        assert len(index) == 4
+
+    def test_save_and_load(self, index, tmp_path):
+        index.save(str(tmp_path))
+        loaded = LexicalIndex.load(str(tmp_path))
+        assert loaded.ids == index.ids
+        assert (loaded.scores(["sequence"]) == index.scores(["sequence"])).all()
+
+    def test_load_or_create(self, tmp_path):
+        assert len(LexicalIndex.load_or_create(str(tmp_path / "missing"))) == 0
@@ -0,0 +1,91 @@
+import os
+import threading
+
+import pytest
+
+from shared.page_cache import PageCache, read_pages, write_pages
+
+
+def test_write_read_round_trip(tmp_path):
+    path = str(tmp_path / "doc.pages")
+    pages = ["First page", "", "Zweite Seite – ü ∑ 🚀", "x" * 100_000]
+    write_pages(path, pages)
+    assert read_pages(path) == pages
+    assert os.path.getsize(path) < 1000
+    write_pages(path, [])
+    assert read_pages(path) == []
+
+
+def test_concurrent_writes_of_same_key(tmp_path):
+    path = str(tmp_path / "doc.pages")
+    pages = [
+        [f"page {ind} of writer {writer}" for ind in range(50)] for writer in range(8)
+    ]
+    threads = [
+        threading.Thread(target=write_pages, args=(path, writer_pages))
+        for writer_pages in pages
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert read_pages(path) in pages
+    assert os.listdir(tmp_path) == ["doc.pages"]
+
+
+def test_key_depends_on_content_version_and_options(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 one")
+    cache = PageCache(str(tmp_path / "cache"), "4.3.1", {"extraction_mode": "plain"})
+    key = cache.key(str(pdf))
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(b"%PDF-1.4 one")
+    assert cache.key(str(copy)) == key
+    assert (
+        PageCache(str(tmp_path / "cache"), "5.0.0", {"extraction_mode": "plain"}).key(
+            str(pdf)
+        )
+        != key
+    )
+    assert (
+        PageCache(str(tmp_path / "cache"), "4.3.1", {"extraction_mode": "layout"}).key(
+            str(pdf)
+        )
+        != key
+    )
+    pdf.write_bytes(b"%PDF-1.4 two")
+    assert cache.key(str(pdf)) != key
+
+
+def test_get_returns_stored_pages(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    cache = PageCache(str(tmp_path / "cache"), "4.3.1", {})
+    assert cache.get(str(pdf)) is None
+    cache.put(str(pdf), ["a", "b"])
+    assert cache.get(str(pdf)) == ["a", "b"]
+    pdf.write_bytes(b"%PDF-1.5")
+    assert cache.get(str(pdf)) is None
+
+
+def test_get_ignores_unreadable_files(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    cache = PageCache(str(tmp_path / "cache"), "4.3.1", {})
+    cache.put(str(pdf), ["a", "b"])
+    (cache_file,) = (tmp_path / "cache").iterdir()
+    cache_file.write_bytes(b"garbage and more garbage")
+    assert cache.get(str(pdf)) is None
+
+
+@pytest.mark.parametrize("size", [6, 16, 32, 40])
+def test_get_ignores_truncated_files(tmp_path, size):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    cache = PageCache(str(tmp_path / "cache"), "4.3.1", {})
+    cache.put(str(pdf), ["first page", "second page"])
+    (cache_file,) = (tmp_path / "cache").iterdir()
+    data = cache_file.read_bytes()
+    assert len(data) > size
+    cache_file.write_bytes(data[:size])
+    assert cache.get(str(pdf)) is None
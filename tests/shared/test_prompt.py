@@ -0,0 +1,60 @@
+import logging
+
+import pytest
+
+from shared import AbstractTokenizer
+from shared.prompt import ContextPacker, create_prompt
+
+
+class WhitespaceTokenizer(AbstractTokenizer):
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_tokens = 1000
+        self.model = "whitespace"
+        self.num_calls = 0
+
+    def tokenize_text(self, text: str) -> list[int]:
+        self.num_calls += 1
+        return [len(word) for word in text.split()]
+
+
+TEMPLATE = "Question: {query} Contexts: {contexts}"
+
+
+class TestCreatePrompt:
+    def test_create_prompt(self):
+        assert create_prompt(TEMPLATE, "q", ["a", "b"]) == "Question: q Contexts: a|b"
+
+
+class TestContextPacker:
+    @pytest.fixture
+    def tokenizer(self):
+        return WhitespaceTokenizer()
+
+    def test_all_contexts_fit(self, tokenizer):
+        packer = ContextPacker(tokenizer, max_tokens=100)
+        contexts = ["one two", "three four"]
+        assert packer.pack(TEMPLATE, "query", contexts) == contexts
+
+    def test_duplicates_are_skipped(self, tokenizer):
+        packer = ContextPacker(tokenizer, max_tokens=100)
+        assert packer.pack(TEMPLATE, "query", ["a b", "c", "a b"]) == ["a b", "c"]
+
+    def test_last_context_is_truncated(self, tokenizer):
+        packer = ContextPacker(tokenizer, max_tokens=10, min_truncated_tokens=2)
+        # The template with the query takes 3 tokens and the separator 1,
+        # leaving 3 tokens for the second context.
+        contexts = ["a b c", "d e f g h", "i j"]
+        assert packer.pack(TEMPLATE, "query", contexts) == ["a b c", "d e f"]
+
+    def test_short_remainder_is_dropped(self, tokenizer):
+        packer = ContextPacker(tokenizer, max_tokens=10, min_truncated_tokens=4)
+        assert packer.pack(TEMPLATE, "query", ["a b c", "d e f g h"]) == ["a b c"]
+
+    def test_token_counts_are_cached(self, tokenizer):
+        packer = ContextPacker(tokenizer, max_tokens=100)
+        contexts = ["one two", "three four"]
+        packer.pack(TEMPLATE, "query", contexts)
+        num_calls = tokenizer.num_calls
+        packer.pack(TEMPLATE, "query", contexts)
+        assert tokenizer.num_calls == num_calls
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from shared import registry
+from shared.registry import format_import_times, get_pipeline, load_object
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_load_object_records_import_time():
+    assert load_object("shared.prompt:create_prompt").__name__ == "create_prompt"
+    assert "shared.prompt:create_prompt" in registry.import_times
+    assert "shared.prompt:create_prompt: " in format_import_times()
+
+
+def test_unknown_pipeline():
+    with pytest.raises(ValueError, match="Unknown pipeline"):
+        get_pipeline("unknown")
+
+
+# Only imported by the pipelines or features that need them. An eager import
+# fails the test, either as a listed module or as an import error where the
+# module is not installed, e.g. in CI.
+LAZY_MODULES = (
+    "openai_pipeline",
+    "local_pipeline",
+    "chromadb",
+    "scipy",
+    "torch",
+    "sentence_transformers",
+)
+
+
+@pytest.mark.parametrize(
+    "module, requirements",
+    [
+        ("run_experiments", ("numpy", "yaml")),
+        ("run_ingestion", ("numpy", "yaml", "pypdf", "langchain_text_splitters")),
+        ("shared.database", ("numpy",)),
+        ("shared.retrieval", ("numpy",)),
+    ],
+)
+def test_imports_are_lazy(module, requirements):
+    for requirement in requirements:
+        pytest.importorskip(requirement)
+    code = (
+        f"import sys, {module}; "
+        f"print([name for name in {LAZY_MODULES!r} if name in sys.modules])"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.strip() == "[]"
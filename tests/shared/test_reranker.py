@@ -0,0 +1,60 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from shared.models import Candidates  # noqa: E402
+from shared.reranker import CrossEncoderReranker  # noqa: E402
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of query words in the text."""
+
+    def __init__(self):
+        self.num_pairs = 0
+
+    def predict(self, pairs, batch_size, convert_to_numpy, show_progress_bar):
+        self.num_pairs += len(pairs)
+        return np.array(
+            [
+                sum(word in text.split() for word in query.split())
+                for query, text in pairs
+            ],
+            dtype=np.float32,
+        )
+
+
+class FakeReranker(CrossEncoderReranker):
+    def _load_model(self):
+        return FakeCrossEncoder()
+
+
+def make_candidates(documents: list[str]) -> Candidates:
+    return Candidates(
+        ids=[f"id-{document}" for document in documents],
+        documents=documents,
+        embeddings=np.zeros((len(documents), 2), dtype=np.float32),
+        distances=[0.0] * len(documents),
+    )
+
+
+class TestCrossEncoderReranker:
+    @pytest.fixture
+    def reranker(self):
+        return FakeReranker({})
+
+    def test_rerank_orders_by_score(self, reranker):
+        candidates = [
+            make_candidates(["a", "a b", "a b c"]),
+            make_candidates(["x y", "z"]),
+        ]
+        orders = reranker.rerank(["a b c", "z"], candidates)
+        assert orders == [[2, 1, 0], [1, 0]]
+        assert candidates[0].select(orders[0]).documents == ["a b c", "a b", "a"]
+
+    def test_scores_are_cached(self, reranker):
+        candidates = [make_candidates(["a", "a b"])]
+        reranker.rerank(["a b"], candidates)
+        reranker.rerank(["a b"], candidates)
+        assert reranker.model.num_pairs == 2
+        reranker.rerank(["b"], candidates)
+        assert reranker.model.num_pairs == 4
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from shared.resources import Resources
+
+
+class TestResources:
+    def test_get_creates_once_per_key(self):
+        resources = Resources()
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        first = resources.get("model", "a", factory)
+        assert resources.get("model", "a", factory) is first
+        assert resources.get("model", "b", factory) is not first
+        assert resources.get("tokenizer", "a", factory) is not first
+        assert len(calls) == 3
+        assert (resources.hits, resources.misses) == (1, 3)
+
+    def test_clear(self):
+        resources = Resources()
+        model = resources.get("model", "a", object)
+        tokenizer = resources.get("tokenizer", "a", object)
+        resources.clear("model")
+        assert ("model", "a") not in resources
+        assert resources.get("tokenizer", "a", object) is tokenizer
+        assert resources.get("model", "a", object) is not model
+        resources.clear()
+        assert ("tokenizer", "a") not in resources
+
+    def test_concurrent_requests_create_once(self):
+        resources = Resources()
+        calls = []
+
+        def factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(resources.get("model", "a", factory))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert len(set(map(id, results))) == 1
@@ -0,0 +1,148 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from shared.models import ExperimentResults, QueryResult
+from shared.results import (
+    ResultsWriter,
+    iter_query_results,
+    iter_records,
+    load_experiment_results,
+    rewrite_results_file,
+)
+
+
+@pytest.fixture
+def experiment_results():
+    template = "Question: {query} Contexts: {contexts}"
+    return ExperimentResults(
+        results=[
+            QueryResult(
+                query="query1",
+                contexts=["doc1", "doc2"],
+                template=template,
+                response="response1",
+                evaluations={"RR": 1.0},
+                timings={"generation": 0.5, "ttft": 0.2},
+                counters={"prompt_tokens": 120, "completion_tokens": 30},
+                cost=0.000105,
+                tokens_per_second=96.7,
+            ),
+            QueryResult(
+                query="query2",
+                contexts=["doc3"],
+                template=template,
+                response="response2",
+                evaluations={"RR": 0.5},
+            ),
+        ],
+        model="model",
+        parameters=[{"chunk_size": 512}],
+        timestamp_end=datetime(2024, 6, 1, 12, 30, 0),
+        evaluations={"MRR": 0.75},
+        cost=0.000105,
+        evaluators={"order_aware": {"fingerprint": "abc", "metrics": ["MRR", "RR"]}},
+    )
+
+
+class TestResultsWriter:
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_round_trip(self, tmp_path, experiment_results, compress):
+        with ResultsWriter(str(tmp_path), compress=compress) as writer:
+            writer.write_experiment(experiment_results)
+
+        assert writer.path.endswith(".jsonl.gz" if compress else ".jsonl")
+        assert load_experiment_results(writer.path) == [experiment_results]
+
+    def test_records(self, tmp_path, experiment_results):
+        with ResultsWriter(str(tmp_path)) as writer:
+            writer.write_experiment(experiment_results)
+            writer.write_experiment(experiment_results)
+
+        record_types = [record["type"] for record in iter_records(writer.path)]
+        assert record_types == ["experiment", "query", "query", "summary"] * 2
+
+    def test_prompt_is_rendered_from_template(self, tmp_path, experiment_results):
+        with ResultsWriter(str(tmp_path)) as writer:
+            writer.write_experiment(experiment_results)
+
+        query_results = list(iter_query_results(writer.path))
+        assert query_results[0][0] == 0
+        assert query_results[0][1].prompt == "Question: query1 Contexts: doc1|doc2"
+
+
+@pytest.mark.parametrize("name", ["results.jsonl", "results.jsonl.gz"])
+def test_rewrite_results_file(tmp_path, experiment_results, name):
+    path = str(tmp_path / name)
+    rewrite_results_file(path, [experiment_results])
+    experiment_results.evaluations = {"MRR": 1.0}
+    rewrite_results_file(path, [experiment_results, experiment_results])
+
+    assert load_experiment_results(path) == [experiment_results] * 2
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+
+
+class TestLoadExperimentResults:
+    def test_load_legacy_json(self, tmp_path):
+        path = tmp_path / "results.json"
+        data = [
+            {
+                "results": [
+                    {
+                        "query": "query1",
+                        "contexts": ["doc1"],
+                        "prompt": "Question: query1 {with braces} Contexts: doc1",
+                        "response": "response1",
+                        "evaluations": {"RR": 1.0},
+                    }
+                ],
+                "model": "model",
+                "parameters": [{"chunk_size": 512}],
+                "timestamp_end": "2024-06-01 12:30:00",
+                "evaluations": {"MRR": 1.0},
+            }
+        ]
+        path.write_text(json.dumps(data))
+
+        experiment_results = load_experiment_results(str(path))
+
+        assert len(experiment_results) == 1
+        assert experiment_results[0].timestamp_end == datetime(2024, 6, 1, 12, 30, 0)
+        assert (
+            experiment_results[0].results[0].prompt
+            == "Question: query1 {with braces} Contexts: doc1"
+        )
+
+    def test_rewrite_legacy_json(self, tmp_path):
+        path = tmp_path / "results.json"
+        prompt = "Question: query1 {with braces} Contexts: doc1"
+        data = [
+            {
+                "results": [
+                    {
+                        "query": "query1",
+                        "contexts": ["doc1"],
+                        "prompt": prompt,
+                        "response": "response1",
+                        "evaluations": {"RR": 1.0},
+                    }
+                ],
+                "model": "model",
+                "parameters": [{"chunk_size": 512}],
+                "timestamp_end": "2024-06-01 12:30:00",
+                "evaluations": {"MRR": 1.0},
+            }
+        ]
+        path.write_text(json.dumps(data))
+        (experiment_results,) = load_experiment_results(str(path))
+        experiment_results.evaluations = {"MRR": 0.5}
+        experiment_results.evaluators = {"order_aware": {"fingerprint": "abc"}}
+
+        rewrite_results_file(str(path), [experiment_results])
+
+        data[0]["evaluations"] = {"MRR": 0.5}
+        data[0]["evaluators"] = {"order_aware": {"fingerprint": "abc"}}
+        assert json.loads(path.read_text()) == data
+        assert load_experiment_results(str(path)) == [experiment_results]
+        assert [p.name for p in tmp_path.iterdir()] == ["results.json"]
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from shared.models import ExperimentResults, QueryResult
+from shared.results_store import ResultsStore, flatten_parameters
+
+
+def make_experiment_results(chunk_size: int, ndcg: list[float]) -> ExperimentResults:
+    return ExperimentResults(
+        results=[
+            QueryResult(
+                query=f"query{ind}",
+                contexts=["doc1"],
+                template="{query} {contexts}",
+                response="response",
+                evaluations={"NDCG@3": value},
+                cost=0.001,
+            )
+            for ind, value in enumerate(ndcg)
+        ],
+        model="gpt-3.5-turbo",
+        parameters=[
+            {"method": "recursive", "chunk_size": chunk_size},
+            {"llm": "gpt-3.5-turbo"},
+        ],
+        timestamp_end=datetime(2024, 6, 1, 12, 30, 0),
+        evaluations={"avg_NDCG@3": sum(ndcg) / len(ndcg)},
+        cost=0.001 * len(ndcg) * chunk_size / 256,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    store.add_experiment(make_experiment_results(1024, [0.5, 0.7]))
+    store.add_experiment(make_experiment_results(256, [1.0, 0.0]))
+    yield store
+    store.close()
+
+
+class TestFlattenParameters:
+    def test_flatten_parameters(self):
+        assert flatten_parameters([{"a": 1, "b": {"c": 2}}, {"d": "e"}]) == {
+            "a": 1,
+            "b.c": 2,
+            "d": "e",
+        }
+
+
+class TestResultsStore:
+    def test_metric_by_parameter(self, store):
+        assert store.metric_by_parameter("avg_NDCG@3", "chunk_size") == [
+            (256, 0.5, 2, "gpt-3.5-turbo"),
+            (1024, 0.6, 1, "gpt-3.5-turbo"),
+        ]
+
+    def test_metric_by_parameter_per_query(self, store):
+        rows = store.metric_by_parameter("NDCG@3", "chunk_size", per_query=True)
+        assert [(row[0], row[1], row[4]) for row in rows] == [
+            (256, 1.0, 0),
+            (256, 0.0, 1),
+            (1024, 0.5, 0),
+            (1024, 0.7, 1),
+        ]
+
+    def test_cost_by_parameter(self, store):
+        assert store.metric_by_parameter("cost", "chunk_size") == [
+            (256, 0.002, 2, "gpt-3.5-turbo"),
+            (1024, 0.008, 1, "gpt-3.5-turbo"),
+        ]
+        rows = store.metric_by_parameter("cost", "chunk_size", per_query=True)
+        assert [row[1] for row in rows] == [0.001] * 4
+
+    def test_remove_results_file(self, tmp_path):
+        store = ResultsStore(str(tmp_path / "results.sqlite"))
+        store.add_experiment(make_experiment_results(256, [1.0]), results_file="a")
+        store.add_experiment(make_experiment_results(512, [1.0]), results_file="b")
+        assert store.remove_results_file("a") == 1
+        assert store.find_runs() == [2]
+        assert store.metric_by_parameter("NDCG@3", "chunk_size", per_query=True) == [
+            (512, 1.0, 2, "gpt-3.5-turbo", 0)
+        ]
+        store.close()
+
+    def test_find_runs(self, store):
+        assert store.find_runs() == [1, 2]
+        assert store.find_runs(chunk_size=256) == [2]
+        assert store.find_runs(chunk_size=256, llm="gpt-3.5-turbo") == [2]
+        assert store.find_runs(chunk_size=512) == []
@@ -0,0 +1,138 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from shared.lexical import LexicalIndex  # noqa: E402
+from shared.models import Candidates  # noqa: E402
+from shared.retrieval import (  # noqa: E402
+    Retriever,
+    dedup_cosine,
+    dedup_minhash,
+    mmr,
+    reciprocal_rank_fusion,
+    weighted_fusion,
+)
+
+
+@pytest.fixture
+def embeddings():
+    # Candidates 0 and 1 are near-duplicates, 2 points elsewhere.
+    return np.array([[1.0, 0.0], [0.99, 0.1], [0.6, 0.8]], dtype=np.float32)
+
+
+class TestDedupCosine:
+    def test_skips_near_duplicates(self, embeddings):
+        assert dedup_cosine(embeddings, top_k=3, threshold=0.9) == [0, 2]
+
+    def test_top_k(self, embeddings):
+        assert dedup_cosine(embeddings, top_k=1, threshold=0.9) == [0]
+        assert dedup_cosine(embeddings, top_k=3, threshold=1.0) == [0, 1, 2]
+
+
+class TestMMR:
+    def test_prefers_diverse_candidates(self, embeddings):
+        query = np.array([1.0, 0.0], dtype=np.float32)
+        assert mmr(query, embeddings, top_k=2, mmr_lambda=0.3) == [0, 2]
+
+    def test_relevance_only(self, embeddings):
+        query = np.array([1.0, 0.0], dtype=np.float32)
+        assert mmr(query, embeddings, top_k=2, mmr_lambda=1.0) == [0, 1]
+
+
+class TestDedupMinhash:
+    def test_skips_overlapping_texts(self):
+        words = [f"word{ind}" for ind in range(100)]
+        texts = [
+            " ".join(words[:60]),
+            " ".join(words[5:65]),
+            " ".join(words[60:]),
+        ]
+        assert dedup_minhash(texts, top_k=3, threshold=0.5) == [0, 2]
+
+
+class TestFusion:
+    def test_reciprocal_rank_fusion(self):
+        scores = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60)
+        assert sorted(scores, key=scores.get, reverse=True) == ["b", "a", "c"]
+        assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+
+    def test_weighted_fusion(self):
+        scores = weighted_fusion(
+            ["a", "b"], [0.9, 0.5], ["b", "c"], [10.0, 2.0], weight=0.25
+        )
+        assert scores == pytest.approx({"a": 0.25, "b": 0.75, "c": 0.0})
+
+
+class FakeDatabase:
+    def __init__(self, candidates):
+        self.candidates = candidates
+
+    def query(self, query_embeddings):
+        return [candidates.documents[:2] for candidates in self.candidates]
+
+    def query_candidates(self, query_embeddings, n_results):
+        return self.candidates
+
+
+class ReverseReranker:
+    def rerank(self, queries, candidates):
+        return [list(reversed(range(len(c.ids)))) for c in candidates]
+
+
+class TestRetriever:
+    @pytest.fixture
+    def database(self, embeddings):
+        candidates = Candidates(
+            ids=["a", "b", "c"],
+            documents=["doc a", "doc b", "doc c"],
+            embeddings=embeddings,
+            distances=[0.0, 0.01, 0.4],
+        )
+        return FakeDatabase([candidates])
+
+    def test_without_dedup(self, database):
+        retriever = Retriever(database, None)
+        assert retriever.retrieve(np.zeros((1, 2))) == [["doc a", "doc b"]]
+
+    def test_cosine_dedup(self, database):
+        retriever = Retriever(database, {"top_k": 2, "dedup": "cosine"})
+        assert retriever.retrieve(np.ones((1, 2))) == [["doc a", "doc c"]]
+
+    def test_rerank_before_dedup(self, database):
+        retriever = Retriever(database, {"top_k": 2, "dedup": "cosine"})
+        retriever.reranker = ReverseReranker()
+        assert retriever.retrieve(np.ones((1, 2)), ["query"]) == [["doc c", "doc b"]]
+
+    @pytest.mark.parametrize("dedup", ["none", "cosine", "mmr"])
+    def test_hybrid_without_candidates(self, dedup):
+        candidates = Candidates(
+            ids=[],
+            documents=[],
+            embeddings=np.empty((0, 2), dtype=np.float32),
+            distances=[],
+        )
+        retriever = Retriever(FakeDatabase([candidates]), {"dedup": dedup})
+        retriever.lexical_index = LexicalIndex()
+        retriever.fusion = "rrf"
+        retriever.rrf_k = 60
+        assert retriever.retrieve(np.ones((1, 2)), ["query"]) == [[]]
+
+    def test_hybrid_skips_chunks_missing_from_collection(self, database):
+        class StaleDatabase(FakeDatabase):
+            def get_candidates(self, ids):
+                return Candidates(
+                    ids=[], documents=[], embeddings=np.empty((0, 2)), distances=[]
+                )
+
+        retriever = Retriever(StaleDatabase(database.candidates), {"top_k": 5})
+        retriever.lexical_index = LexicalIndex()
+        retriever.lexical_index.add(["a", "removed"], ["doc a", "query removed"])
+        retriever.fusion = "rrf"
+        retriever.rrf_k = 60
+        contexts = retriever.retrieve(np.ones((1, 2)), ["query"])
+        assert contexts == [["doc a", "doc b", "doc c"]]
+
+    def test_unknown_dedup(self, database):
+        with pytest.raises(ValueError):
+            Retriever(database, {"dedup": "unknown"})
@@ -0,0 +1,98 @@
+from datetime import datetime
+import threading
+
+import pytest
+
+from shared.instrumentation import instrumentation
+from shared.models import ExperimentResults, QueryResult
+from shared.service import QueryService, ServiceClient, create_server
+
+
+class FakePipeline:
+    """Retrieves the words of a query as its contexts."""
+
+    def __init__(self):
+        self.batches = []
+
+    def retrieve(self, query_texts):
+        with instrumentation.span("retrieval") as span:
+            span.add("embedding_tokens", len(query_texts))
+            self.batches.append(list(query_texts))
+            return [text.split() for text in query_texts]
+
+    def run_queries(self, queries=None, retrieve=None):
+        texts = [query["text"] for query in queries]
+        with instrumentation.span("run") as run_span:
+            contexts = (retrieve or self.retrieve)(texts)
+        return ExperimentResults(
+            results=[
+                QueryResult(
+                    query=text,
+                    contexts=query_contexts,
+                    template="{query} {contexts}",
+                    response=f"answer to {text}",
+                )
+                for text, query_contexts in zip(texts, contexts)
+            ],
+            model="fake",
+            parameters=[{"chunk_size": 512}],
+            timestamp_end=datetime(2024, 1, 1),
+            timings=run_span.summary(),
+            counters=run_span.totals(),
+        )
+
+
+@pytest.fixture
+def client():
+    service = QueryService({"fake": FakePipeline()}, max_batch_size=8, max_wait=0.001)
+    server = create_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield ServiceClient(f"http://127.0.0.1:{server.server_address[1]}")
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def test_health(client):
+    assert client.health() == {"pipelines": ["fake"]}
+
+
+def test_retrieve(client):
+    assert client.retrieve("fake", ["a b", "c"]) == [["a", "b"], ["c"]]
+
+
+def test_run(client):
+    results = client.run("fake", [{"text": "what is rag"}])
+    assert results.model == "fake"
+    assert results.timestamp_end == datetime(2024, 1, 1)
+    (query_result,) = results.results
+    assert query_result.contexts == ["what", "is", "rag"]
+    assert query_result.response == "answer to what is rag"
+    assert query_result.prompt == "what is rag what|is|rag"
+
+
+def test_run_records_batched_retrieval():
+    pipeline = FakePipeline()
+    service = QueryService({"fake": pipeline}, max_batch_size=8, max_wait=0.001)
+    queries = [{"text": "what is rag"}, {"text": "why"}]
+    results = service.run("fake", queries)
+    service.close()
+    expected = pipeline.run_queries(queries)
+    assert results.counters["embedding_tokens"] == expected.counters["embedding_tokens"]
+    assert {"retrieval", "retrieval_batch"} <= set(results.timings)
+
+
+def test_unknown_pipeline(client):
+    with pytest.raises(RuntimeError, match="not served"):
+        client.retrieve("unknown", ["a"])
+
+
+def test_stats(client):
+    client.retrieve("fake", ["a b"])
+    stats = client.stats()
+    assert set(stats) == {"timings", "counters", "batchers"}
+    assert stats["batchers"]["fake"]["items"] == 1
+    assert "retrieval_batch" in stats["timings"]